@@ -20,6 +20,11 @@ import json
 import os
 from datetime import datetime
 
+from cik_index import resolve_cik
+from handoff import write_frame
+from raw_archive import RawArchive
+from standardize import build_standardized_outputs
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -33,7 +38,14 @@ SEC_HEADERS = {
     "User-Agent": "InvestmentAnalysis carlos@example.com",  # SEC requires identification
     "Accept-Encoding": "gzip, deflate",
 }
-SEC_CIK = "0001633917"  # PayPal's CIK number
+DEFAULT_CIK = "0001633917"  # PayPal's CIK, used when cik_index.py has no match
+
+# Raw yfinance outputs snapshotted into data/raw/archive/ after each run
+RAW_FILES = [
+    "income_statement.csv", "balance_sheet.csv", "cash_flow.csv",
+    "quarterly_income_statement.csv", "quarterly_balance_sheet.csv", "quarterly_cash_flow.csv",
+    "stock_prices.csv", "company_info.json",
+]
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -97,6 +109,7 @@ def extract_yfinance_data():
     hist = stock.history(start="2019-01-01", end=datetime.now().strftime("%Y-%m-%d"))
     if hist is not None and not hist.empty:
         hist.to_csv(os.path.join(OUTPUT_DIR, "stock_prices.csv"))
+        write_frame(hist.reset_index(), "stock_prices")  # mapped by 02 instead of re-parsing the CSV
         print(f"  ✓ {len(hist)} trading days extracted")
         print(f"  ✓ Date range: {hist.index[0].strftime('%Y-%m-%d')} to {hist.index[-1].strftime('%Y-%m-%d')}")
     else:
@@ -136,9 +149,27 @@ def extract_yfinance_data():
             json.dump(key_stats, f, indent=2, default=str)
         print(f"  ✓ Company info saved ({len(key_stats)} fields)")
 
+    archive_raw_files()
+
     return income_stmt, balance_sheet, cashflow, hist, info
 
 
+def archive_raw_files():
+    """Snapshot today's raw yfinance files into the compressed raw archive."""
+    archive = RawArchive()
+    archived = 0
+    for filename in RAW_FILES:
+        path = os.path.join(OUTPUT_DIR, filename)
+        if os.path.exists(path):
+            content_type = "application/json" if filename.endswith(".json") else "text/csv"
+            archive.put_file("yfinance", f"{TICKER}/{filename}", path, content_type=content_type)
+            archived += 1
+    stats = archive.stats()
+    archive.close()
+    print(f"  ✓ {archived} raw files archived "
+          f"(archive: {stats['stored_bytes'] / 1e6:.1f} MB on disk for {stats['raw_bytes'] / 1e6:.1f} MB raw)")
+
+
 # =============================================================================
 # PHASE 1B: SEC EDGAR EXTRACTION
 # =============================================================================
@@ -152,7 +183,8 @@ def extract_sec_filings():
     print(f"{'='*60}\n")
 
     url = f"https://efts.sec.gov/LATEST/search-index?q=%22paypal%22&dateRange=custom&startdt=2019-01-01&enddt=2025-12-31&forms=10-K"
-    submissions_url = f"https://data.sec.gov/submissions/CIK{SEC_CIK}.json"
+    sec_cik = resolve_cik(TICKER, default=DEFAULT_CIK)
+    submissions_url = f"https://data.sec.gov/submissions/CIK{sec_cik}.json"
 
     try:
         response = requests.get(submissions_url, headers=SEC_HEADERS, timeout=15)
@@ -169,7 +201,7 @@ def extract_sec_filings():
         for i, form in enumerate(forms):
             if form == "10-K":
                 accession_clean = accessions[i].replace("-", "")
-                filing_url = f"https://www.sec.gov/Archives/edgar/data/{SEC_CIK}/{accession_clean}/{primary_docs[i]}"
+                filing_url = f"https://www.sec.gov/Archives/edgar/data/{sec_cik}/{accession_clean}/{primary_docs[i]}"
                 annual_filings.append({
                     "form": form,
                     "filing_date": dates[i],
@@ -276,10 +308,15 @@ def validate_extraction(income_stmt, balance_sheet, cashflow):
 # =============================================================================
 # PHASE 1D: GENERATE STANDARDIZED OUTPUT FOR EXCEL MODEL
 # =============================================================================
-def prepare_excel_input(income_stmt, balance_sheet, cashflow):
+def prepare_excel_input(income_stmt, balance_sheet, cashflow, ticker=TICKER):
     """
     Transform raw yfinance data into a clean, standardized format
     ready for direct import into the Excel financial model.
+
+    Each statement may be a single DataFrame (for `ticker`) or a dict of
+    {ticker: DataFrame}; all tickers are standardized in one vectorized
+    pass (see standardize.py). Single-ticker output keeps the original
+    "Fiscal Year"-indexed layout; multi-ticker files add a Ticker column.
     """
     print(f"\n{'='*60}")
     print(f"  PREPARING STANDARDIZED DATA FOR EXCEL MODEL")
@@ -288,57 +325,33 @@ def prepare_excel_input(income_stmt, balance_sheet, cashflow):
     processed_dir = os.path.join(os.path.dirname(OUTPUT_DIR), "processed")
     os.makedirs(processed_dir, exist_ok=True)
 
-    def standardize_statement(df, statement_name):
-        """Transpose and clean statement for Excel-friendly format."""
-        if df is None or df.empty:
-            return None
-        clean = df.copy()
-        clean.columns = [col.strftime("%Y") if hasattr(col, "strftime") else str(col) for col in clean.columns]
-        clean = clean.T.sort_index()
-        clean.index.name = "Fiscal Year"
-        clean = clean.div(1e6).round(2)  # Convert to millions USD
-        return clean
-
-    # Standardize all three statements (values in $M)
-    for stmt, name in [(income_stmt, "income_statement"), (balance_sheet, "balance_sheet"), (cashflow, "cash_flow")]:
-        clean = standardize_statement(stmt, name)
+    def by_ticker(stmt):
+        return stmt if isinstance(stmt, dict) else {ticker: stmt}
+
+    outputs = build_standardized_outputs(by_ticker(income_stmt), by_ticker(balance_sheet), by_ticker(cashflow))
+
+    def for_csv(frame):
+        """Drop the Ticker level when only one company was processed."""
+        if frame.index.get_level_values("Ticker").nunique() == 1:
+            return frame.droplevel("Ticker")
+        return frame
+
+    # Standardized statements (values in $M)
+    for name in ["income_statement", "balance_sheet", "cash_flow"]:
+        clean = outputs[name]
         if clean is not None:
             filepath = os.path.join(processed_dir, f"{name}_USD_millions.csv")
-            clean.to_csv(filepath)
+            for_csv(clean).to_csv(filepath)
             print(f"  ✓ {name}: {clean.shape[0]} years × {clean.shape[1]} items → {filepath}")
 
-    # Create a summary metrics file for quick Excel reference
-    if income_stmt is not None and balance_sheet is not None and cashflow is not None:
-        metrics = {}
-        years = [col.strftime("%Y") for col in income_stmt.columns if hasattr(col, "strftime")]
-
-        for col in income_stmt.columns:
-            yr = col.strftime("%Y") if hasattr(col, "strftime") else str(col)
-            rev = income_stmt.loc["Total Revenue", col] if "Total Revenue" in income_stmt.index else None
-            ni = income_stmt.loc["Net Income", col] if "Net Income" in income_stmt.index else None
-            gp = income_stmt.loc["Gross Profit", col] if "Gross Profit" in income_stmt.index else None
-            oi = income_stmt.loc["Operating Income", col] if "Operating Income" in income_stmt.index else None
-            ta = balance_sheet.loc["Total Assets", col] if col in balance_sheet.columns and "Total Assets" in balance_sheet.index else None
-            eq = balance_sheet.loc["Stockholders Equity", col] if col in balance_sheet.columns and "Stockholders Equity" in balance_sheet.index else None
-
-            metrics[yr] = {
-                "Revenue ($M)": round(rev / 1e6, 2) if pd.notna(rev) else None,
-                "Net Income ($M)": round(ni / 1e6, 2) if pd.notna(ni) else None,
-                "Gross Margin (%)": round(gp / rev * 100, 1) if pd.notna(gp) and pd.notna(rev) and rev != 0 else None,
-                "Operating Margin (%)": round(oi / rev * 100, 1) if pd.notna(oi) and pd.notna(rev) and rev != 0 else None,
-                "Net Margin (%)": round(ni / rev * 100, 1) if pd.notna(ni) and pd.notna(rev) and rev != 0 else None,
-                "ROE (%)": round(ni / eq * 100, 1) if pd.notna(ni) and pd.notna(eq) and eq != 0 else None,
-                "ROA (%)": round(ni / ta * 100, 1) if pd.notna(ni) and pd.notna(ta) and ta != 0 else None,
-                "Total Assets ($M)": round(ta / 1e6, 2) if pd.notna(ta) else None,
-                "Equity ($M)": round(eq / 1e6, 2) if pd.notna(eq) else None,
-            }
-
-        metrics_df = pd.DataFrame(metrics).T
-        metrics_df.index.name = "Fiscal Year"
-        metrics_df.to_csv(os.path.join(processed_dir, "key_metrics_summary.csv"))
+    # Summary metrics file for quick Excel reference
+    metrics_df = outputs["key_metrics_summary"]
+    if metrics_df is not None:
+        for_csv(metrics_df).to_csv(os.path.join(processed_dir, "key_metrics_summary.csv"))
         print(f"  ✓ Key metrics summary: {metrics_df.shape[0]} years × {metrics_df.shape[1]} metrics")
 
     print(f"\n  All processed files saved to: {processed_dir}/")
+    return outputs
 
 
 # =============================================================================
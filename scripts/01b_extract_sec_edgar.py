@@ -11,18 +11,28 @@ Required: pip install requests pandas --break-system-packages
 
 import requests
 import pandas as pd
-import json
 import os
+import threading
+import time
 from datetime import datetime
 
+from cik_index import resolve_cik
+from handoff import write_frame
+from raw_archive import RawArchive
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
-SEC_CIK = "0001633917"  # PayPal CIK (zero-padded to 10 digits)
+TICKER = "PYPL"
+DEFAULT_CIK = "0001633917"  # PayPal, zero-padded to 10 digits; used when cik_index.py has no match
 SEC_HEADERS = {"User-Agent": "InvestmentAnalysis carlos@example.com"}
 TARGET_YEARS = [2019, 2020, 2021]
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "raw")
 PROCESSED_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "processed")
+SEC_ARCHIVE_SOURCE = "sec_companyfacts"  # raw_archive source name for XBRL payloads
+SEC_REQUESTS_PER_SECOND = 8              # all threads together; SEC's fair-access limit is 10/s
+_ARCHIVE_LOCK = threading.Lock()         # one archive writer at a time (pipelined universe loads)
+_archive = None                          # opened by the first fetch, shared by every fetching thread
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
@@ -177,19 +187,56 @@ CASH_FLOW_TAGS = {
 # =============================================================================
 # EXTRACTION LOGIC
 # =============================================================================
-def fetch_company_facts():
-    """Fetch all XBRL facts for PayPal from SEC EDGAR."""
-    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{SEC_CIK}.json"
-    print(f"Fetching SEC EDGAR XBRL data from:\n  {url}\n")
+class RateLimiter:
+    """At most `rate` calls of wait() per second across threads, spaced evenly."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until this caller's slot; slots are handed out in call order."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
+_SEC_LIMITER = RateLimiter(SEC_REQUESTS_PER_SECOND)
+
+
+def fetch_company_facts(cik=None, verbose=True):
+    """
+    Fetch all XBRL facts for a company (PayPal by default) from SEC EDGAR.
+    Without a CIK, TICKER is resolved through the CIK index on first use.
+    Safe to call from several threads: requests share one rate limiter
+    (SEC_REQUESTS_PER_SECOND), and archiving is serialized on one shared
+    raw archive, since its pack file takes one writer at a time.
+    """
+    global _archive
+    if cik is None:
+        cik = resolve_cik(TICKER, default=DEFAULT_CIK)
+    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+    if verbose:
+        print(f"Fetching SEC EDGAR XBRL data from:\n  {url}\n")
+
+    _SEC_LIMITER.wait()
     response = requests.get(url, headers=SEC_HEADERS, timeout=30)
     response.raise_for_status()
     data = response.json()
 
-    # Save full response for reference
-    with open(os.path.join(OUTPUT_DIR, "sec_xbrl_full.json"), "w") as f:
-        json.dump(data, f)
-    print(f"  ✓ Full XBRL data saved ({len(json.dumps(data)) / 1e6:.1f} MB)")
+    # Save full response for reference (compressed, one archive entry per refresh)
+    with _ARCHIVE_LOCK:
+        if _archive is None:
+            _archive = RawArchive()
+        _archive.put(SEC_ARCHIVE_SOURCE, cik, response.content, content_type="application/json")
+        stats = _archive.stats() if verbose else None
+    if verbose:
+        print(f"  ✓ Full XBRL data archived ({len(response.content) / 1e6:.1f} MB raw, "
+              f"archive now {stats['stored_bytes'] / 1e6:.1f} MB for {stats['entries']} entries)")
 
     return data
 
@@ -367,6 +414,7 @@ def merge_with_yfinance(sec_is, sec_bs, sec_cf):
 
         output_path = os.path.join(PROCESSED_DIR, f"combined_{stmt_name}_USD_millions.csv")
         combined.to_csv(output_path)
+        write_frame(combined, f"combined_{stmt_name}")
         print(f"  ✓ {stmt_name}: {len(combined)} years merged → {output_path}")
         print(f"    Years: {', '.join(combined.index.tolist())}")
 
@@ -384,7 +432,8 @@ def main():
     print(f"{'#'*60}")
 
     # Step 1: Fetch all XBRL facts
-    facts_data = fetch_company_facts()
+    sec_cik = resolve_cik(TICKER, default=DEFAULT_CIK)
+    facts_data = fetch_company_facts(sec_cik)
 
     # Step 2: Build statements for missing years
     is_df = build_statement(facts_data, INCOME_STATEMENT_TAGS, "Income Statement")
@@ -406,7 +455,7 @@ def main():
     print(f"\n{'#'*60}")
     print(f"  EXTRACTION COMPLETE")
     print(f"  Next: Cross-check key figures against 10-K filings")
-    print(f"  SEC EDGAR: https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={SEC_CIK}&type=10-K")
+    print(f"  SEC EDGAR: https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={sec_cik}&type=10-K")
     print(f"{'#'*60}\n")
 
 
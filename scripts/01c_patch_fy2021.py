@@ -8,6 +8,8 @@ Run from scripts/ folder AFTER 01b_extract_sec_edgar.py
 import pandas as pd
 import os
 
+from handoff import write_frame
+
 PROCESSED_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "processed")
 BS_FILE = os.path.join(PROCESSED_DIR, "combined_balance_sheet_USD_millions.csv")
 
@@ -52,6 +54,7 @@ for col_name, value in FY2021_PATCH.items():
         skipped += 1
 
 df.to_csv(BS_FILE)
+write_frame(df, "combined_balance_sheet")  # keep the 02 hand-off in sync with the patched CSV
 print(f"\n  Patched: {patched} values | Skipped: {skipped}")
 
 # Verify balance
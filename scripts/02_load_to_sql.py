@@ -1,21 +1,50 @@
 """
 PayPal (PYPL) - SQL Database Loader
 ====================================
-Creates SQLite database from schema and loads processed CSV data
-into the star schema fact tables.
+Creates the database from schema and loads processed CSV data into the
+star schema fact tables. SQLite by default; DuckDB (columnar, for
+scan-heavy analytics) with --backend duckdb, see db_backends.py.
 
 Run AFTER extraction scripts (01_extract, 01b, 01c).
 Requires: combined_*_USD_millions.csv files in data/processed/
-
-Usage: python 02_load_to_sql.py
+Optional: quarterly_*.csv from 01 in data/raw/ (quarterly facts and the TTM scenario)
+
+Usage: python 02_load_to_sql.py                 # reload every source (history kept)
+       python 02_load_to_sql.py --incremental   # refresh in place, only changed facts
+       python 02_load_to_sql.py --bulk          # either mode, with bulk-ingest pragmas
+       python 02_load_to_sql.py --migrate       # only upgrade an existing database's schema
+       python 02_load_to_sql.py --rebuild       # move the database aside (.bak) and build a new one
+       python 02_load_to_sql.py --backend duckdb  # load data/paypal_analysis.duckdb instead
+       python 02_load_to_sql.py --incremental --universe tickers.txt  # plus SEC statements for a universe
 """
 
-import sqlite3
+import argparse
+import hashlib
+import importlib
+import time
+import numpy as np
 import pandas as pd
 import os
 import json
+import re
 from datetime import datetime
 
+from bitemporal import backfill_versions, knowledge_time, record_versions, retire_facts, staging_table
+from cik_index import normalize_ticker, resolve_cik
+from db_backends import BACKENDS, FILE_SUFFIX, backend_name, connect, read_sql
+from handoff import handoff_path, is_fresh, load_frame
+from materialize import refresh_materialized
+from migrations import add_column, backfill, current_version, deferred_indexes, key_columns, migrate
+from model_runs import RUN_FACT_TABLES, adopt_legacy_runs
+from pipeline import FETCH_WORKERS, run_pipeline
+from query_api import QueryAPI
+from rollup import refresh_rollup
+from statement_cube import LINE_ITEMS, extract_company
+from stock_returns import refresh_stock_returns
+from ttm import TTM_SCENARIO, refresh_ttm
+
+_sec = importlib.import_module("01b_extract_sec_edgar")
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -24,6 +53,7 @@ SCHEMA_PATH = os.path.join(BASE_DIR, "sql", "schema.sql")
 DB_PATH = os.path.join(BASE_DIR, "data", "paypal_analysis.db")
 PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
 RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+TICKER = "PYPL"                     # company the processed CSVs describe
 
 # =============================================================================
 # COLUMN MAPPING: CSV column names → dim_line_item.item_name
@@ -118,38 +148,314 @@ CASH_FLOW_MAP = {
     "Repayment Of Debt": "Debt Repayment",
 }
 
+# Raw yfinance quarterly statements written by 01 (line items x quarter-end
+# dates, raw USD) and the maps their line items go through
+QUARTERLY_STATEMENTS = [
+    ("quarterly_income_statement.csv", INCOME_STMT_MAP, "income_statement"),
+    ("quarterly_balance_sheet.csv", BALANCE_SHEET_MAP, "balance_sheet"),
+    ("quarterly_cash_flow.csv", CASH_FLOW_MAP, "cash_flow"),
+]
+# Quarterly line items kept as reported instead of scaled to USD millions
+PER_SHARE_ITEMS = {"Basic EPS", "Diluted EPS"}
+
 
 # =============================================================================
-# DATABASE SETUP
+# DATABASE SETUP & SCHEMA MIGRATIONS
 # =============================================================================
-def create_database():
-    """Create SQLite database from schema file."""
-    print(f"\n{'='*60}")
-    print(f"  CREATING DATABASE")
-    print(f"{'='*60}\n")
+def ensure_schema(conn):
+    """
+    Bring an existing (or empty) database up to the current schema in
+    place, without dropping data: pending MIGRATIONS plus schema.sql (see
+    migrations.py). Returns the migrations run.
+    """
+    done = migrate(conn, SCHEMA_PATH, MIGRATIONS)
+    for version, description, seconds in done:
+        print(f"  ✓ Migration {version} applied in {seconds:.2f}s: {description}")
+    return done
+
+
+# Column layout of every fact table since migration 2. Older databases have
+# the AUTOINCREMENT `id` layout and/or no company_id, or assumptions and
+# valuation keyed by company/scenario instead of model run; those tables
+# are rebuilt. (fact_stock_price has since become fact_stock_bar, migration 4.)
+CLUSTERED_FACT_TABLES = {
+    "fact_financials": ["company_id", "scenario_id", "period_id", "line_item_id", "amount", "source",
+                        "load_batch_id", "known_from"],
+    "fact_ratios": ["company_id", "scenario_id", "period_id", "ratio_id", "value", "load_batch_id"],
+    "fact_assumptions": ["run_id", "driver_id", "period_id", "value"],
+    "fact_valuation": ["run_id", "metric_id", "value"],
+    "fact_stock_price": ["company_id", "trade_date", "open_price", "high_price", "low_price", "close_price",
+                         "adj_close", "volume", "load_batch_id"],
+}
 
-    # Remove existing DB to start fresh
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
-        print(f"  Removed existing database")
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def add_load_batch_columns(conn):
+    """Migration 1 (before): every fact row records the load batch that last changed it."""
+    for table in ["fact_financials", "fact_ratios", "fact_stock_price"]:
+        add_column(conn, table, "load_batch_id", "INTEGER REFERENCES etl_load_batch(batch_id)")
+
+
+def set_aside_legacy_tables(conn):
+    """
+    Migration 2 (before): rename fact tables in an older layout (columns
+    CLUSTERED_FACT_TABLES doesn't have, or no leading key column) to
+    _legacy_<name> and drop their indexes, so schema.sql can create the
+    new tables and indexes under the original names. Columns later
+    migrations ALTER in don't count. Returns the tables moved.
+    """
+    legacy = []
+    for table, columns in CLUSTERED_FACT_TABLES.items():
+        present = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if present and (set(present) - set(columns) or columns[0] not in present):
+            legacy.append(table)
+    for table in legacy:
+        set_aside(conn, table)
+    return legacy
+
+
+def set_aside(conn, table):
+    """Drop a table's indexes and rename it to _legacy_<name>, in one transaction."""
+    indexes = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    ).fetchall()
+    with conn:
+        for (index,) in indexes:
+            conn.execute(f"DROP INDEX {index}")
+        conn.execute(f"ALTER TABLE {table} RENAME TO _legacy_{table}")
+
+
+def copy_legacy_rows(conn, ticker=TICKER):
+    """
+    Migration 2 (after): copy set-aside rows into the new tables in
+    clustered-key order. Rows from single-company databases are assigned
+    to `ticker`. Assumptions and valuation rows become one scenario run
+    per company and scenario. Picks up any _legacy_ table left behind by an
+    interrupted run. Prices are left for migration 4 (fact_stock_price is
+    a view by then).
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    legacy = [table for table in CLUSTERED_FACT_TABLES if f"_legacy_{table}" in existing and table in existing]
+    if not legacy:
+        return
+    with conn:
+        company_id = register_company(conn, ticker)
+        run_tables = [table for table in legacy if table in RUN_FACT_TABLES]
+        if run_tables:
+            adopt_legacy_runs(conn, run_tables, company_id)
+    for table in legacy:
+        if table in RUN_FACT_TABLES:
+            continue
+        present = {row[1] for row in conn.execute(f"PRAGMA table_info(_legacy_{table})")}
+        columns = CLUSTERED_FACT_TABLES[table]
+        select = [col if col in present else "?" if col == "company_id" else "NULL" for col in columns]
+        key_positions = [str(columns.index(col) + 1) for col in key_columns(conn, table)]
+        with deferred_indexes(conn, table), conn:
+            conn.execute(
+                f"""INSERT INTO {table} ({", ".join(columns)})
+                    SELECT {", ".join(select)} FROM _legacy_{table} ORDER BY {", ".join(key_positions)}""",
+                (company_id,) if "company_id" not in present else (),
+            )
+            conn.execute(f"DROP TABLE _legacy_{table}")
+    print(f"  ✓ Rebuilt on company-clustered keys: {', '.join(legacy)}")
+
+
+def add_knowledge_time(conn):
+    """Migration 3 (before): fact_financials.known_from (see bitemporal.py)."""
+    add_column(conn, "fact_financials", "known_from", "TEXT")
+
+
+def backfill_knowledge_time(conn):
+    """
+    Migration 3 (after): facts loaded before versioning get their batch's
+    start (else now) as knowledge time and one open version each, both in
+    key slices so loads and readers carry on in between.
+    """
+    updated = backfill(
+        conn, "fact_financials",
+        """known_from = COALESCE((SELECT lb.started_at FROM etl_load_batch lb
+                                  WHERE lb.batch_id = fact_financials.load_batch_id), ?)""",
+        "known_from IS NULL", (datetime.now().isoformat(timespec="microseconds"),),
+    )
+    versions = backfill_versions(conn)
+    print(f"  ✓ Knowledge time set on {updated} facts, {versions} versions in fact_financials_history")
+
+
+def set_aside_price_table(conn):
+    """
+    Migration 4 (before): move the TEXT-dated fact_stock_price table to
+    _legacy_fact_stock_price, so schema.sql can create fact_stock_bar and
+    the fact_stock_price view in its place.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fact_stock_price'").fetchone():
+        set_aside(conn, "fact_stock_price")
+
+
+def compact_stock_prices(conn, ticker=TICKER):
+    """
+    Migration 4 (after): copy set-aside price rows (either older layout)
+    into fact_stock_bar in key order, dates converted to day numbers.
+    Rows without a company_id are assigned to `ticker`.
+    """
+    present = {row[1] for row in conn.execute("PRAGMA table_info(_legacy_fact_stock_price)")}
+    if not present:
+        return
+    columns = ["company_id", "trade_day", *PRICE_COLUMN_MAP.values(), "load_batch_id"]
+    select = ["company_id" if "company_id" in present else "?",
+              "CAST(julianday(trade_date) - 2440587.5 AS INTEGER)",
+              *(col if col in present else "NULL" for col in columns[2:])]
+    with conn:
+        params = (register_company(conn, ticker),) if "company_id" not in present else ()
+    with deferred_indexes(conn, "fact_stock_bar"), conn:
+        cursor = conn.execute(
+            f"""INSERT INTO fact_stock_bar ({", ".join(columns)})
+                SELECT {", ".join(select)} FROM _legacy_fact_stock_price ORDER BY 1, 2""",
+            params,
+        )
+        conn.execute("DROP TABLE _legacy_fact_stock_price")
+    print(f"  ✓ Compacted {max(cursor.rowcount, 0)} price rows into fact_stock_bar")
+
+
+def build_rollup(conn):
+    """Migration 5 (after): build agg_rollup in full from the facts and ratios already loaded (see rollup.py)."""
+    cells = refresh_rollup(conn)
+    print(f"  ✓ Rollup cube built: {cells} cells")
+
+
+def drop_unique_cik(conn):
+    """
+    Migration 6 (after): rebuild dim_company without the UNIQUE constraint
+    on cik, so share classes of one filer (GOOG/GOOGL) can both be
+    registered; company_ids are kept. Neither engine can drop a column
+    constraint in place. On SQLite, legacy_alter_table keeps the rename
+    from re-checking views, which briefly point at no table.
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'dim_company'").fetchone()
+    if row is None or not re.search(r"\bcik\s+\w+\s+UNIQUE\b", row[0], re.I):
+        return
+    duckdb = backend_name(conn) == "duckdb"
+    key = "BIGINT PRIMARY KEY DEFAULT nextval('seq_dim_company')" if duckdb else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    if not duckdb:
+        conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        with deferred_indexes(conn, "dim_company"), conn:
+            conn.execute(
+                f"""CREATE TABLE _rebuild_dim_company (
+                        company_id {key}, ticker TEXT NOT NULL UNIQUE, cik TEXT,
+                        company_name TEXT, fiscal_year_end_month INTEGER DEFAULT 12)"""
+            )
+            conn.execute(
+                """INSERT INTO _rebuild_dim_company (company_id, ticker, cik, company_name, fiscal_year_end_month)
+                   SELECT company_id, ticker, cik, company_name, fiscal_year_end_month FROM dim_company"""
+            )
+            conn.execute("DROP TABLE dim_company")
+            conn.execute("ALTER TABLE _rebuild_dim_company RENAME TO dim_company")
+    finally:
+        if not duckdb:
+            conn.execute("PRAGMA legacy_alter_table = OFF")
+
+
+# Applied in order, each once (recorded in schema_version). Never renumber or
+# edit a released migration; add the next number instead.
+MIGRATIONS = [
+    (1, "load_batch_id on fact tables", add_load_batch_columns, None),
+    (2, "company-clustered fact tables, assumptions and valuation per model run",
+     set_aside_legacy_tables, copy_legacy_rows),
+    (3, "knowledge time on fact_financials, versions in fact_financials_history",
+     add_knowledge_time, backfill_knowledge_time),
+    (4, "fact_stock_bar with integer day numbers, fact_stock_price as a view",
+     set_aside_price_table, compact_stock_prices),
+    (5, "agg_rollup cube over company groups", None, build_rollup),
+    (6, "dim_company.cik no longer unique (share classes of one filer)", None, drop_unique_cik),
+]
+
+
+def register_company(conn, ticker, company_name=None):
+    """
+    company_id for a ticker, adding it to dim_company (CIK from the SEC
+    index) if new. Each share class is its own company, so GOOG and GOOGL
+    get two company_ids with the same CIK.
+    """
+    ticker = normalize_ticker(ticker)
+    row = conn.execute("SELECT company_id FROM dim_company WHERE ticker = ?", (ticker,)).fetchone()
+    if row:
+        return row[0]
+    cursor = conn.execute(
+        "INSERT INTO dim_company (ticker, cik, company_name) VALUES (?, ?, ?)",
+        (ticker, resolve_cik(ticker), company_name),
+    )
+    return cursor.lastrowid
+
+
+def migrate_database(db_path=None, backend="sqlite"):
+    """
+    Upgrade an existing database (e.g. paypal_analysis.db) in place to the
+    current schema and report its version and fact table sizes. Safe to re-run.
+    """
+    conn = connect(db_path or database_path(backend), backend)
+    done = ensure_schema(conn)
+    print(f"  ✓ Schema version {current_version(conn)} ({len(done)} migrations applied)")
+    for table in CLUSTERED_FACT_TABLES:
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"  ✓ {table}: {count} rows")
+    conn.close()
+
 
-    with open(SCHEMA_PATH, "r") as f:
-        schema_sql = f.read()
+def database_path(backend="sqlite"):
+    """DB_PATH for SQLite; the same name with the backend's suffix otherwise."""
+    return os.path.splitext(DB_PATH)[0] + FILE_SUFFIX[backend]
+
+
+def move_aside(db_path):
+    """
+    Rename a database file (and its -wal / -shm / .wal sidecars) to
+    <file>.<timestamp>.bak, keeping its fact history. Returns the new path.
+    """
+    backup = f"{db_path}.{datetime.now().strftime('%Y%m%dT%H%M%S')}.bak"
+    for suffix in ["", "-wal", "-shm", ".wal"]:
+        if os.path.exists(db_path + suffix):
+            os.replace(db_path + suffix, backup + suffix)
+    return backup
+
+
+def create_database(incremental=False, backend="sqlite", rebuild=False):
+    """
+    Create the database from the schema file, or upgrade the schema of the
+    existing one. The file is never removed, so fact_financials_history
+    (every version ever loaded) survives a full build. A full build forgets
+    which files and blocks were loaded, so every source is re-read and
+    compared fact by fact; facts the sources no longer have are retired
+    (their versions closed) rather than wiped. Incremental mode switches a
+    SQLite file to WAL so readers can keep it open while the refresh writes.
+    `rebuild` moves an existing file aside first (see move_aside), e.g.
+    after a failed integrity check, and starts from an empty database.
+    """
+    print(f"\n{'='*60}")
+    print(f"  {'REFRESHING' if incremental else 'CREATING'} DATABASE ({backend})")
+    print(f"{'='*60}\n")
 
-    cursor.executescript(schema_sql)
-    conn.commit()
+    db_path = database_path(backend)
+    if rebuild and os.path.exists(db_path):
+        print(f"  Moved the existing database aside (fact history kept there): {move_aside(db_path)}")
+    existed = os.path.exists(db_path)
+    conn = connect(db_path, backend)
+    if incremental and backend == "sqlite":
+        conn.execute("PRAGMA journal_mode=WAL")
+    ensure_schema(conn)
+    if not incremental and existed:
+        with conn:
+            conn.execute("DELETE FROM etl_block_hash")
+            conn.execute("DELETE FROM etl_source_file")
+        print(f"  Kept existing database (fact history preserved); every source will be reloaded")
+    cursor = conn.cursor()
 
     # Verify tables created
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
     tables = [row[0] for row in cursor.fetchall()]
-    print(f"  ✓ Database created: {DB_PATH}")
+    print(f"  ✓ Database {'opened' if existed else 'created'}: {db_path}")
     print(f"  ✓ Tables: {', '.join(tables)}")
 
     # Verify dimension data
-    for dim_table in ["dim_period", "dim_scenario", "dim_line_item", "dim_ratio"]:
+    for dim_table in ["dim_company", "dim_period", "dim_scenario", "dim_line_item", "dim_ratio"]:
         cursor.execute(f"SELECT COUNT(*) FROM {dim_table}")
         count = cursor.fetchone()[0]
         print(f"  ✓ {dim_table}: {count} rows")
@@ -159,26 +465,201 @@ def create_database():
 
 
 # =============================================================================
-# DATA LOADING
+# BULK INGEST MODE
 # =============================================================================
-def get_period_id(cursor, fiscal_year):
-    """Look up period_id for a given fiscal year."""
-    cursor.execute(
-        "SELECT period_id FROM dim_period WHERE fiscal_year = ? AND quarter IS NULL",
-        (int(fiscal_year),)
-    )
-    result = cursor.fetchone()
-    return result[0] if result else None
+# Per-connection settings for --bulk. WAL with synchronous=OFF means a crash
+# mid-load can lose the load (not corrupt the last checkpoint), which is
+# acceptable because the batch is simply re-run from the source files.
+BULK_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144,          # 256 MB of page cache
+    "mmap_size": 1 << 30,           # map up to 1 GB of the file
+    "temp_store": "MEMORY",
+}
+DURABLE_PRAGMAS = {"synchronous": "FULL"}
+
+
+def enable_bulk_mode(conn):
+    """
+    Apply BULK_PRAGMAS and drop the fact tables' secondary indexes so the
+    load only maintains the clustered keys. Returns the state that
+    finish_bulk_mode() needs to put everything back. If the run dies in
+    between, the next ensure_schema() recreates the indexes from schema.sql.
+    """
+    state = {
+        "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0],
+        "indexes": conn.execute(
+            """SELECT name, sql FROM sqlite_master
+               WHERE type = 'index' AND tbl_name LIKE 'fact\\_%' ESCAPE '\\' AND sql IS NOT NULL"""
+        ).fetchall(),
+    }
+    for pragma, value in BULK_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    with conn:
+        for name, _ in state["indexes"]:
+            conn.execute(f"DROP INDEX {name}")
+    print(f"  ✓ Bulk mode: WAL, synchronous=OFF, {len(state['indexes'])} index builds deferred")
+    return state
+
+
+def finish_bulk_mode(conn, state):
+    """
+    Build the deferred indexes, checkpoint, restore durable settings and
+    the original journal mode, then run an integrity check. Returns True
+    when the database checks out.
+    """
+    start = time.perf_counter()
+    with conn:
+        for _, sql in state["indexes"]:
+            conn.execute(sql)
+    print(f"  ✓ Rebuilt {len(state['indexes'])} deferred indexes in {time.perf_counter() - start:.2f}s")
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    for pragma, value in DURABLE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    conn.execute(f"PRAGMA journal_mode = {state['journal_mode']}")
+
+    start = time.perf_counter()
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if problems == ["ok"]:
+        print(f"  ✓ Durable settings restored (journal_mode={state['journal_mode']}, synchronous=FULL), "
+              f"integrity check ok in {time.perf_counter() - start:.2f}s")
+        return True
+    print(f"  ⚠ Integrity check failed after bulk load:")
+    for problem in problems[:10]:
+        print(f"    - {problem}")
+    return False
 
 
-def get_line_item_id(cursor, statement_type, item_name):
-    """Look up line_item_id for a given statement type and item name."""
-    cursor.execute(
-        "SELECT line_item_id FROM dim_line_item WHERE statement_type = ? AND item_name = ?",
-        (statement_type, item_name)
+# =============================================================================
+# LOAD BATCHES & CHANGE DETECTION
+# =============================================================================
+def start_load_batch(conn, mode):
+    """Open a load batch; every fact written in this run carries its id."""
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO etl_load_batch (mode, started_at) VALUES (?, ?)",
+            (mode, datetime.now().isoformat(timespec="microseconds")),
+        )
+    return cursor.lastrowid
+
+
+def batch_mode(conn, batch_id):
+    """'full' or 'incremental' for a load batch; None without one."""
+    if batch_id is None:
+        return None
+    row = conn.execute("SELECT mode FROM etl_load_batch WHERE batch_id = ?", (batch_id,)).fetchone()
+    return row[0] if row else None
+
+
+def finish_load_batch(conn, batch_id, status="complete"):
+    """Close a batch: stamp finished_at (ISO, microseconds like started_at) and its status."""
+    with conn:
+        conn.execute(
+            "UPDATE etl_load_batch SET finished_at = ?, status = ? WHERE batch_id = ?",
+            (datetime.now().isoformat(timespec="microseconds"), status, batch_id),
+        )
+
+
+def add_batch_counts(conn, batch_id, written, unchanged):
+    """Add written / unchanged fact counts to a batch's running totals; no-op without a batch."""
+    if batch_id is None:
+        return
+    conn.execute(
+        """UPDATE etl_load_batch SET rows_written = rows_written + ?, rows_unchanged = rows_unchanged + ?
+           WHERE batch_id = ?""",
+        (written, unchanged, batch_id),
     )
-    result = cursor.fetchone()
-    return result[0] if result else None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_unchanged(conn, source_name, content_hash):
+    """True when this exact file was already loaded by a completed batch."""
+    row = conn.execute(
+        """SELECT 1 FROM etl_source_file sf JOIN etl_load_batch lb ON sf.batch_id = lb.batch_id
+           WHERE sf.source_name = ? AND sf.content_hash = ? AND lb.status = 'complete'""",
+        (source_name, content_hash),
+    ).fetchone()
+    return row is not None
+
+
+def changed_blocks(conn, source_name, rows, block_col, value_cols):
+    """
+    Hash each block of `rows` (grouped by `block_col`) and keep only blocks
+    whose hash differs from the last load. Returns (changed rows, {block: hash}).
+    """
+    if rows.empty:
+        return rows, {}
+    row_hashes = pd.util.hash_pandas_object(rows[[block_col, *value_cols]], index=False)
+    block_hashes = row_hashes.groupby(rows[block_col].to_numpy()).sum().map(lambda h: f"{h:016x}")
+    block_hashes.index = block_hashes.index.astype(str)
+
+    stored = dict(conn.execute(
+        "SELECT block_key, content_hash FROM etl_block_hash WHERE source_name = ?", (source_name,)
+    ).fetchall())
+    changed = {key: h for key, h in block_hashes.items() if stored.get(key) != h}
+    keep = rows[block_col].astype(str).isin(changed).to_numpy()
+    return rows[keep], changed
+
+
+def record_source(conn, source_name, content_hash, batch_id, block_hashes):
+    """Remember what was loaded so the next incremental run can skip it."""
+    if batch_id is None:
+        return
+    with conn:
+        conn.executemany(
+            """INSERT OR REPLACE INTO etl_block_hash (source_name, block_key, content_hash, batch_id)
+               VALUES (?, ?, ?, ?)""",
+            [(source_name, key, h, batch_id) for key, h in block_hashes.items()],
+        )
+        conn.execute(
+            """INSERT OR REPLACE INTO etl_source_file (source_name, content_hash, batch_id, loaded_at)
+               VALUES (?, ?, ?, ?)""",
+            (source_name, content_hash, batch_id, datetime.now().isoformat(timespec="seconds")),
+        )
+
+
+# =============================================================================
+# DATA LOADING
+# =============================================================================
+def load_dimension_keys(conn):
+    """
+    Load the dimension lookups once per run instead of one SELECT per cell:
+    fiscal_year → period_id (annual), (fiscal_year, quarter) → period_id
+    (actual quarters), (statement_type, item_name) → line_item_id,
+    scenario_name → scenario_id, ticker → company_id.
+    """
+    periods = {}
+    for period_id, fiscal_year in conn.execute(
+        "SELECT period_id, fiscal_year FROM dim_period WHERE quarter IS NULL ORDER BY period_id"
+    ):
+        periods.setdefault(fiscal_year, period_id)
+    return {
+        "period": periods,
+        "quarter": {
+            (fiscal_year, quarter): period_id
+            for period_id, fiscal_year, quarter in conn.execute(
+                "SELECT period_id, fiscal_year, quarter FROM dim_period "
+                "WHERE quarter IS NOT NULL AND period_type = 'actual'"
+            )
+        },
+        "line_item": {
+            (statement_type, item_name): line_item_id
+            for line_item_id, statement_type, item_name in conn.execute(
+                "SELECT line_item_id, statement_type, item_name FROM dim_line_item"
+            )
+        },
+        "scenario": dict(conn.execute("SELECT scenario_name, scenario_id FROM dim_scenario").fetchall()),
+        "company": dict(conn.execute("SELECT ticker, company_id FROM dim_company").fetchall()),
+    }
 
 
 def get_scenario_id(cursor, scenario_name="Actual"):
@@ -191,310 +672,858 @@ def get_scenario_id(cursor, scenario_name="Actual"):
     return result[0] if result else None
 
 
-def load_statement(conn, csv_path, column_map, statement_type):
-    """Load a financial statement CSV into fact_financials."""
+def build_fact_rows(df, column_map, statement_type, keys, scenario_name="Actual", ticker=TICKER, quarters=None):
+    """
+    Turn a statement frame (index: fiscal years, columns: CSV line items)
+    into fact_financials rows without per-cell Python work. When two CSV
+    columns map to one line item the later column wins, as it did in the
+    per-cell loader, and only its row is kept: one row per fact key, so
+    written / unchanged counts and history versions are per fact on either
+    backend. A (Ticker, Fiscal Year) index, as standardize.to_wide()
+    produces, loads several companies at once; otherwise every row belongs
+    to `ticker`.
+    Tickers must already be in keys["company"] (see register_company).
+    `quarters` (one fiscal quarter per row) loads quarterly periods instead
+    of annual ones; they must already be in keys["quarter"].
+
+    Returns (rows DataFrame, set of unmapped CSV columns).
+    """
+    if isinstance(df.index, pd.MultiIndex):
+        tickers, year_labels = df.index.get_level_values(0), df.index.get_level_values(-1)
+    else:
+        tickers, year_labels = pd.Index([ticker] * len(df)), df.index
+    company_ids = tickers.map(lambda t: keys["company"].get(normalize_ticker(str(t)))).to_numpy(dtype=float)
+    years = pd.to_numeric(pd.Series(year_labels.astype(str).str[:4]), errors="coerce")
+    if quarters is None:
+        quarters = np.zeros(len(df), dtype=int)
+        period_ids = years.map(keys["period"]).to_numpy(dtype=float)
+    else:
+        quarters = np.asarray(quarters, dtype=int)
+        period_ids = pd.Series(list(zip(years, quarters))).map(keys["quarter"]).to_numpy(dtype=float)
+
+    std_names = pd.Series(df.columns).map(column_map)
+    unmapped = set(df.columns[std_names.isna().to_numpy()])
+    line_item_ids = pd.Series(
+        [keys["line_item"].get((statement_type, name)) for name in std_names], dtype=float
+    ).to_numpy()
+
+    values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    row_ok = ~np.isnan(period_ids) & ~np.isnan(company_ids)
+    mask = ~np.isnan(values) & row_ok[:, None] & ~np.isnan(line_item_ids)[None, :]
+    row_idx, col_idx = np.nonzero(mask)
+
+    # Source label per distinct year (and quarter), broadcast back to the rows
+    codes = years.to_numpy()[row_idx].astype(int) * 10 + quarters[row_idx]
+    unique_codes, year_pos = np.unique(codes, return_inverse=True)
+    labels = np.array([
+        f"yfinance FY{code // 10}Q{code % 10}" if code % 10
+        else f"{'10-K' if code // 10 <= 2021 else 'yfinance'} FY{code // 10}"
+        for code in unique_codes
+    ], dtype=object)
+    rows = pd.DataFrame({
+        "company_id": company_ids[row_idx].astype(np.int64),
+        "period_id": period_ids[row_idx].astype(np.int64),
+        "line_item_id": line_item_ids[col_idx].astype(np.int64),
+        "scenario_id": keys["scenario"][scenario_name],
+        "amount": values[row_idx, col_idx],
+        "source": labels[year_pos],
+    })
+    return rows.drop_duplicates(FACT_KEY, keep="last", ignore_index=True), unmapped
+
+
+FACT_COLUMNS = ["company_id", "period_id", "line_item_id", "scenario_id", "amount", "source"]
+FACT_KEY = ["company_id", "scenario_id", "period_id", "line_item_id"]
+
+
+def write_fact_rows(conn, rows, batch_id=None):
+    """
+    Upsert fact_financials rows with one executemany in one transaction.
+    Rows whose amount and source already match are left untouched (not
+    rewritten, batch id and knowledge time kept); the previous version of
+    a changed fact stays in fact_financials_history (see bitemporal.py);
+    only this call's keys are versioned, however much the batch has
+    already written. Returns the number of rows actually written.
+    """
+    known_at = knowledge_time(conn, batch_id)
+    with conn:
+        staging_table(conn, "_written_facts")
+        conn.executemany("INSERT INTO _written_facts (company_id, scenario_id, period_id, line_item_id) "
+                         "VALUES (?, ?, ?, ?)", zip(*(rows[col].tolist() for col in FACT_KEY)))
+        cursor = conn.executemany(
+            f"""INSERT INTO fact_financials ({", ".join(FACT_COLUMNS)}, load_batch_id, known_from)
+                VALUES ({", ".join("?" * len(FACT_COLUMNS))}, ?, ?)
+                ON CONFLICT(company_id, scenario_id, period_id, line_item_id) DO UPDATE SET
+                    amount = excluded.amount, source = excluded.source, load_batch_id = excluded.load_batch_id,
+                    known_from = excluded.known_from
+                WHERE amount IS NOT excluded.amount OR source IS NOT excluded.source""",
+            zip(*(rows[col].tolist() for col in FACT_COLUMNS), [batch_id] * len(rows), [known_at] * len(rows)),
+        )
+        written = max(cursor.rowcount, 0)
+        if written:
+            record_versions(conn, known_at)
+        conn.execute("DROP TABLE IF EXISTS temp._written_facts")
+        add_batch_counts(conn, batch_id, written, len(rows) - written)
+    return written
+
+
+def delete_missing_facts(conn, rows, statement_type, batch_id=None, quarterly=False):
+    """
+    Delete the facts a statement source no longer has: stored facts of
+    `statement_type` for each company in `rows` (everything the source
+    provides) whose key is not in `rows` (a blanked cell, a dropped line
+    item). An incremental batch looks only at the scenarios and periods
+    the source covers; a full batch at every annual (or `quarterly`)
+    period and every scenario but TTM. Their history versions are closed
+    and the keys recorded for the batch (bitemporal.retire_facts). Returns
+    the number of facts deleted.
+    """
+    if rows.empty:
+        return 0
+    select = """SELECT ff.company_id, ff.scenario_id, ff.period_id, ff.line_item_id
+                FROM fact_financials ff
+                JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id"""
+    if batch_mode(conn, batch_id) == "full":
+        stored = pd.concat([
+            read_sql(conn, f"""{select}
+                               JOIN dim_period dp ON ff.period_id = dp.period_id
+                               JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+                               WHERE ff.company_id = ? AND dli.statement_type = ?
+                                 AND dp.quarter IS {"NOT NULL" if quarterly else "NULL"} AND ds.scenario_name <> ?""",
+                     [int(company_id), statement_type, TTM_SCENARIO])
+            for company_id in rows["company_id"].unique()
+        ], ignore_index=True)
+    else:
+        scopes = rows.groupby(["company_id", "scenario_id"])["period_id"].unique()
+        stored = pd.concat([
+            read_sql(conn, f"""{select}
+                               WHERE ff.company_id = ? AND ff.scenario_id = ? AND dli.statement_type = ?
+                                 AND ff.period_id IN ({", ".join("?" * len(periods))})""",
+                     [int(company_id), int(scenario_id), statement_type, *(int(p) for p in periods)])
+            for (company_id, scenario_id), periods in scopes.items()
+        ], ignore_index=True)
+    gone = stored[~pd.MultiIndex.from_frame(stored[FACT_KEY]).isin(pd.MultiIndex.from_frame(rows[FACT_KEY]))]
+    if gone.empty:
+        return 0
+    known_at = knowledge_time(conn, batch_id)
+    with conn:
+        staging_table(conn)
+        conn.executemany("INSERT INTO _retired_facts (company_id, scenario_id, period_id, line_item_id) "
+                         "VALUES (?, ?, ?, ?)", gone[FACT_KEY].itertuples(index=False, name=None))
+        deleted = retire_facts(conn, known_at, batch_id)
+        add_batch_counts(conn, batch_id, deleted, 0)
+    return deleted
+
+
+def load_statement(conn, csv_path, column_map, statement_type, keys=None, batch_id=None, ticker=TICKER):
+    """
+    Load one company's financial statement CSV into fact_financials. Uses
+    the mapped Arrow hand-off written by 01b/01c when it is at least as new
+    as the CSV. Files and line-item blocks identical to the last completed
+    load are skipped; within changed blocks only differing facts are written.
+    Facts the file no longer has (blanked cells, dropped line items) are
+    deleted: in the years it covers, or in every year on a full load.
+    """
+    handoff_name = os.path.basename(csv_path).replace("_USD_millions.csv", "")
+    if not os.path.exists(csv_path) and not is_fresh(handoff_name, csv_path):
+        print(f"  ⚠ File not found: {csv_path}")
+        return 0
+
+    source_name = f"{normalize_ticker(ticker)}/{handoff_name}"
+    content_hash = file_sha256(csv_path if os.path.exists(csv_path) else handoff_path(handoff_name))
+    if source_unchanged(conn, source_name, content_hash):
+        print(f"    Unchanged since last load — skipped")
+        return 0
+
+    df = load_frame(handoff_name, csv_path, index_col=0)
+    keys = keys or load_dimension_keys(conn)
+    source_rows, unmapped = build_fact_rows(df, column_map, statement_type, keys, ticker=ticker)
+    rows, block_hashes = changed_blocks(conn, source_name, source_rows, "line_item_id",
+                                        ["period_id", "amount", "source"])
+    loaded = write_fact_rows(conn, rows, batch_id)
+    deleted = delete_missing_facts(conn, source_rows, statement_type, batch_id)
+    record_source(conn, source_name, content_hash, batch_id, block_hashes)
+
+    print(f"    Loaded: {loaded} | Unchanged: {len(rows) - loaded} | Deleted: {deleted} | "
+          f"Changed line items: {len(block_hashes)}")
+    if unmapped:
+        print(f"    Unmapped columns (not in schema, OK to ignore): {len(unmapped)}")
+    return loaded
+
+
+def quarterly_frame(df, fiscal_year_end_month=12):
+    """
+    Raw yfinance quarterly statement (line items x quarter-end dates, USD)
+    → (frame indexed by fiscal year with one column per line item in USD
+    millions, fiscal quarter per row, quarter-end date per row).
+    """
+    period_ends = pd.to_datetime(pd.Index(df.columns).astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+    keep = ~period_ends.isna()
+    frame = df.loc[:, keep].T.apply(pd.to_numeric, errors="coerce")
+    period_ends = period_ends[keep]
+    scale = pd.Series(1e6, index=frame.columns).where(~frame.columns.isin(PER_SHARE_ITEMS), 1.0)
+    frame = frame.div(scale, axis=1).round(2)
+
+    months = period_ends.month.to_numpy()
+    fiscal_years = period_ends.year.to_numpy() + (months > fiscal_year_end_month)
+    quarters = (months - fiscal_year_end_month - 1) % 12 // 3 + 1
+    frame.index = pd.Index(fiscal_years.astype(str), name="Fiscal Year")
+    return frame, quarters, period_ends
+
+
+def register_quarters(conn, fiscal_years, quarters, period_ends):
+    """Add any missing actual quarter periods (e.g. FY2024Q3) to dim_period."""
+    rows = {
+        (int(year), int(quarter)): (
+            ((end + pd.Timedelta(days=1)) - pd.DateOffset(months=3)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        )
+        for year, quarter, end in zip(fiscal_years, quarters, period_ends)
+    }
+    with conn:
+        conn.executemany(
+            """INSERT OR IGNORE INTO dim_period (fiscal_year, quarter, period_type, period_label, start_date, end_date)
+               VALUES (?, ?, 'actual', ?, ?, ?)""",
+            [(year, quarter, f"FY{year}Q{quarter}", start, end) for (year, quarter), (start, end) in rows.items()],
+        )
+
+
+def load_quarterly_statement(conn, csv_path, column_map, statement_type, batch_id=None, ticker=TICKER):
+    """
+    Load one company's raw quarterly statement from 01 into fact_financials
+    (Actual scenario, one period per fiscal quarter) through the same
+    vectorized, change-detecting path as the annual statements. Facts
+    missing from the quarters the file covers are deleted; quarters that
+    rolled out of the file are kept, except on a full load.
+    """
     if not os.path.exists(csv_path):
         print(f"  ⚠ File not found: {csv_path}")
         return 0
 
-    df = pd.read_csv(csv_path, index_col=0)
-    df.index = df.index.astype(str)
-    cursor = conn.cursor()
-    actual_id = get_scenario_id(cursor, "Actual")
-    loaded = 0
-    skipped = 0
-    unmapped = set()
-
-    for year_str in df.index:
-        # Extract just the year (handle "2024-12-31" or "2024" formats)
-        year = int(year_str[:4])
-        period_id = get_period_id(cursor, year)
-        if period_id is None:
-            continue
+    source_name = f"{normalize_ticker(ticker)}/{os.path.splitext(os.path.basename(csv_path))[0]}"
+    content_hash = file_sha256(csv_path)
+    if source_unchanged(conn, source_name, content_hash):
+        print(f"    Unchanged since last load — skipped")
+        return 0
 
-        for csv_col in df.columns:
-            # Find mapping
-            std_name = column_map.get(csv_col)
-            if std_name is None:
-                unmapped.add(csv_col)
-                continue
-
-            line_item_id = get_line_item_id(cursor, statement_type, std_name)
-            if line_item_id is None:
-                continue
-
-            value = df.loc[year_str, csv_col]
-            if pd.isna(value):
-                continue
-
-            try:
-                cursor.execute(
-                    """INSERT OR REPLACE INTO fact_financials 
-                       (period_id, line_item_id, scenario_id, amount, source)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (period_id, line_item_id, actual_id, float(value),
-                     f"{'10-K' if year <= 2021 else 'yfinance'} FY{year}")
-                )
-                loaded += 1
-            except Exception as e:
-                print(f"    Error loading {std_name} FY{year}: {e}")
-                skipped += 1
-
-    conn.commit()
-    print(f"    Loaded: {loaded} | Skipped: {skipped}")
+    with conn:
+        company_id = register_company(conn, ticker)
+    year_end_month = conn.execute(
+        "SELECT fiscal_year_end_month FROM dim_company WHERE company_id = ?", (company_id,)
+    ).fetchone()[0]
+    frame, quarters, period_ends = quarterly_frame(pd.read_csv(csv_path, index_col=0), year_end_month or 12)
+    register_quarters(conn, frame.index.astype(int), quarters, period_ends)
+
+    keys = load_dimension_keys(conn)
+    source_rows, unmapped = build_fact_rows(frame, column_map, statement_type, keys, ticker=ticker, quarters=quarters)
+    rows, block_hashes = changed_blocks(conn, source_name, source_rows, "line_item_id",
+                                        ["period_id", "amount", "source"])
+    loaded = write_fact_rows(conn, rows, batch_id)
+    deleted = delete_missing_facts(conn, source_rows, statement_type, batch_id, quarterly=True)
+    record_source(conn, source_name, content_hash, batch_id, block_hashes)
+
+    print(f"    Loaded: {loaded} | Unchanged: {len(rows) - loaded} | Deleted: {deleted} | Quarters: {len(frame)}")
     if unmapped:
         print(f"    Unmapped columns (not in schema, OK to ignore): {len(unmapped)}")
     return loaded
 
 
-def load_stock_prices(conn):
-    """Load historical stock price data."""
+# yfinance history column → fact_stock_bar column
+PRICE_COLUMN_MAP = {
+    "Open": "open_price",
+    "High": "high_price",
+    "Low": "low_price",
+    "Close": "close_price",
+    "Adj Close": "adj_close",
+    "Volume": "volume",
+}
+
+
+def prepare_price_rows(df):
+    """
+    Vectorized clean-up of a price history frame (first column = date).
+    Returns (rows, rejected): rows has trade_date as YYYY-MM-DD text, its
+    trade_day number and the fact_stock_bar columns; rejected keeps the
+    offending input rows with a `reason` column.
+    """
+    raw_dates = df[df.columns[0]]
+    if isinstance(raw_dates.dtype, pd.DatetimeTZDtype):
+        dates = raw_dates.dt.tz_localize(None)          # keep the exchange-local calendar date
+    elif pd.api.types.is_datetime64_any_dtype(raw_dates):
+        dates = raw_dates
+    else:
+        dates = pd.to_datetime(raw_dates.astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+
+    prices = pd.DataFrame({
+        col: pd.to_numeric(df[src], errors="coerce") if src in df.columns else np.nan
+        for src, col in PRICE_COLUMN_MAP.items()
+    })
+    # yfinance history() is auto-adjusted unless asked otherwise: Close is the adjusted close
+    prices["adj_close"] = prices["adj_close"].fillna(prices["close_price"])
+
+    ohlc = prices[["open_price", "high_price", "low_price", "close_price"]]
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    reasons[(ohlc < 0).any(axis=1).to_numpy()] = "negative price"
+    reasons[prices["close_price"].isna().to_numpy()] = "missing close"
+    reasons[dates.isna().to_numpy()] = "unparseable date"
+    day = dates.to_numpy().astype("datetime64[D]")
+    duplicated = pd.Series(day).duplicated(keep="last").to_numpy() & reasons.isna().to_numpy()
+    reasons[duplicated] = "duplicate date (later row kept)"
+
+    ok = reasons.isna().to_numpy()
+    rows = prices[ok].copy()
+    rows.insert(0, "trade_date", day[ok].astype(str))
+    rows.insert(1, "trade_day", day[ok].astype(np.int64))
+    rejected = df[~ok].assign(reason=reasons[~ok])
+    return rows, rejected
+
+
+def write_price_rows(conn, rows, batch_id=None):
+    """
+    Bulk upsert prepared price rows in one transaction; bars identical to
+    the stored ones are not rewritten. Returns the number of rows written.
+    """
+    # NaN binds as NULL, and whole-number floats land as integers in INTEGER columns
+    columns = ["company_id", "trade_day", *PRICE_COLUMN_MAP.values()]
+    values = list(PRICE_COLUMN_MAP.values())
+    with conn:
+        cursor = conn.executemany(
+            f"""INSERT INTO fact_stock_bar ({", ".join(columns)}, load_batch_id)
+                VALUES ({", ".join("?" * len(columns))}, ?)
+                ON CONFLICT(company_id, trade_day) DO UPDATE SET
+                    {", ".join(f"{c} = excluded.{c}" for c in values)}, load_batch_id = excluded.load_batch_id
+                WHERE {" OR ".join(f"{c} IS NOT excluded.{c}" for c in values)}""",
+            zip(*(rows[col].tolist() for col in columns), [batch_id] * len(rows)),
+        )
+        written = max(cursor.rowcount, 0)
+        add_batch_counts(conn, batch_id, written, len(rows) - written)
+    return written
+
+
+def delete_missing_bars(conn, rows, company_id, batch_id=None):
+    """
+    Delete the company's stored bars between the first and last day of
+    `rows` (the source's whole history) that the source no longer has, and
+    record them for the batch. Days outside the source's range (history
+    that rolled out of the download) are kept, except on a full load.
+    Returns the number deleted.
+    """
+    if rows.empty:
+        return 0
+    where, params = "company_id = ?", [int(company_id)]
+    if batch_mode(conn, batch_id) != "full":
+        where += " AND trade_day BETWEEN ? AND ?"
+        params += [int(rows["trade_day"].min()), int(rows["trade_day"].max())]
+    stored = read_sql(conn, f"SELECT trade_day FROM fact_stock_bar WHERE {where}", params)
+    gone = stored.loc[~stored["trade_day"].isin(rows["trade_day"]), "trade_day"].astype(int).tolist()
+    if not gone:
+        return 0
+    with conn:
+        if batch_id is not None:
+            conn.executemany(
+                """INSERT INTO etl_deleted_fact (batch_id, fact_table, company_id, scenario_id, period_id, member_id)
+                   VALUES (?, 'fact_stock_bar', ?, 0, ?, 0)""",
+                [(batch_id, int(company_id), day) for day in gone],
+            )
+        conn.executemany("DELETE FROM fact_stock_bar WHERE company_id = ? AND trade_day = ?",
+                         [(int(company_id), day) for day in gone])
+        add_batch_counts(conn, batch_id, len(gone), 0)
+    return len(gone)
+
+
+def load_stock_prices(conn, batch_id=None, ticker=TICKER):
+    """
+    Load one company's historical stock price data. Bars are hashed per
+    calendar year, so a daily refresh only re-sends the current year and
+    writes only the bars that actually changed. Days dropped from the file
+    within its date range are deleted.
+    """
     csv_path = os.path.join(RAW_DIR, "stock_prices.csv")
-    if not os.path.exists(csv_path):
+    if not os.path.exists(csv_path) and not is_fresh("stock_prices", csv_path):
         print(f"  ⚠ Stock prices file not found")
         return 0
 
-    df = pd.read_csv(csv_path)
-    cursor = conn.cursor()
-    loaded = 0
-
-    # Identify date and price columns
-    date_col = df.columns[0]  # Usually 'Date' or index
-
-    for _, row in df.iterrows():
-        try:
-            trade_date = str(row[date_col])[:10]  # YYYY-MM-DD
-            cursor.execute(
-                """INSERT OR REPLACE INTO fact_stock_price
-                   (trade_date, open_price, high_price, low_price, close_price, volume)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (trade_date,
-                 row.get("Open"), row.get("High"), row.get("Low"),
-                 row.get("Close"), row.get("Volume"))
-            )
-            loaded += 1
-        except Exception:
-            continue
+    source_name = f"{normalize_ticker(ticker)}/stock_prices"
+    content_hash = file_sha256(csv_path if os.path.exists(csv_path) else handoff_path("stock_prices"))
+    if source_unchanged(conn, source_name, content_hash):
+        print(f"    Unchanged since last load — skipped")
+        return 0
 
-    conn.commit()
+    df = load_frame("stock_prices", csv_path)
+    rows, rejected = prepare_price_rows(df)
+    company_id = register_company(conn, ticker)
+    source_rows = rows.assign(company_id=company_id, year=rows["trade_date"].str[:4])
+    rows, block_hashes = changed_blocks(conn, source_name, source_rows, "year",
+                                        ["trade_date", *PRICE_COLUMN_MAP.values()])
+    loaded = write_price_rows(conn, rows, batch_id)
+    deleted = delete_missing_bars(conn, source_rows, company_id, batch_id)
+    record_source(conn, source_name, content_hash, batch_id, block_hashes)
+
+    if deleted:
+        print(f"    Deleted {deleted} trading days no longer in the file")
+
+    if len(rejected):
+        print(f"    ⚠ Rejected {len(rejected)} rows:")
+        for reason, count in rejected["reason"].value_counts().items():
+            print(f"      - {reason}: {count}")
+        for _, row in rejected.head(5).iterrows():
+            print(f"        e.g. {row.iloc[0]} → {row['reason']}")
     return loaded
 
 
-def calculate_ratios(conn):
-    """Calculate financial ratios from loaded statement data."""
-    print(f"\n  Calculating financial ratios...")
-    cursor = conn.cursor()
-    actual_id = get_scenario_id(cursor, "Actual")
-
-    # Get all periods
-    cursor.execute("SELECT period_id, fiscal_year FROM dim_period WHERE quarter IS NULL")
-    periods = cursor.fetchall()
-
-    def get_value(period_id, statement_type, item_name):
-        cursor.execute(
-            """SELECT ff.amount FROM fact_financials ff
-               JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
-               WHERE ff.period_id = ? AND ff.scenario_id = ?
-               AND dli.statement_type = ? AND dli.item_name = ?""",
-            (period_id, actual_id, statement_type, item_name)
+# Statement inputs the ratios need, pivoted to one column each
+RATIO_INPUTS = {
+    "rev": ("income_statement", "Total Revenue"),
+    "gp": ("income_statement", "Gross Profit"),
+    "oi": ("income_statement", "Operating Income"),
+    "ni": ("income_statement", "Net Income"),
+    "ie": ("income_statement", "Interest Expense"),
+    "ta": ("balance_sheet", "Total Assets"),
+    "eq": ("balance_sheet", "Total Stockholders Equity"),
+    "tca": ("balance_sheet", "Total Current Assets"),
+    "tcl": ("balance_sheet", "Total Current Liabilities"),
+    "cash": ("balance_sheet", "Cash & Cash Equivalents"),
+    "ltd": ("balance_sheet", "Long-Term Debt"),
+    "std": ("balance_sheet", "Short-Term Debt"),
+    "da": ("cash_flow", "Depreciation & Amortization"),
+    "cfo": ("cash_flow", "Cash from Operations"),
+    "capex": ("cash_flow", "Capital Expenditures"),
+}
+
+
+def ratio_pivot_sql(n_scenarios):
+    """Conditional-aggregation query pivoting RATIO_INPUTS for `n_scenarios` scenario ids."""
+    columns = ",\n               ".join(
+        f"MAX(CASE WHEN dli.statement_type = '{stmt}' AND dli.item_name = '{item}' THEN ff.amount END) AS {name}"
+        for name, (stmt, item) in RATIO_INPUTS.items()
+    )
+    return f"""SELECT ff.company_id, ff.scenario_id, ff.period_id,
+               {columns}
+           FROM fact_financials ff
+           JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+           WHERE ff.scenario_id IN ({", ".join("?" * n_scenarios)})
+           GROUP BY ff.company_id, ff.scenario_id, ff.period_id"""
+
+
+def pivot_ratio_inputs(conn, scenario_ids, quarterly=False):
+    """
+    One conditional-aggregation query: a row per (company, scenario, annual
+    period) with every ratio input as a column. Every annual period is
+    present (NaN where nothing is loaded) so prior-year lookups line up.
+    `quarterly` pivots the actual quarter periods instead (with a quarter
+    column), e.g. for the TTM scenario.
+    """
+    facts = read_sql(conn, ratio_pivot_sql(len(scenario_ids)), list(scenario_ids))
+    if quarterly:
+        periods = read_sql(conn, """SELECT period_id, fiscal_year, quarter FROM dim_period
+                                    WHERE quarter IS NOT NULL AND period_type = 'actual'
+                                    ORDER BY fiscal_year, quarter""")
+    else:
+        periods = read_sql(conn, "SELECT period_id, fiscal_year FROM dim_period WHERE quarter IS NULL ORDER BY fiscal_year")
+    key = ["company_id", "scenario_id", "period_id"]
+    grid = pd.MultiIndex.from_product(
+        [sorted(facts["company_id"].unique()), list(scenario_ids), periods["period_id"]], names=key
+    )
+    frame = facts.set_index(key).reindex(grid).reset_index()
+    return frame.merge(periods, on="period_id")
+
+
+def compute_ratio_frame(inputs, actual_id=None):
+    """
+    Every ratio for every row of `inputs` in one vectorized pass. Returns a
+    long frame (company_id, scenario_id, period_id, ratio_name, value). A
+    ratio is only produced where its inputs are present and non-zero.
+    """
+    f = inputs.astype({name: "float64" for name in RATIO_INPUTS})
+
+    def nonzero(col):
+        return f[col].notna() & (f[col] != 0)
+
+    # Prior fiscal year's revenue within the same company and scenario (and
+    # fiscal quarter, for quarterly rows). A forecast scenario's first year
+    # grows off the last actual year, so fall back to the company's Actual
+    # revenue where the scenario has none.
+    series = ["company_id", "scenario_id", *(["quarter"] if "quarter" in f.columns else [])]
+    prev_rev = f.groupby(series)["rev"].shift(1)
+    if actual_id is not None:
+        actual_rev = f.loc[f["scenario_id"] == actual_id].set_index(["company_id", "fiscal_year"])["rev"]
+        prior = pd.MultiIndex.from_arrays([f["company_id"], f["fiscal_year"] - 1])
+        prev_rev = prev_rev.fillna(pd.Series(actual_rev.reindex(prior).to_numpy(), index=f.index))
+    total_debt = f["ltd"].fillna(0) + f["std"].fillna(0)
+    has_rev = nonzero("rev")
+
+    ratios = {
+        "Gross Margin": (has_rev & f["gp"].notna(), f["gp"] / f["rev"] * 100),
+        "Operating Margin": (has_rev & f["oi"].notna(), f["oi"] / f["rev"] * 100),
+        "Net Margin": (has_rev & f["ni"].notna(), f["ni"] / f["rev"] * 100),
+        "EBITDA Margin": (has_rev & f["oi"].notna() & f["da"].notna(), (f["oi"] + f["da"].abs()) / f["rev"] * 100),
+        "ROE": (nonzero("ni") & nonzero("eq"), f["ni"] / f["eq"] * 100),
+        "ROA": (nonzero("ni") & nonzero("ta"), f["ni"] / f["ta"] * 100),
+        "Current Ratio": (nonzero("tca") & nonzero("tcl"), f["tca"] / f["tcl"]),
+        "Debt to Equity": ((total_debt > 0) & nonzero("eq"), total_debt / f["eq"]),
+        "Debt to Assets": (nonzero("ta"), total_debt / f["ta"]),
+        "Interest Coverage": (nonzero("ie") & nonzero("oi"), (f["oi"] / f["ie"]).abs()),
+        "Asset Turnover": (has_rev & nonzero("ta"), f["rev"] / f["ta"]),
+        "Revenue Growth": (prev_rev.notna() & (prev_rev != 0) & has_rev, (f["rev"] - prev_rev) / prev_rev.abs() * 100),
+        "FCF Yield": (nonzero("cfo") & nonzero("capex") & has_rev, (f["cfo"] - f["capex"].abs()) / f["rev"] * 100),
+    }
+
+    parts = [
+        pd.DataFrame({
+            "company_id": f.loc[mask, "company_id"],
+            "scenario_id": f.loc[mask, "scenario_id"],
+            "period_id": f.loc[mask, "period_id"],
+            "ratio_name": name,
+            "value": values[mask],
+        })
+        for name, (mask, values) in ratios.items()
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_ratio_rows(conn, rows, batch_id=None):
+    """Guarded upsert of ratio rows in one executemany; returns rows actually written."""
+    with conn:
+        cursor = conn.executemany(
+            """INSERT INTO fact_ratios (company_id, scenario_id, period_id, ratio_id, value, load_batch_id)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(company_id, scenario_id, period_id, ratio_id) DO UPDATE SET
+                   value = excluded.value, load_batch_id = excluded.load_batch_id
+               WHERE value IS NOT excluded.value""",
+            zip(rows["company_id"].tolist(), rows["scenario_id"].tolist(), rows["period_id"].tolist(),
+                rows["ratio_id"].tolist(), rows["value"].tolist(), [batch_id] * len(rows)),
         )
-        result = cursor.fetchone()
-        return result[0] if result else None
-
-    def get_ratio_id(ratio_name):
-        cursor.execute("SELECT ratio_id FROM dim_ratio WHERE ratio_name = ?", (ratio_name,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-
-    def insert_ratio(period_id, ratio_name, value):
-        ratio_id = get_ratio_id(ratio_name)
-        if ratio_id and value is not None:
-            cursor.execute(
-                """INSERT OR REPLACE INTO fact_ratios (period_id, ratio_id, scenario_id, value)
-                   VALUES (?, ?, ?, ?)""",
-                (period_id, ratio_id, actual_id, value)
+        written = max(cursor.rowcount, 0)
+        add_batch_counts(conn, batch_id, written, len(rows) - written)
+    return written
+
+
+def delete_stale_ratios(conn, ratios, batch_id=None):
+    """
+    Delete stored ratios that `ratios` (every ratio calculate_ratios()
+    produced) no longer has, e.g. after an input fact was deleted, and
+    record them for the batch. Returns the number deleted.
+    """
+    key = ["company_id", "scenario_id", "period_id", "ratio_id"]
+    stored = read_sql(conn, "SELECT company_id, scenario_id, period_id, ratio_id FROM fact_ratios")
+    gone = stored[~pd.MultiIndex.from_frame(stored[key]).isin(pd.MultiIndex.from_frame(ratios[key]))]
+    if gone.empty:
+        return 0
+    keys = [tuple(int(v) for v in row) for row in gone[key].itertuples(index=False, name=None)]
+    with conn:
+        if batch_id is not None:
+            conn.executemany(
+                """INSERT INTO etl_deleted_fact (batch_id, fact_table, company_id, scenario_id, period_id, member_id)
+                   VALUES (?, 'fact_ratios', ?, ?, ?, ?)""",
+                [(batch_id, *k) for k in keys],
             )
-            return True
-        return False
-
-    ratios_loaded = 0
-    prev_revenue = None
-
-    for period_id, fy in sorted(periods, key=lambda x: x[1]):
-        rev = get_value(period_id, "income_statement", "Total Revenue")
-        gp = get_value(period_id, "income_statement", "Gross Profit")
-        oi = get_value(period_id, "income_statement", "Operating Income")
-        ni = get_value(period_id, "income_statement", "Net Income")
-        ta = get_value(period_id, "balance_sheet", "Total Assets")
-        eq = get_value(period_id, "balance_sheet", "Total Stockholders Equity")
-        tca = get_value(period_id, "balance_sheet", "Total Current Assets")
-        tcl = get_value(period_id, "balance_sheet", "Total Current Liabilities")
-        cash = get_value(period_id, "balance_sheet", "Cash & Cash Equivalents")
-        ltd = get_value(period_id, "balance_sheet", "Long-Term Debt")
-        std = get_value(period_id, "balance_sheet", "Short-Term Debt")
-        ie = get_value(period_id, "income_statement", "Interest Expense")
-        da = get_value(period_id, "cash_flow", "Depreciation & Amortization")
-        cfo = get_value(period_id, "cash_flow", "Cash from Operations")
-        capex = get_value(period_id, "cash_flow", "Capital Expenditures")
-
-        # Profitability ratios
-        if rev and rev != 0:
-            if gp is not None:
-                if insert_ratio(period_id, "Gross Margin", gp / rev * 100): ratios_loaded += 1
-            if oi is not None:
-                if insert_ratio(period_id, "Operating Margin", oi / rev * 100): ratios_loaded += 1
-            if ni is not None:
-                if insert_ratio(period_id, "Net Margin", ni / rev * 100): ratios_loaded += 1
-            if oi is not None and da is not None:
-                ebitda = oi + abs(da)
-                if insert_ratio(period_id, "EBITDA Margin", ebitda / rev * 100): ratios_loaded += 1
-
-        if ni and eq and eq != 0:
-            if insert_ratio(period_id, "ROE", ni / eq * 100): ratios_loaded += 1
-        if ni and ta and ta != 0:
-            if insert_ratio(period_id, "ROA", ni / ta * 100): ratios_loaded += 1
-
-        # Liquidity ratios
-        if tca and tcl and tcl != 0:
-            if insert_ratio(period_id, "Current Ratio", tca / tcl): ratios_loaded += 1
-
-        # Leverage ratios
-        total_debt = (ltd or 0) + (std or 0)
-        if total_debt > 0 and eq and eq != 0:
-            if insert_ratio(period_id, "Debt to Equity", total_debt / eq): ratios_loaded += 1
-        if ta and ta != 0:
-            if insert_ratio(period_id, "Debt to Assets", total_debt / ta): ratios_loaded += 1
-        if ie and ie != 0 and oi:
-            if insert_ratio(period_id, "Interest Coverage", abs(oi / ie)): ratios_loaded += 1
-
-        # Efficiency
-        if rev and ta and ta != 0:
-            if insert_ratio(period_id, "Asset Turnover", rev / ta): ratios_loaded += 1
-
-        # Growth (needs previous year)
-        if prev_revenue and prev_revenue != 0 and rev:
-            if insert_ratio(period_id, "Revenue Growth", (rev - prev_revenue) / abs(prev_revenue) * 100):
-                ratios_loaded += 1
-        prev_revenue = rev
-
-        # FCF-related
-        if cfo and capex:
-            fcf = cfo - abs(capex)
-            if insert_ratio(period_id, "FCF Yield", fcf / rev * 100 if rev else None): ratios_loaded += 1
-
-    conn.commit()
-    print(f"  ✓ {ratios_loaded} ratio values calculated and loaded")
-    return ratios_loaded
+        conn.executemany("DELETE FROM fact_ratios WHERE company_id = ? AND scenario_id = ? AND period_id = ? "
+                         "AND ratio_id = ?", keys)
+        add_batch_counts(conn, batch_id, len(keys), 0)
+    return len(keys)
+
+
+def calculate_ratios(conn, batch_id=None):
+    """
+    Calculate financial ratios for every company, every scenario (Actual,
+    Base, Bull, Bear) and every annual period, actual and forecast, plus
+    the TTM scenario at every actual quarter, from the loaded statement
+    data: one pivot query per period grain, one vectorized pass each, one
+    batched write. Ratio values that did not change are not rewritten;
+    stored ratios whose inputs are gone are deleted.
+    """
+    print(f"\n  Calculating financial ratios...")
+    scenarios = dict(conn.execute("SELECT scenario_id, scenario_name FROM dim_scenario ORDER BY scenario_id").fetchall())
+    actual_id = get_scenario_id(conn.cursor(), "Actual")
+    ttm_id = get_scenario_id(conn.cursor(), TTM_SCENARIO)
+
+    annual = [scenario_id for scenario_id in scenarios if scenario_id != ttm_id]
+    ratios = compute_ratio_frame(pivot_ratio_inputs(conn, annual), actual_id)
+    if ttm_id is not None:
+        # TTM revenue growth compares with the TTM four quarters earlier, never with annual figures
+        ttm = compute_ratio_frame(pivot_ratio_inputs(conn, [ttm_id], quarterly=True))
+        ratios = pd.concat([ratios, ttm], ignore_index=True)
+    ratio_ids = dict(conn.execute("SELECT ratio_name, ratio_id FROM dim_ratio").fetchall())
+    ratios["ratio_id"] = ratios["ratio_name"].map(ratio_ids)
+    ratios = ratios.dropna(subset=["ratio_id"]).astype({"ratio_id": "int64"})
+
+    written = write_ratio_rows(conn, ratios, batch_id)
+    deleted = delete_stale_ratios(conn, ratios, batch_id)
+    print(f"  ✓ {len(ratios)} ratio values calculated ({written} written, "
+          f"{len(ratios) - written} unchanged{f', {deleted} stale deleted' if deleted else ''})")
+    for scenario_id, count in ratios["scenario_id"].value_counts().sort_index().items():
+        print(f"    {scenarios[scenario_id]}: {count}")
+    return len(ratios)
 
 
 # =============================================================================
-# SUMMARY REPORT
+# UNIVERSE LOAD (PIPELINED)
 # =============================================================================
-def print_summary(conn):
-    """Print database summary."""
-    cursor = conn.cursor()
+# A universe of other companies' annual Actual statements from SEC XBRL
+# company facts (the statement_cube.py extraction), fetched and written in
+# one pipelined pass (see pipeline.py): fetch workers overlap the network
+# waits with the writer's transactions.
+STATEMENT_MAPS = {
+    "income_statement": INCOME_STMT_MAP,
+    "balance_sheet": BALANCE_SHEET_MAP,
+    "cash_flow": CASH_FLOW_MAP,
+}
+
+
+def read_universe(path):
+    """Tickers from a file, one per line (# comments allowed), normalized and de-duplicated in order."""
+    with open(path, "r") as f:
+        tickers = [normalize_ticker(line.split("#")[0].strip()) for line in f]
+    return list(dict.fromkeys(t for t in tickers if t))
+
+
+def fetch_sec_facts(cik):
+    """One company's XBRL company facts from SEC EDGAR (archived, no progress output)."""
+    return _sec.fetch_company_facts(cik, verbose=False)
+
+
+def sec_fact_rows(ticker, cik, keys, years, fetch=fetch_sec_facts):
+    """
+    Extraction worker task: fetch one company's XBRL facts and normalize
+    them into fact_financials rows (annual Actual periods, USD millions,
+    EPS as reported), the way 01b's merge scales them. SEC item names go
+    through the statement maps; names that are already dim_line_item
+    names load as they are. Plain numpy on the (years x items) block, so
+    workers hold the GIL as briefly as possible.
+    """
+    block = extract_company(fetch(cik), years)
+    line_item_ids = np.array([keys["line_item"].get((stmt, STATEMENT_MAPS[stmt].get(item, item)), np.nan)
+                              for stmt, item in LINE_ITEMS])
+    period_ids = np.array([keys["period"].get(year, np.nan) for year in years], dtype=float)
+    per_share = np.array(["EPS" in item for _, item in LINE_ITEMS])
+    values = np.where(per_share, block, (block / 1e6).round(2))
+    row_idx, col_idx = np.nonzero(~np.isnan(values) & ~np.isnan(period_ids)[:, None] & ~np.isnan(line_item_ids))
+    return pd.DataFrame({
+        "company_id": keys["company"][ticker],
+        "period_id": period_ids[row_idx].astype(np.int64),
+        "line_item_id": line_item_ids[col_idx].astype(np.int64),
+        "scenario_id": keys["scenario"]["Actual"],
+        "amount": values[row_idx, col_idx],
+        "source": [f"10-K FY{years[i]}" for i in row_idx],
+    })
+
+
+def load_universe(conn, tickers, batch_id=None, workers=FETCH_WORKERS, fetch=fetch_sec_facts):
+    """
+    Load annual statements for every ticker (except TICKER, which comes
+    from its processed files) in a pipelined pass: `workers` threads fetch
+    and normalize (workers=0 fetches and writes in turn), this thread
+    writes COMMIT_ROWS-row transactions. Tickers without a CIK are skipped.
+    Returns the pipeline stats.
+    """
+    tickers = [t for t in tickers if normalize_ticker(t) != TICKER]
+    with conn:
+        for ticker in tickers:
+            register_company(conn, ticker)
+    ciks = dict(conn.execute("SELECT ticker, cik FROM dim_company WHERE cik IS NOT NULL").fetchall())
+    missing = [t for t in tickers if t not in ciks]
+    if missing:
+        print(f"    ⚠ No CIK for {len(missing)} tickers, skipped: {', '.join(missing[:10])}")
+
+    keys = load_dimension_keys(conn)
+    years = [year for (year,) in conn.execute(
+        "SELECT fiscal_year FROM dim_period WHERE quarter IS NULL AND period_type = 'actual' ORDER BY fiscal_year")]
+    stats = run_pipeline(
+        [(t, ciks[t]) for t in tickers if t in ciks],
+        lambda item: sec_fact_rows(*item, keys, years, fetch),
+        lambda rows: write_fact_rows(conn, rows, batch_id),
+        workers=workers,
+    )
+    mode = f"pipelined, {workers} fetch workers" if workers else "sequential"
+    print(f"    ✓ {stats['items']} {'company' if stats['items'] == 1 else 'companies'}, {stats['rows']:,} facts "
+          f"in {stats['commits']} transactions, {stats['seconds']:.1f}s ({mode})")
+    print(f"    Fetch {stats['extract_seconds']:.1f}s (summed over workers), write {stats['write_seconds']:.1f}s, "
+          f"workers blocked on the writer {stats['blocked_seconds']:.1f}s")
+    for (ticker, _), error in list(stats["failed"].items())[:10]:
+        print(f"    ⚠ {ticker}: {type(error).__name__}: {error}")
+    if len(stats["failed"]) > 10:
+        print(f"    ⚠ ... {len(stats['failed']) - 10} more failed")
+    return stats
 
+
+# =============================================================================
+# SUMMARY REPORT
+# =============================================================================
+def print_summary(api, ticker=TICKER):
+    """Print database summary (sanity checks for `ticker`), read through the query API."""
     print(f"\n{'='*60}")
     print(f"  DATABASE SUMMARY")
     print(f"{'='*60}\n")
 
-    for table in ["fact_financials", "fact_ratios", "fact_stock_price"]:
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
+    for table, count in api.table_counts(["dim_company", "fact_financials", "fact_ratios", "fact_stock_price"]).items():
         print(f"  {table}: {count} rows")
 
     # Show revenue by year as sanity check
-    print(f"\n  Revenue by Year (sanity check):")
-    cursor.execute("""
-        SELECT dp.period_label, ff.amount, ff.source
-        FROM fact_financials ff
-        JOIN dim_period dp ON ff.period_id = dp.period_id
-        JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
-        JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
-        WHERE dli.item_name = 'Total Revenue' AND ds.scenario_name = 'Actual'
-        ORDER BY dp.fiscal_year
-    """)
-    for row in cursor.fetchall():
-        print(f"    {row[0]}: ${row[1]:,.0f}M (source: {row[2]})")
+    print(f"\n  {ticker} Revenue by Year (sanity check):")
+    for row in api.line_item(ticker, "Total Revenue").itertuples():
+        print(f"    {row.period_label}: ${row.amount:,.0f}M (source: {row.source})")
 
     # Show key ratios for most recent year
-    print(f"\n  Key Ratios (latest year):")
-    cursor.execute("""
-        SELECT dr.ratio_name, fr.value, dr.format_type
-        FROM fact_ratios fr
-        JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
-        JOIN dim_period dp ON fr.period_id = dp.period_id
-        WHERE dp.fiscal_year = (SELECT MAX(fiscal_year) FROM dim_period WHERE period_type = 'actual')
-        ORDER BY dr.ratio_category, dr.ratio_name
-    """)
-    for row in cursor.fetchall():
-        if row[2] == "percentage":
-            print(f"    {row[0]}: {row[1]:.1f}%")
-        elif row[2] == "multiple":
-            print(f"    {row[0]}: {row[1]:.1f}x")
+    print(f"\n  {ticker} Key Ratios (latest year):")
+    for name, value, format_type in api.latest_ratios(ticker).itertuples(index=False):
+        if format_type == "percentage":
+            print(f"    {name}: {value:.1f}%")
+        elif format_type == "multiple":
+            print(f"    {name}: {value:.1f}x")
         else:
-            print(f"    {row[0]}: {row[1]:.2f}")
+            print(f"    {name}: {value:.2f}")
 
 
 # =============================================================================
 # MAIN
 # =============================================================================
-def main():
-    print(f"\n{'#'*60}")
-    print(f"  PAYPAL (PYPL) - DATABASE LOADER")
-    print(f"  Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'#'*60}")
-
-    # Step 1: Create database
-    create_database()
-
-    # Step 2: Load financial statements
-    conn = sqlite3.connect(DB_PATH)
+def print_batch_summary(api, batch_id, elapsed=None, bulk=False):
+    batch = api.load_batch(batch_id)
+    mode, status, written, unchanged = (batch[k] for k in ["mode", "status", "rows_written", "rows_unchanged"])
+    print(f"\n  Load batch #{batch_id} ({mode}, {status}): {written:,} rows written, {unchanged:,} unchanged")
+    if elapsed:
+        print(f"  Ingest throughput ({'bulk' if bulk else 'default'} settings): "
+              f"{written + unchanged:,} rows in {elapsed:.2f}s = {(written + unchanged) / elapsed:,.0f} rows/s")
+
+
+def load_sources(conn, batch_id, args):
+    """
+    Steps 2-4 of main() for one load batch: statements, prices, quarterly
+    facts and TTM, the optional universe, ratios and the derived tables.
+    Returns False when a --bulk load fails its integrity check.
+    """
+    bulk_state = enable_bulk_mode(conn) if args.bulk else None
 
     print(f"\n{'='*60}")
     print(f"  LOADING FINANCIAL STATEMENTS")
     print(f"{'='*60}")
 
-    print(f"\n  [1/4] Income Statement...")
+    with conn:
+        register_company(conn, TICKER)
+    keys = load_dimension_keys(conn)
+
+    print(f"\n  [1/5] Income Statement...")
     load_statement(
         conn,
         os.path.join(PROCESSED_DIR, "combined_income_statement_USD_millions.csv"),
         INCOME_STMT_MAP,
-        "income_statement"
+        "income_statement",
+        keys,
+        batch_id,
     )
 
-    print(f"\n  [2/4] Balance Sheet...")
+    print(f"\n  [2/5] Balance Sheet...")
     load_statement(
         conn,
         os.path.join(PROCESSED_DIR, "combined_balance_sheet_USD_millions.csv"),
         BALANCE_SHEET_MAP,
-        "balance_sheet"
+        "balance_sheet",
+        keys,
+        batch_id,
     )
 
-    print(f"\n  [3/4] Cash Flow Statement...")
+    print(f"\n  [3/5] Cash Flow Statement...")
     load_statement(
         conn,
         os.path.join(PROCESSED_DIR, "combined_cash_flow_USD_millions.csv"),
         CASH_FLOW_MAP,
-        "cash_flow"
+        "cash_flow",
+        keys,
+        batch_id,
     )
 
-    print(f"\n  [4/4] Stock Prices...")
-    loaded = load_stock_prices(conn)
+    print(f"\n  [4/5] Stock Prices...")
+    loaded = load_stock_prices(conn, batch_id)
     print(f"    Loaded: {loaded} trading days")
 
-    # Step 3: Calculate ratios
-    calculate_ratios(conn)
+    print(f"\n  [5/5] Quarterly Statements...")
+    for file_name, column_map, statement_type in QUARTERLY_STATEMENTS:
+        print(f"    {statement_type}:")
+        load_quarterly_statement(conn, os.path.join(RAW_DIR, file_name), column_map, statement_type, batch_id)
+    written = refresh_ttm(conn, batch_id)
+    print(f"  ✓ TTM facts refreshed: {written} written")
+
+    if args.universe:
+        tickers = read_universe(args.universe)
+        print(f"\n  [+] Universe Statements ({len(tickers)} tickers from {args.universe})...")
+        load_universe(conn, tickers, batch_id, workers=args.fetch_workers)
+
+    # Step 3: Calculate ratios (annual scenarios and TTM)
+    calculate_ratios(conn, batch_id)
+
+    # Step 4: Refresh the wide mv_* tables, rollup cube and stock returns for what this batch touched
+    refreshed = refresh_materialized(conn, batch_id)
+    print(f"\n  ✓ Materialized tables refreshed: "
+          f"{', '.join(f'{table} ({rows})' for table, rows in refreshed.items())}")
+    cells = refresh_rollup(conn, batch_id)
+    print(f"  ✓ Rollup cube refreshed: {cells} cells")
+    written, companies = refresh_stock_returns(conn, batch_id)
+    print(f"  ✓ Stock returns refreshed: {written} days for {companies} "
+          f"{'company' if companies == 1 else 'companies'}")
+
+    if bulk_state is not None:
+        return finish_bulk_mode(conn, bulk_state)
+    return True
+
 
-    # Step 4: Summary
-    print_summary(conn)
+def main():
+    parser = argparse.ArgumentParser(description="Load processed financials into the star schema.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip files and blocks unchanged since the last load instead of re-reading every source")
+    parser.add_argument("--bulk", action="store_true",
+                        help="load with WAL, synchronous=OFF, large cache/mmap and deferred index builds")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="move the existing database aside (timestamped .bak, history kept) and start a new one")
+    parser.add_argument("--migrate", action="store_true",
+                        help="upgrade the existing database's schema in place (pending migrations) and exit")
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite",
+                        help="storage engine (duckdb needs the optional duckdb package)")
+    parser.add_argument("--universe", metavar="FILE",
+                        help="also load SEC annual statements for every ticker in FILE (one per line), pipelined")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS, metavar="N",
+                        help=f"--universe fetch threads feeding the writer (default {FETCH_WORKERS}; 0 = sequential)")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate_database(backend=args.backend)
+        return
+    mode = "incremental" if args.incremental else "full"
+    if args.bulk and args.backend != "sqlite":
+        print(f"  ⚠ --bulk tunes SQLite only; {args.backend} already loads in bulk — ignored")
+        args.bulk = False
 
+    print(f"\n{'#'*60}")
+    print(f"  PAYPAL (PYPL) - DATABASE LOADER ({mode}{', bulk' if args.bulk else ''})")
+    print(f"  Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'#'*60}")
+
+    # Step 1: Create (or upgrade) database
+    create_database(incremental=args.incremental, backend=args.backend, rebuild=args.rebuild)
+
+    # Step 2: Load financial statements, ratios and derived tables in one batch
+    db_path = database_path(args.backend)
+    conn = connect(db_path, args.backend)
+    batch_id = start_load_batch(conn, mode)
+    start = time.perf_counter()
+    try:
+        healthy = load_sources(conn, batch_id, args)
+    except BaseException:
+        finish_load_batch(conn, batch_id, "failed")
+        raise
+    elapsed = time.perf_counter() - start
+    finish_load_batch(conn, batch_id, "complete" if healthy else "failed")
+
+    # Step 5: Summary, read back through the pooled read-only API
     conn.close()
+    with QueryAPI(db_path, args.backend) as api:
+        print_summary(api)
+        print_batch_summary(api, batch_id, elapsed, bulk=args.bulk)
+
+    if not healthy:
+        raise SystemExit(f"Bulk load failed its integrity check (batch {batch_id} marked failed) — re-run with "
+                         f"--rebuild to move {db_path} aside and build a new database from the sources")
 
     print(f"\n{'#'*60}")
     print(f"  DATABASE READY")
-    print(f"  File: {DB_PATH}")
-    print(f"  Open in SQLite Browser to verify")
+    print(f"  File: {db_path}")
+    print(f"  Open in {'SQLite Browser' if args.backend == 'sqlite' else 'the duckdb CLI'} to verify")
     print(f"  Next step: Build Excel financial model")
     print(f"{'#'*60}\n")
 
@@ -0,0 +1,360 @@
+"""
+PayPal (PYPL) - Parquet Export for Power BI
+===========================================
+Exports the star schema's dimensions and facts as Parquet files for the
+Phase 4 dashboard (Power BI's Parquet connector, or any Arrow reader):
+
+    data/export/<dim or small table>.parquet
+    data/export/<fact>/company_id=<id>/fiscal_year=<yyyy>/part-0.parquet   statements (and history), ratios
+    data/export/<fact>/company_id=<id>/year=<yyyy>/part-0.parquet          daily bars, returns
+    data/export/manifest.json
+
+Facts are partitioned by company and fiscal (or calendar) year in Hive
+layout, the partition columns living in the path only. Every table or
+partition is streamed through a cursor in CHUNK_ROWS-row chunks, each
+written as one Parquet row group, so export memory is one chunk however
+large the table (see db_backends.iter_rows).
+
+Daily bars are exported from fact_stock_bar itself, with dates as day
+numbers (trade_day, days since 1970-01-01; in Power BI the date is
+1970-01-01 + trade_day). Each year partition is then a range of the
+table's key, read without converting a date per row. The
+fact_stock_price view is for reports.
+
+The manifest records each partition's signature: its row count, the
+newest load batch among its rows and that batch's start time (for run
+facts, the newest run id and its run set's creation time), plus cheap
+content aggregates per table (CONTENT_AGGREGATES). Batch and run ids
+restart when the database is rebuilt; their timestamps do not, so a
+rebuilt database never matches an old signature. The content aggregates
+catch changes that leave count and batch alone: a closed or retired
+version in fact_financials_history only sets known_to, and a write
+without a batch (e.g. a standalone ttm.refresh_ttm(conn)) changes values
+under a NULL batch id. A later run re-exports only partitions whose
+signature changed and removes partitions that no longer exist;
+dimensions are small and always rewritten. --full ignores the manifest
+and clears each partitioned table's folder before writing it, so no
+partition of a company or year that is gone survives.
+
+Usage: python 04_export_parquet.py                     # changed partitions only
+       python 04_export_parquet.py --full              # everything
+       python 04_export_parquet.py --backend duckdb    # from data/paypal_analysis.duckdb
+
+Requires: pyarrow
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from db_backends import BACKENDS, FILE_SUFFIX, connect, day_dates, day_number, iter_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "data", "paypal_analysis.db")
+EXPORT_DIR = os.path.join(BASE_DIR, "data", "export")
+MANIFEST_NAME = "manifest.json"
+CHUNK_ROWS = 50_000                 # rows per fetchmany() and per Parquet row group
+
+# Tables written as one file each, always in full
+WHOLE_TABLES = [
+    "dim_company", "dim_period", "dim_scenario", "dim_line_item", "dim_ratio",
+    "dim_driver", "dim_valuation_metric", "model_run_set", "model_run",
+    "dim_company_group", "company_group_member", "agg_rollup",
+]
+
+# Unpartitioned run facts, re-exported when their signature changes
+SIGNED_TABLES = ["fact_assumptions", "fact_valuation"]
+SIGNED_SQL = """
+    SELECT s.n, s.last_run, rs.created_at
+    FROM (SELECT COUNT(*) AS n, MAX(run_id) AS last_run FROM {table}) s
+    LEFT JOIN model_run r ON r.run_id = s.last_run
+    LEFT JOIN model_run_set rs ON rs.run_set_id = r.run_set_id"""
+
+# Partitioned facts: table → (partition column, its SQL expression over `t`, join needed for it,
+# row filter for one partition given (company_id, partition value))
+FISCAL_YEAR = ("fiscal_year", "dp.fiscal_year", "JOIN dim_period dp ON t.period_id = dp.period_id",
+               "t.company_id = ? AND t.period_id IN (SELECT period_id FROM dim_period WHERE fiscal_year = ?)")
+TRADE_YEAR = ("year", "CAST(SUBSTR(CAST(t.trade_date AS TEXT), 1, 4) AS INTEGER)", "",
+              "t.company_id = ? AND t.trade_date BETWEEN ? AND ?")
+# Day-numbered tables: the year expression is built per export from the days they span (year_case)
+TRADE_DAY_YEAR = ("year", None, "", "t.company_id = ? AND t.trade_day BETWEEN ? AND ?")
+PARTITIONED_TABLES = {
+    "fact_financials": FISCAL_YEAR,
+    "fact_financials_history": FISCAL_YEAR,
+    "fact_ratios": FISCAL_YEAR,
+    "fact_stock_bar": TRADE_DAY_YEAR,
+    "fact_stock_returns": TRADE_YEAR,
+}
+
+# Exports replaced by another table's (old → new): exporting the new one removes
+# the old folder and manifest entry, so Power BI never reads both
+REPLACED_EXPORTS = {"fact_stock_price": "fact_stock_bar"}
+
+# Content aggregates over `t` appended to each partition's signature. Sums are
+# rounded so DuckDB's parallel float addition can't make an unchanged partition
+# look changed; a history version's close moves the latest known_to and the
+# count of closed versions.
+CONTENT_AGGREGATES = {
+    "fact_financials": ["MAX(t.known_from)", "ROUND(SUM(t.amount), 6)"],
+    "fact_financials_history": ["MAX(COALESCE(t.known_to, t.known_from))", "COUNT(t.known_to)"],
+    "fact_ratios": ["ROUND(SUM(t.value), 6)"],
+    "fact_stock_bar": ["ROUND(SUM(t.close_price), 6)", "ROUND(SUM(t.adj_close), 6)"],
+    "fact_stock_returns": ["ROUND(SUM(t.ma_20d), 6)", "ROUND(SUM(t.drawdown), 6)"],
+}
+
+# Declared column type → Arrow type (SQLite declarations and DuckDB's PRAGMA table_info names)
+ARROW_TYPES = {
+    "INTEGER": "int64", "BIGINT": "int64", "BOOLEAN": "bool",
+    "REAL": "float64", "DOUBLE": "float64", "BLOB": "binary",
+}
+
+
+# =============================================================================
+# STREAMING WRITER
+# =============================================================================
+def table_columns(conn, table):
+    """[(column, declared type), ...] in table order."""
+    return [(row[1], (row[2] or "").upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def arrow_schema(columns):
+    """Arrow schema for (column, declared type) pairs; dates and text as strings."""
+    return pa.schema([(name, ARROW_TYPES.get(decl, "string")) for name, decl in columns])
+
+
+def select_list(columns):
+    """
+    Column expressions over `t` that come back alike from either backend:
+    dates as YYYY-MM-DD text, booleans as 0/1.
+    """
+    casts = {"DATE": "TEXT", "BOOLEAN": "INTEGER"}
+    return ", ".join(f"CAST(t.{name} AS {casts[decl]}) AS {name}" if decl in casts else f"t.{name}"
+                     for name, decl in columns)
+
+
+def _arrow_column(values, arrow_type):
+    if arrow_type == pa.bool_():
+        return pa.array(values, type=pa.int64()).cast(arrow_type)
+    return pa.array(values, type=arrow_type)
+
+
+def write_parquet(conn, path, columns, sql, params=(), chunk_rows=CHUNK_ROWS):
+    """
+    Stream a query into one Parquet file, one row group per chunk. Writes
+    to a temporary name and renames at the end, so readers never see a
+    half-written file. Returns the number of rows written.
+    """
+    schema = arrow_schema(columns)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".partial"
+    rows_written = 0
+    with pq.ParquetWriter(partial, schema) as writer:
+        for rows in iter_rows(conn, sql, params, chunk_rows):
+            arrays = [_arrow_column(values, field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows_written += len(rows)
+        if rows_written == 0:
+            writer.write_table(schema.empty_table())
+    os.replace(partial, path)
+    return rows_written
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+def export_whole(conn, out_dir, table, chunk_rows):
+    columns = table_columns(conn, table)
+    path = os.path.join(out_dir, f"{table}.parquet")
+    rows = write_parquet(conn, path, columns, f"SELECT {select_list(columns)} FROM {table} t", (), chunk_rows)
+    return {"file": os.path.relpath(path, out_dir), "rows": rows}
+
+
+def export_signed(conn, out_dir, table, previous, chunk_rows):
+    """Unpartitioned table, skipped when its signature matches the manifest. Returns (entry, exported?)."""
+    count, last_run, created_at = conn.execute(SIGNED_SQL.format(table=table)).fetchone()
+    signature = [count, last_run, None if created_at is None else str(created_at)]
+    path = os.path.join(out_dir, f"{table}.parquet")
+    if previous and previous.get("signature") == signature and os.path.exists(path):
+        return previous, False
+    entry = export_whole(conn, out_dir, table, chunk_rows)
+    entry["signature"] = signature
+    return entry, True
+
+
+def year_case(conn, table):
+    """
+    Calendar year of t.trade_day as a CASE over the day numbers where years
+    begin, for the years a day-numbered table spans: integer comparisons
+    per row instead of a date conversion. First and last day are two
+    index lookups.
+    """
+    first, last = conn.execute(
+        f"SELECT (SELECT MIN(trade_day) FROM {table}), (SELECT MAX(trade_day) FROM {table})"
+    ).fetchone()
+    if first is None:
+        return "NULL"
+    years = range(int(day_dates([first])[0][:4]), int(day_dates([last])[0][:4]) + 1)
+    return "CASE " + " ".join(f"WHEN t.trade_day < {day_number(f'{year + 1}-01-01')} THEN {year}"
+                              for year in years) + " END"
+
+
+def partition_params(table, company_id, part):
+    """Parameters for a partition's row filter (PARTITIONED_TABLES)."""
+    key, expr, _, _ = PARTITIONED_TABLES[table]
+    if key == "fiscal_year":
+        return company_id, part
+    if expr is None:
+        return company_id, day_number(f"{part}-01-01"), day_number(f"{part}-12-31")
+    return company_id, f"{part}-01-01", f"{part}-12-31"
+
+
+def export_partitioned(conn, out_dir, table, previous, chunk_rows):
+    """
+    One Parquet file per (company, year) partition whose signature changed.
+    Returns (partitions entry, partitions exported, partitions removed).
+    """
+    key, expr, join, where = PARTITIONED_TABLES[table]
+    expr = expr or year_case(conn, table)
+    columns = [col for col in table_columns(conn, table) if col[0] != "company_id"]
+    order = ", ".join(row[1] for row in sorted(conn.execute(f"PRAGMA table_info({table})"), key=lambda r: r[5])
+                      if row[5] and row[1] != "company_id") or "1"
+    sql = f"SELECT {select_list(columns)} FROM {table} t WHERE {where} ORDER BY {order}"
+
+    content = CONTENT_AGGREGATES[table]
+    signatures = conn.execute(
+        f"""SELECT s.company_id, s.part, s.n, s.last_batch, b.started_at,
+                   {", ".join(f"s.c{i}" for i in range(len(content)))}
+            FROM (SELECT t.company_id, {expr} AS part, COUNT(*) AS n, MAX(t.load_batch_id) AS last_batch,
+                         {", ".join(f"{agg} AS c{i}" for i, agg in enumerate(content))}
+                  FROM {table} t {join} GROUP BY t.company_id, {expr}) s
+            LEFT JOIN etl_load_batch b ON b.batch_id = s.last_batch
+            ORDER BY 1, 2"""
+    ).fetchall()
+    previous = previous or {}
+    partitions, exported = {}, 0
+    for company_id, part, count, last_batch, started_at, *aggregates in signatures:
+        name = f"company_id={company_id}/{key}={part}"
+        path = os.path.join(out_dir, table, name, "part-0.parquet")
+        signature = [count, last_batch, None if started_at is None else str(started_at), *aggregates]
+        if previous.get(name, {}).get("signature") == signature and os.path.exists(path):
+            partitions[name] = previous[name]
+            continue
+        rows = write_parquet(conn, path, columns, sql, partition_params(table, company_id, part), chunk_rows)
+        partitions[name] = {"file": os.path.relpath(path, out_dir), "rows": rows, "signature": signature}
+        exported += 1
+
+    removed = set(previous) - set(partitions)
+    for name in removed:
+        shutil.rmtree(os.path.join(out_dir, table, name), ignore_errors=True)
+    return partitions, exported, len(removed)
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def export_database(db_path, out_dir=EXPORT_DIR, backend="sqlite", full=False, chunk_rows=CHUNK_ROWS, tables=None):
+    """
+    Export the database to `out_dir` (see the module docstring) and write
+    the manifest. `tables` limits the export to some tables. Returns
+    {table: (partitions or files written, skipped, removed)}.
+    """
+    if pa is None:
+        raise RuntimeError("The Parquet export needs the pyarrow package: pip install pyarrow")
+    manifest = {} if full else load_manifest(out_dir)
+    previous = manifest.get("tables", {})
+    conn = connect(db_path, backend, read_only=True)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    wanted = [t for t in [*WHOLE_TABLES, *SIGNED_TABLES, *PARTITIONED_TABLES]
+              if t in existing and (tables is None or t in tables)]
+
+    entries, summary = dict(previous), {}
+    for table in wanted:
+        if table in WHOLE_TABLES:
+            entries[table] = export_whole(conn, out_dir, table, chunk_rows)
+            summary[table] = (1, 0, 0)
+        elif table in SIGNED_TABLES:
+            entries[table], exported = export_signed(conn, out_dir, table, previous.get(table), chunk_rows)
+            summary[table] = (int(exported), int(not exported), 0)
+        else:
+            if full:
+                shutil.rmtree(os.path.join(out_dir, table), ignore_errors=True)
+            old = previous.get(table, {}).get("partitions")
+            partitions, exported, removed = export_partitioned(conn, out_dir, table, old, chunk_rows)
+            key = PARTITIONED_TABLES[table][0]
+            entries[table] = {"partition_by": ["company_id", key], "partitions": partitions,
+                              "rows": sum(p["rows"] for p in partitions.values())}
+            summary[table] = (exported, len(partitions) - exported, removed)
+    for old, new in REPLACED_EXPORTS.items():
+        if new in wanted and old in entries:
+            shutil.rmtree(os.path.join(out_dir, old), ignore_errors=True)
+            del entries[old]
+    conn.close()
+
+    manifest = {
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "database": os.path.abspath(db_path),
+        "backend": backend,
+        "chunk_rows": chunk_rows,
+        "tables": entries,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, MANIFEST_NAME + ".partial"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(out_dir, MANIFEST_NAME + ".partial"), os.path.join(out_dir, MANIFEST_NAME))
+    return summary
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Export the star schema to partitioned Parquet for Power BI.")
+    parser.add_argument("--full", action="store_true",
+                        help="re-export every partition, ignoring the manifest; clears stale partition folders")
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite", help="database to export from")
+    parser.add_argument("--out", default=EXPORT_DIR, help=f"output directory (default {EXPORT_DIR})")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows fetched and written per chunk")
+    args = parser.parse_args()
+    db_path = os.path.splitext(DB_PATH)[0] + FILE_SUFFIX[args.backend]
+
+    print(f"\n{'#'*60}")
+    print(f"  PAYPAL (PYPL) - PARQUET EXPORT ({'full' if args.full else 'changed partitions'})")
+    print(f"  Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'#'*60}\n")
+
+    if not os.path.exists(db_path):
+        raise SystemExit(f"  ⚠ {db_path} not found — run `python 02_load_to_sql.py` first")
+    start = time.perf_counter()
+    summary = export_database(db_path, args.out, args.backend, args.full, args.chunk_rows)
+    for table, (exported, skipped, removed) in summary.items():
+        note = f", {skipped} unchanged" if skipped else ""
+        note += f", {removed} removed" if removed else ""
+        print(f"  ✓ {table}: {exported} {'partition(s)' if table in PARTITIONED_TABLES else 'file(s)'} written{note}")
+
+    print(f"\n{'#'*60}")
+    print(f"  EXPORT READY in {time.perf_counter() - start:.2f}s")
+    print(f"  Folder: {args.out}")
+    print(f"  Manifest: {os.path.join(args.out, MANIFEST_NAME)}")
+    print(f"  Next step: Point Power BI's Parquet connector at the folder")
+    print(f"{'#'*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark: SQLite vs DuckDB on Scan-Heavy Queries
+=================================================
+Builds the same synthetic star schema in both backends of db_backends.py
+(schema.sql applied through the loader's ensure_schema(), identical
+INSERT ... SELECT generators) and times the dashboard and screening
+queries that read most of a fact table, plus one selective per-company
+read for contrast. Every query's result is compared across the two
+backends before its timing is reported.
+
+The database is scaled out by issuers: the seeded periods plus quarters,
+four scenarios and all line items per company, with as many synthetic
+companies as it takes to reach n_facts (rounded up to whole companies).
+
+Usage: python bench_backends.py [n_facts ...]   (default 1,000,000 and 50,000,000)
+"""
+
+import datetime
+import importlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from db_backends import BACKENDS, FILE_SUFFIX, connect, day_number
+
+loader = importlib.import_module("02_load_to_sql")
+
+TRADING_DAYS = 1000
+REPEATS = 3
+
+
+# =============================================================================
+# SYNTHETIC DATABASE
+# =============================================================================
+def build_database(conn, n_facts):
+    """Schema + seed dims, then synthetic companies' facts. Returns the fact count."""
+    loader.ensure_schema(conn)
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO dim_period (fiscal_year, quarter, period_type, period_label) VALUES (?, ?, ?, ?)",
+            [(year, quarter, "actual" if year <= 2024 else "forecast", f"Q{quarter} FY{year}")
+             for year in range(2019, 2028) for quarter in (1, 2, 3, 4)],
+        )
+        per_company = conn.execute(
+            """SELECT (SELECT COUNT(*) FROM dim_period) * (SELECT COUNT(*) FROM dim_scenario)
+                      * (SELECT COUNT(*) FROM dim_line_item)"""
+        ).fetchone()[0]
+        n_companies = max(2, -(-n_facts // per_company))
+        conn.executemany(
+            "INSERT OR IGNORE INTO dim_company (ticker, company_name) VALUES (?, ?)",
+            [(f"S{i:05d}", "synthetic") for i in range(n_companies - 1)],
+        )
+        conn.execute("CREATE TABLE _bench_day (n INTEGER, trade_day INTEGER)")
+        start = day_number(datetime.date(2021, 1, 1))
+        conn.executemany("INSERT INTO _bench_day (n, trade_day) VALUES (?, ?)",
+                         [(n, start + n) for n in range(TRADING_DAYS)])
+
+    # Deterministic values (no random()), so both backends hold identical facts
+    with conn:
+        conn.execute(
+            """INSERT INTO fact_financials
+                   (company_id, scenario_id, period_id, line_item_id, amount, source, load_batch_id)
+               SELECT c.company_id, s.scenario_id, p.period_id, l.line_item_id,
+                      (c.company_id * 7919 + l.line_item_id * 104729 + p.period_id * 613 + s.scenario_id * 37)
+                          % 200000 / 100.0 - 500,
+                      'synthetic', NULL
+               FROM dim_company c CROSS JOIN dim_scenario s CROSS JOIN dim_period p CROSS JOIN dim_line_item l"""
+        )
+    with conn:
+        conn.execute(
+            """INSERT INTO fact_ratios (company_id, scenario_id, period_id, ratio_id, value, load_batch_id)
+               SELECT c.company_id, s.scenario_id, p.period_id, r.ratio_id,
+                      (c.company_id * 31 + r.ratio_id * 577 + p.period_id * 7 + s.scenario_id) % 6000 / 100.0 - 10,
+                      NULL
+               FROM dim_company c CROSS JOIN dim_scenario s CROSS JOIN dim_period p CROSS JOIN dim_ratio r"""
+        )
+    with conn:
+        conn.execute(
+            """INSERT INTO fact_stock_bar
+                   (company_id, trade_day, open_price, high_price, low_price, close_price, adj_close, volume)
+               SELECT c.company_id, d.trade_day,
+                      (c.company_id * 13 + d.n) % 1000 / 10.0 + 20,
+                      (c.company_id * 13 + d.n) % 1000 / 10.0 + 21,
+                      (c.company_id * 13 + d.n) % 1000 / 10.0 + 19,
+                      (c.company_id * 13 + d.n) % 1000 / 10.0 + 20.5,
+                      (c.company_id * 13 + d.n) % 1000 / 10.0 + 20.5,
+                      1000000 + d.n
+               FROM dim_company c CROSS JOIN _bench_day d"""
+        )
+    return conn.execute("SELECT COUNT(*) FROM fact_financials").fetchone()[0]
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+def query_shapes():
+    """(name, sql, params): scan-heavy screens first, one selective read last."""
+    return [
+        ("ratio stats by year, all companies",
+         """SELECT fiscal_year, ratio_name, COUNT(*), ROUND(AVG(value), 6), MIN(value), MAX(value)
+            FROM vw_ratios WHERE scenario_name = ?
+            GROUP BY fiscal_year, ratio_name""",
+         ("Actual",)),
+        ("screen: ROE > 20 and Net Margin > 10",
+         """SELECT roe.company_id, roe.period_id
+            FROM fact_ratios roe
+            JOIN fact_ratios nm ON nm.company_id = roe.company_id AND nm.scenario_id = roe.scenario_id
+                               AND nm.period_id = roe.period_id
+            WHERE roe.ratio_id = (SELECT ratio_id FROM dim_ratio WHERE ratio_name = 'ROE')
+              AND nm.ratio_id = (SELECT ratio_id FROM dim_ratio WHERE ratio_name = 'Net Margin')
+              AND roe.scenario_id = 1 AND roe.value > 20 AND nm.value > 10""",
+         ()),
+        ("revenue totals by scenario and year",
+         """SELECT ds.scenario_name, dp.fiscal_year, COUNT(*), ROUND(SUM(ff.amount), 2)
+            FROM fact_financials ff
+            JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+            JOIN dim_period dp ON ff.period_id = dp.period_id
+            JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+            WHERE dli.item_name = 'Total Revenue' AND dp.quarter IS NULL
+            GROUP BY ds.scenario_name, dp.fiscal_year""",
+         ()),
+        ("income statement totals by company",
+         """SELECT ff.company_id, ROUND(SUM(ff.amount), 2)
+            FROM fact_financials ff JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+            WHERE dli.statement_type = 'income_statement' AND ff.scenario_id = 1
+            GROUP BY ff.company_id""",
+         ()),
+        ("ratio input pivot (02)",
+         f"SELECT COUNT(*), ROUND(SUM(rev), 2), ROUND(SUM(ni), 2) FROM ({loader.ratio_pivot_sql(4)}) AS inputs",
+         (1, 2, 3, 4)),
+        ("prices: 2022 average close per company",
+         """SELECT company_id, ROUND(AVG(adj_close), 6), MAX(high_price)
+            FROM fact_stock_bar WHERE trade_day >= ? AND trade_day < ?
+            GROUP BY company_id""",
+         (day_number("2022-01-01"), day_number("2023-01-01"))),
+        ("income statement view, one company",
+         "SELECT * FROM vw_income_statement WHERE ticker = ? AND scenario_name = ?", ("PYPL", "Base Case")),
+    ]
+
+
+def normalized(rows):
+    """Rows comparable across backends: dates as text, numbers as rounded floats, sorted."""
+    def cell(value):
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return round(float(value), 4)
+        return value
+    return sorted(tuple(cell(v) for v in row) for row in rows)
+
+
+def time_queries(conn):
+    results = {}
+    for name, sql, params in query_shapes():
+        timings, rows = [], None
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {"ms": statistics.median(timings), "rows": normalized(rows)}
+    return results
+
+
+def file_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ["", ".wal"] if os.path.exists(path + suffix))
+
+
+def run_size(n_facts, workdir):
+    print(f"\n{'='*60}")
+    print(f"  BACKEND BENCHMARK — {n_facts:,} facts")
+    print(f"{'='*60}\n")
+
+    results = {}
+    for backend in BACKENDS:
+        path = os.path.join(workdir, f"bench{FILE_SUFFIX[backend]}")
+        conn = connect(path, backend)
+        start = time.perf_counter()
+        facts = build_database(conn, n_facts)
+        print(f"  Built {backend:7s} in {time.perf_counter() - start:7.1f}s "
+              f"({facts:,} facts, {file_size(path) / 1e6:,.0f} MB)")
+        results[backend] = time_queries(conn)
+        conn.close()
+        for suffix in ["", ".wal"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    print(f"\n  {'query':40s} {'sqlite ms':>10s} {'duckdb ms':>10s} {'speedup':>8s}  result")
+    mismatched = []
+    for name, sqlite_result in results["sqlite"].items():
+        duck_result = results["duckdb"][name]
+        same = sqlite_result["rows"] == duck_result["rows"]
+        if not same:
+            mismatched.append(name)
+        print(f"  {name:40s} {sqlite_result['ms']:10.1f} {duck_result['ms']:10.1f} "
+              f"{sqlite_result['ms'] / max(duck_result['ms'], 1e-6):7.1f}x  "
+              f"{len(sqlite_result['rows']):,} rows {'same' if same else 'DIFFERENT'}")
+    if mismatched:
+        print(f"\n  ⚠ Backends disagree on: {', '.join(mismatched)}")
+    else:
+        print(f"\n  ✓ Both backends returned identical results for every query")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 50_000_000]
+    workdir = tempfile.mkdtemp(prefix="backend_bench_")
+    for n_facts in sizes:
+        run_size(n_facts, workdir)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: Default vs Bulk-Ingest Settings
+==========================================
+Loads the same synthetic fact batches into a fresh on-disk database twice,
+once with SQLite defaults (rollback journal, synchronous=FULL) and once in
+02_load_to_sql.py's --bulk mode (WAL, synchronous=OFF, large cache/mmap,
+deferred index builds), and reports rows/s for each. Both runs go through
+the loader's own write_fact_rows(), one transaction per batch.
+
+Usage: python bench_bulk_ingest.py [n_facts] [batch_size]   (default 2,000,000 / 50,000)
+"""
+
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+loader = importlib.import_module("02_load_to_sql")
+
+
+def synthetic_batches(n_facts, batch_size, seed=17):
+    """Fact rows in loader layout, split into load-sized batches (company-major key order)."""
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_facts)
+    rows = pd.DataFrame({
+        "company_id": idx // (69 * 40 * 4) + 1,
+        "scenario_id": idx // (69 * 40) % 4 + 1,
+        "period_id": idx // 69 % 40 + 1,
+        "line_item_id": idx % 69 + 1,
+        "amount": rng.normal(1_000, 400, n_facts).round(2),
+        "source": "synthetic",
+    })
+    return [rows.iloc[i:i + batch_size] for i in range(0, n_facts, batch_size)]
+
+
+def run(path, batches, bulk):
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    batch_id = loader.start_load_batch(conn, "full")
+    state = loader.enable_bulk_mode(conn) if bulk else None
+
+    start = time.perf_counter()
+    for rows in batches:
+        loader.write_fact_rows(conn, rows, batch_id)
+    load_time = time.perf_counter() - start
+    healthy = loader.finish_bulk_mode(conn, state) if bulk else True
+    total_time = time.perf_counter() - start
+
+    loader.finish_load_batch(conn, batch_id, "complete" if healthy else "failed")
+    conn.close()
+    return load_time, total_time, healthy
+
+
+def main():
+    n_facts = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    batches = synthetic_batches(n_facts, batch_size)
+
+    print(f"\n{'='*60}")
+    print(f"  BULK INGEST BENCHMARK — {n_facts:,} facts in {len(batches)} batches")
+    print(f"{'='*60}\n")
+
+    workdir = tempfile.mkdtemp(prefix="bulk_bench_")
+    results = {}
+    for label, bulk in [("default", False), ("bulk", True)]:
+        path = os.path.join(workdir, f"{label}.db")
+        results[label] = run(path, batches, bulk)
+        for suffix in ["", "-wal", "-shm", "-journal"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    os.rmdir(workdir)
+
+    print(f"\n  {'settings':10s} {'load s':>8s} {'finish s':>9s} {'total s':>8s} {'rows/s':>12s}  integrity")
+    for label, (load_time, total_time, healthy) in results.items():
+        print(f"  {label:10s} {load_time:8.2f} {total_time - load_time:9.2f} {total_time:8.2f} "
+              f"{n_facts / total_time:12,.0f}  {'ok' if healthy else 'FAILED'}")
+    print(f"  (finish = deferred index builds, checkpoint and integrity check)")
+    print(f"\n  Bulk mode speedup (incl. index builds and checks): "
+          f"{results['default'][1] / results['bulk'][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
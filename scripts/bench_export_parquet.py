@@ -0,0 +1,143 @@
+"""
+Benchmark: Streaming Parquet Export
+===================================
+Builds daily-bar tables of growing size (synthetic tickers x trading
+days in fact_stock_bar, schema applied through the loader's
+ensure_schema()) and exports fact_stock_bar from each one twice, every
+export in a fresh subprocess so its peak resident memory can be measured
+on its own:
+
+    streamed   04_export_parquet.export_database(): cursor chunks → row groups,
+               partitioned by company and year
+    read_sql   pd.read_sql of the whole table, then one DataFrame.to_parquet()
+
+A second streamed export after appending one day measures the
+manifest-based skip. Reports rows/s and peak RSS above the interpreter's
+baseline; streamed memory should stay flat as the table grows.
+
+Usage: python bench_export_parquet.py [n_tickers ...]   (default 100 400 1600, 1,250 days each)
+"""
+
+import importlib
+import os
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_backends import day_number
+
+loader = importlib.import_module("02_load_to_sql")
+
+N_DAYS = 1_250
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def child(mode, db_path, out_dir):
+    """Run one export in this (fresh) process and print "seconds baseline_mb peak_mb"."""
+    exporter = importlib.import_module("04_export_parquet")
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "read_sql":
+        conn = sqlite3.connect(db_path)
+        frame = pd.read_sql_query("SELECT * FROM fact_stock_bar", conn)
+        os.makedirs(out_dir, exist_ok=True)
+        frame.to_parquet(os.path.join(out_dir, "fact_stock_bar.parquet"), index=False)
+        conn.close()
+    else:
+        exporter.export_database(db_path, out_dir, tables=["fact_stock_bar"])
+    print(f"{time.perf_counter() - start:.3f} {baseline:.1f} {peak_rss_mb():.1f}")
+
+
+def run_child(mode, db_path, out_dir):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, db_path, out_dir],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds, baseline, peak = (float(x) for x in result.stdout.split()[-3:])
+    return seconds, peak - baseline
+
+
+def build(path, n_tickers, rng):
+    """N_DAYS bars per ticker; returns (the next business day, company ids)."""
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    days = [day_number(d) for d in pd.bdate_range("2020-01-01", periods=N_DAYS + 1)]
+    with conn:
+        conn.executemany("INSERT INTO dim_company (ticker, company_name) VALUES (?, 'synthetic')",
+                         [(f"S{i:05d}",) for i in range(n_tickers)])
+    company_ids = [cid for (cid,) in conn.execute("SELECT company_id FROM dim_company ORDER BY company_id")]
+    batch_id = loader.start_load_batch(conn, "full")
+    for cid in company_ids:
+        closes = rng.uniform(20, 200) * np.exp(np.cumsum(rng.normal(0, 0.02, N_DAYS)))
+        with conn:
+            conn.executemany(
+                """INSERT INTO fact_stock_bar (company_id, trade_day, open_price, high_price, low_price,
+                                               close_price, adj_close, volume, load_batch_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(cid, day, c, c * 1.01, c * 0.99, c, c, 1_000_000, batch_id)
+                 for day, c in zip(days, closes.round(4).tolist())],
+            )
+    loader.finish_load_batch(conn, batch_id)
+    conn.close()
+    return days[-1], company_ids
+
+
+def append_day(path, day, company_ids):
+    conn = sqlite3.connect(path)
+    batch_id = loader.start_load_batch(conn, "incremental")
+    with conn:
+        conn.executemany(
+            """INSERT INTO fact_stock_bar (company_id, trade_day, close_price, adj_close, volume, load_batch_id)
+               VALUES (?, ?, 100.0, 100.0, 1000, ?)""",
+            [(cid, day, batch_id) for cid in company_ids],
+        )
+    loader.finish_load_batch(conn, batch_id)
+    conn.close()
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+        return
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 400, 1_600]
+    rng = np.random.default_rng(5)
+    workdir = tempfile.mkdtemp(prefix="export_bench_")
+
+    print(f"\n{'='*60}")
+    print(f"  PARQUET EXPORT BENCHMARK — fact_stock_bar, {N_DAYS:,} days per ticker")
+    print(f"{'='*60}\n")
+    print(f"  {'tickers':>8s} {'rows':>10s} {'export':10s} {'seconds':>8s} {'rows/s':>10s} {'peak MB':>8s}")
+    for n_tickers in sizes:
+        db_path = os.path.join(workdir, f"prices_{n_tickers}.db")
+        next_day, company_ids = build(db_path, n_tickers, rng)
+        n_rows = n_tickers * N_DAYS
+        results = [
+            ("read_sql", *run_child("read_sql", db_path, os.path.join(workdir, "naive"))),
+            ("streamed", *run_child("streamed", db_path, os.path.join(workdir, "export"))),
+        ]
+        append_day(db_path, next_day, company_ids)
+        results.append(("+1 day", *run_child("streamed", db_path, os.path.join(workdir, "export"))))
+        for label, seconds, peak in results:
+            rows = n_tickers if label == "+1 day" else n_rows
+            print(f"  {n_tickers:8,} {n_rows:10,} {label:10s} {seconds:8.2f} {rows / seconds:10,.0f} {peak:8.1f}")
+        shutil.rmtree(os.path.join(workdir, "naive"), ignore_errors=True)
+        shutil.rmtree(os.path.join(workdir, "export"), ignore_errors=True)
+        os.remove(db_path)
+    os.rmdir(workdir)
+    print(f"\n  peak MB = peak resident memory above the interpreter baseline during the export;")
+    print(f"  '+1 day' re-exports only the partitions the appended day changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: CSV vs Arrow IPC Stage Hand-off
+==========================================
+Measures what a downstream stage pays to pick up the previous stage's
+output: parsing a CSV vs memory-mapping the Arrow hand-off (handoff.py).
+Uses a synthetic multi-ticker price history and a wide statement frame.
+
+Usage: python bench_handoff.py [n_price_rows]   (default 5,000,000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import handoff
+
+
+def synthetic_prices(n_rows, seed=11):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-03", periods=n_rows // 500 + 1, freq="B", tz="America/New_York")
+    df = pd.DataFrame({
+        "Date": np.tile(dates, 500)[:n_rows],
+        "Ticker": np.repeat([f"T{i:03d}" for i in range(500)], len(dates))[:n_rows],
+    })
+    for col in ["Open", "High", "Low", "Close"]:
+        df[col] = rng.lognormal(3.5, 0.4, n_rows)
+    df["Volume"] = rng.integers(1e5, 5e7, n_rows)
+    return df
+
+
+def synthetic_statement(n_rows=15_000, n_items=70, seed=13):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(1_000, 400, size=(n_rows, n_items)).round(2)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    index = pd.Index([str(2000 + i % 25) for i in range(n_rows)], name="Fiscal Year")
+    return pd.DataFrame(values, index=index, columns=[f"Item {i}" for i in range(n_items)])
+
+
+def time_it(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def bench(name, df, csv_kwargs):
+    csv_path = os.path.join(tempfile.gettempdir(), f"bench_{name}.csv")
+    index = csv_kwargs.get("index_col") is not None
+
+    csv_write, _ = time_it(lambda: df.to_csv(csv_path, index=index))
+    csv_read, _ = time_it(lambda: pd.read_csv(csv_path, **csv_kwargs))
+    ipc_write, _ = time_it(lambda: handoff.write_frame(df, f"bench_{name}"))
+    ipc_read, _ = time_it(lambda: handoff.read_frame(f"bench_{name}"))
+
+    size_csv = os.path.getsize(csv_path) / 1e6
+    size_ipc = os.path.getsize(handoff.handoff_path(f"bench_{name}")) / 1e6
+    print(f"  {name} ({len(df):,} rows × {df.shape[1]} cols)")
+    print(f"    CSV    write {csv_write:7.2f}s  read {csv_read:7.3f}s  {size_csv:8.1f} MB")
+    print(f"    Arrow  write {ipc_write:7.2f}s  map  {ipc_read:7.3f}s  {size_ipc:8.1f} MB"
+          f"  ({csv_read / ipc_read:.0f}x faster pick-up)")
+
+    # Float columns should be views over the mapped file, not copies
+    table = handoff.read_table(f"bench_{name}")
+    col = next(c for c in df.columns if df[c].dtype.kind == "f")
+    arrow_buf = table.column(col).chunk(0).buffers()[1]
+    values = handoff.frame_from_table(table)[col].to_numpy()
+    zero_copy = arrow_buf.address <= values.ctypes.data < arrow_buf.address + arrow_buf.size
+    print(f"    Zero-copy float columns: {'yes' if zero_copy else 'no'}")
+
+    os.remove(csv_path)
+    os.remove(handoff.handoff_path(f"bench_{name}"))
+
+
+def main():
+    if handoff.pa is None:
+        print("  pyarrow is not installed — nothing to benchmark")
+        return
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    print(f"\n{'='*60}")
+    print(f"  STAGE HAND-OFF BENCHMARK")
+    print(f"{'='*60}\n")
+    bench("prices", synthetic_prices(n_rows), {})
+    bench("statement", synthetic_statement(), {"index_col": 0})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: Online Schema Migrations
+===================================
+Builds a database at schema version 2 (before knowledge time existed),
+using the loader's ensure_schema() and then dropping what migration 3
+adds. It holds n synthetic companies' statements in fact_financials. The
+file is copied, and migration 3 runs on each copy while a second
+connection writes one small row every few milliseconds, the way an
+incremental load or a model run would:
+
+    sliced        the migration as shipped: BACKFILL_ROWS-row key slices,
+                  one transaction each
+    one statement the same backfill as a single UPDATE and INSERT ... SELECT
+
+Reports the migration time, its rate in rows per second, and the longest
+a concurrent write had to wait. Also checks that both copies end up with
+identical facts and history.
+
+Usage: python bench_migrations.py [n_companies]   (default 1,000: 4 scenarios x 20 periods x 25 items each)
+"""
+
+import importlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import bitemporal
+import migrations
+
+loader = importlib.import_module("02_load_to_sql")
+
+N_SCENARIOS, N_PERIODS, N_ITEMS = 4, 20, 25
+
+
+def build(path, n_companies, rng):
+    """Schema version 2 database with n_companies x scenarios x periods x items facts."""
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        conn.executemany("INSERT INTO dim_company (ticker, company_name) VALUES (?, 'synthetic')",
+                         [(f"S{i:05d}",) for i in range(n_companies)])
+        conn.executemany("INSERT OR IGNORE INTO dim_period (period_id, fiscal_year, period_type, period_label) "
+                         "VALUES (?, ?, 'actual', ?)",
+                         [(p, 2000 + p, f"FY{2000 + p}") for p in range(1, N_PERIODS + 1)])
+    batch_id = loader.start_load_batch(conn, "full")
+    company_ids = [cid for (cid,) in conn.execute("SELECT company_id FROM dim_company ORDER BY company_id")]
+    for cid in company_ids:
+        amounts = rng.normal(1_000, 300, N_SCENARIOS * N_PERIODS * N_ITEMS).round(2).tolist()
+        keys = ((s, p, i) for s in range(1, N_SCENARIOS + 1) for p in range(1, N_PERIODS + 1)
+                for i in range(1, N_ITEMS + 1))
+        conn.executemany(
+            "INSERT INTO fact_financials (company_id, scenario_id, period_id, line_item_id, amount, source, "
+            "load_batch_id) VALUES (?, ?, ?, ?, ?, 'synthetic', ?)",
+            ((cid, s, p, i, amount, batch_id) for (s, p, i), amount in zip(keys, amounts)),
+        )
+    conn.commit()
+    loader.finish_load_batch(conn, batch_id)
+
+    # Back to version 2: no knowledge time, no history
+    conn.execute("DROP TABLE fact_financials_history")
+    conn.execute("ALTER TABLE fact_financials DROP COLUMN known_from")
+    with conn:
+        conn.execute("DELETE FROM schema_version WHERE version >= 3")
+    conn.close()
+    return len(company_ids) * N_SCENARIOS * N_PERIODS * N_ITEMS
+
+
+def one_statement(conn):
+    """Migration 3's after step without slicing."""
+    with conn:
+        conn.execute(
+            """UPDATE fact_financials SET known_from = COALESCE((SELECT lb.started_at FROM etl_load_batch lb
+                                                                WHERE lb.batch_id = fact_financials.load_batch_id), ?)
+               WHERE known_from IS NULL""",
+            (datetime.now().isoformat(timespec="seconds"),),
+        )
+        conn.execute(
+            f"""INSERT INTO fact_financials_history ({", ".join(bitemporal.HISTORY_COLUMNS)})
+                SELECT company_id, scenario_id, period_id, line_item_id, known_from, NULL, amount, source,
+                       load_batch_id
+                FROM fact_financials WHERE true
+                ON CONFLICT(company_id, scenario_id, period_id, line_item_id, known_from) DO NOTHING"""
+        )
+
+
+def writer(path, stop, waits):
+    """
+    Concurrent writer: one tiny write every 5 ms, retried every millisecond
+    while the file is locked (SQLite's own busy handler backs off up to
+    100 ms and would measure its polling, not the lock), recording how long
+    each write waited.
+    """
+    conn = sqlite3.connect(path, timeout=0)
+    while not stop.is_set():
+        start = time.perf_counter()
+        while True:
+            try:
+                with conn:
+                    conn.execute("INSERT INTO etl_block_hash (source_name, block_key, content_hash, batch_id) "
+                                 "VALUES ('bench', ?, '', 1)", (str(start),))
+                break
+            except sqlite3.OperationalError:
+                time.sleep(0.001)
+        waits.append(time.perf_counter() - start)
+        time.sleep(0.005)
+    conn.close()
+
+
+def run(path, label, n_rows):
+    conn = sqlite3.connect(path, timeout=600)
+    stop, waits = threading.Event(), []
+    thread = threading.Thread(target=writer, args=(path, stop, waits))
+    thread.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    if label == "sliced":
+        done = migrations.migrate(conn, loader.SCHEMA_PATH, loader.MIGRATIONS)
+        assert [version for version, _, _ in done] == [3], done
+    else:
+        loader.add_knowledge_time(conn)
+        conn.executescript(open(loader.SCHEMA_PATH).read())
+        one_statement(conn)
+    seconds = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    print(f"  {label:14s} {seconds:8.2f} {n_rows / seconds:12,.0f} {max(waits) * 1000:14.1f} {len(waits):8,}")
+    counts = conn.execute("SELECT (SELECT COUNT(known_from) FROM fact_financials), "
+                          "(SELECT COUNT(*) FROM fact_financials_history)").fetchone()
+    conn.close()
+    return counts
+
+
+def main():
+    n_companies = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    rng = np.random.default_rng(47)
+    workdir = tempfile.mkdtemp(prefix="migration_bench_")
+    base = os.path.join(workdir, "v2.db")
+
+    print(f"\n{'='*60}")
+    print(f"  MIGRATION BENCHMARK — {n_companies:,} companies")
+    print(f"{'='*60}\n")
+    start = time.perf_counter()
+    n_rows = build(base, n_companies, rng)
+    size_mb = os.path.getsize(base) / (1 << 20)
+    print(f"  Built version-2 database: {n_rows:,} facts, {size_mb:,.0f} MB in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"  {'migration 3':14s} {'seconds':>8s} {'rows/s':>12s} {'max wait ms':>14s} {'writes':>8s}")
+    results = {}
+    for label in ["sliced", "one statement"]:
+        path = os.path.join(workdir, f"{label.replace(' ', '_')}.db")
+        shutil.copy(base, path)
+        results[label] = run(path, label, n_rows)
+    print(f"\n  ✓ Both copies: {results['sliced'][0]:,} facts with known_from, "
+          f"{results['sliced'][1]:,} versions" if results["sliced"] == results["one statement"] == (n_rows, n_rows)
+          else f"\n  ⚠ Results differ: {results}")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
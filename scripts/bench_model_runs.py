@@ -0,0 +1,167 @@
+"""
+Benchmark: Model Run Storage
+============================
+Records n Monte Carlo runs around the Base Case with model_runs.py into a
+fresh database (schema applied through the loader's ensure_schema()) and
+compares against the same runs stored naively, every run's full driver
+set and outputs as text-keyed rows (the pre-run-id fact_assumptions /
+fact_valuation columns plus a run_id). Reports write time, bytes per run
+and the time to pull a run set's driver and output columns and to filter
+runs on one driver.
+
+Usage: python bench_model_runs.py [n_runs ...]   (default 100,000)
+"""
+
+import importlib
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import model_runs
+
+loader = importlib.import_module("02_load_to_sql")
+
+REPEATS = 3
+
+NAIVE_SCHEMA = """
+CREATE TABLE naive_assumptions (
+    run_id INTEGER NOT NULL, company_id INTEGER NOT NULL, scenario_id INTEGER NOT NULL,
+    period_label TEXT NOT NULL, driver_name TEXT NOT NULL, driver_category TEXT, value REAL NOT NULL,
+    unit TEXT, notes TEXT,
+    PRIMARY KEY (run_id, driver_name, period_label)
+);
+CREATE TABLE naive_valuation (
+    run_id INTEGER NOT NULL, company_id INTEGER NOT NULL, scenario_id INTEGER NOT NULL,
+    metric_name TEXT NOT NULL, value REAL NOT NULL, unit TEXT,
+    PRIMARY KEY (run_id, metric_name)
+);
+CREATE INDEX idx_naive_driver ON naive_assumptions(driver_name, period_label, value);
+"""
+
+
+def monte_carlo_columns(base, n_runs, seed=7):
+    """Same draws as model_runs.record_monte_carlo(), as full resolved columns."""
+    rng = np.random.default_rng(seed)
+    columns = {key: np.full(n_runs, value) for key, value in base.items()}
+    wacc = np.maximum(rng.normal(base[("wacc", None)], 0.01, n_runs), 0.05)
+    columns[("wacc", None)] = wacc
+    columns[("terminal_growth", None)] = np.minimum(rng.uniform(0.005, 0.025, n_runs), wacc - 0.01)
+    for year in model_runs.FORECAST_YEARS:
+        columns[("revenue_growth", year)] = base[("revenue_growth", year)] + rng.normal(0, 0.015, n_runs)
+        columns[("operating_margin", year)] = base[("operating_margin", year)] + rng.normal(0, 0.01, n_runs)
+    return columns
+
+
+def write_naive(conn, columns, outputs, n_runs, first_run_id):
+    dims = dict(conn.execute("SELECT driver_name, driver_category || '|' || unit FROM dim_driver").fetchall())
+    run_ids = list(range(first_run_id, first_run_id + n_runs))
+    with conn:
+        conn.executescript(NAIVE_SCHEMA)
+        for (name, year), values in columns.items():
+            category, unit = dims[name].split("|")
+            label = f"FY{year}E" if year else "run"
+            conn.executemany(
+                "INSERT INTO naive_assumptions VALUES (?, 1, 2, ?, ?, ?, ?, ?, 'Monte Carlo draw')",
+                [(run_id, label, name, category, value, unit) for run_id, value in zip(run_ids, values.tolist())],
+            )
+        for name, values in outputs.items():
+            conn.executemany(
+                "INSERT INTO naive_valuation VALUES (?, 1, 2, ?, ?, 'usd_millions')",
+                [(run_id, name, value) for run_id, value in zip(run_ids, values.tolist())],
+            )
+
+
+def timed(fn):
+    timings, result = [], None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def table_bytes(conn, names):
+    return sum(conn.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = ?", (name,)).fetchone()[0]
+               for name in names)
+
+
+def run_size(n_runs, workdir):
+    print(f"\n{'='*60}")
+    print(f"  MODEL RUN STORAGE BENCHMARK — {n_runs:,} runs")
+    print(f"{'='*60}\n")
+
+    path = os.path.join(workdir, "runs.db")
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    base_run_id = model_runs.record_scenarios(conn)["Base Case"]
+
+    start = time.perf_counter()
+    run_ids = model_runs.record_monte_carlo(conn, base_run_id, n_runs)
+    compact_write = time.perf_counter() - start
+    run_set_id = conn.execute("SELECT run_set_id FROM model_run WHERE run_id = ?", (int(run_ids[0]),)).fetchone()[0]
+
+    base = model_runs._stored_columns(conn, base_run_id)
+    columns = monte_carlo_columns(base, n_runs)
+    outputs = model_runs.value_runs(columns, n_runs)
+    start = time.perf_counter()
+    write_naive(conn, columns, outputs, n_runs, int(run_ids[0]))
+    naive_write = time.perf_counter() - start
+
+    compact_bytes = table_bytes(conn, ["model_run", "idx_model_run_scenario", "fact_assumptions",
+                                       "idx_fact_assumptions_driver", "fact_valuation"])
+    naive_bytes = table_bytes(conn, ["naive_assumptions", "sqlite_autoindex_naive_assumptions_1",
+                                     "idx_naive_driver", "naive_valuation", "sqlite_autoindex_naive_valuation_1"])
+
+    low, high = int(run_ids[0]), int(run_ids[-1])
+    queries = {
+        "run set: 2 drivers + implied price": (
+            lambda: model_runs.run_table(conn, drivers=["wacc", "terminal_growth"],
+                                         metrics=["implied_share_price"], run_set_id=run_set_id),
+            lambda: conn.execute(
+                """SELECT a.run_id, a.value, t.value, v.value FROM naive_assumptions a
+                   JOIN naive_assumptions t ON t.run_id = a.run_id AND t.driver_name = 'terminal_growth'
+                   JOIN naive_valuation v ON v.run_id = a.run_id AND v.metric_name = 'implied_share_price'
+                   WHERE a.driver_name = 'wacc' AND a.run_id BETWEEN ? AND ?""", (low, high)).fetchall(),
+        ),
+        "runs with WACC > 11%": (
+            lambda: conn.execute(
+                """SELECT fa.run_id FROM fact_assumptions fa
+                   WHERE fa.driver_id = (SELECT driver_id FROM dim_driver WHERE driver_name = 'wacc')
+                     AND fa.period_id = 0 AND fa.value > 0.11 AND fa.run_id BETWEEN ? AND ?""",
+                (low, high)).fetchall(),
+            lambda: conn.execute(
+                """SELECT run_id FROM naive_assumptions
+                   WHERE driver_name = 'wacc' AND period_label = 'run' AND value > 0.11
+                     AND run_id BETWEEN ? AND ?""", (low, high)).fetchall(),
+        ),
+    }
+    results = {name: (timed(compact), timed(naive)) for name, (compact, naive) in queries.items()}
+    conn.close()
+    for suffix in ["", "-journal", "-wal", "-shm"]:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    print(f"  {'layout':10s} {'write s':>8s} {'runs/s':>10s} {'MB':>8s} {'bytes/run':>10s}")
+    for label, seconds, size in [("run-keyed", compact_write, compact_bytes), ("naive", naive_write, naive_bytes)]:
+        print(f"  {label:10s} {seconds:8.2f} {n_runs / seconds:10,.0f} {size / 1e6:8.1f} {size / n_runs:10,.0f}")
+    print(f"\n  {'query':36s} {'run-keyed ms':>13s} {'naive ms':>9s}  rows")
+    for name, ((compact_ms, compact_rows), (naive_ms, naive_rows)) in results.items():
+        print(f"  {name:36s} {compact_ms:13.1f} {naive_ms:9.1f}  {len(compact_rows):,} / {len(naive_rows):,}")
+    print(f"\n  Storage: {naive_bytes / compact_bytes:.1f}x smaller than full text-keyed driver sets")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000]
+    workdir = tempfile.mkdtemp(prefix="model_run_bench_")
+    for n_runs in sizes:
+        run_size(n_runs, workdir)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
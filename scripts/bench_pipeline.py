@@ -0,0 +1,141 @@
+"""
+Benchmark: Sequential vs Pipelined Universe Load
+================================================
+Loads the same synthetic universe into a fresh on-disk database three
+times through 02_load_to_sql.py's own sec_fact_rows() (XBRL extraction and
+normalization) and write_fact_rows(), driven by pipeline.run_pipeline():
+
+    sequential    workers=0: fetch, normalize and write each company in turn
+    1 worker      one fetch thread overlapping the writer
+    N workers     the default pipelined mode (FETCH_WORKERS threads)
+
+Fetching is simulated: every company's XBRL payload is built up front and
+handed out after a fixed network latency (time.sleep, which releases the
+GIL like a real socket wait). Reports wall time next to the fetch time
+(summed over workers, divided by the worker count) and write time, so the
+pipelined runs can be compared with max(fetch, write) and the sequential
+one with their sum. A last run with a small queue and a slowed-down writer
+(small commits, each delayed) shows backpressure: workers wait and the
+queue never holds more than its bound. Checks that
+every run leaves identical facts.
+
+Usage: python bench_pipeline.py [n_companies] [latency_ms]   (default 1,000 / 20)
+"""
+
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from pipeline import FETCH_WORKERS, run_pipeline
+from statement_cube import STATEMENT_TAGS
+
+loader = importlib.import_module("02_load_to_sql")
+
+YEARS = range(2019, 2025)
+
+
+def synthetic_payload(rng):
+    """XBRL company facts shaped like SEC's: each line item's first tag, 10-K FY and 10-Q entries per year."""
+    us_gaap = {}
+    for tags in STATEMENT_TAGS.values():
+        for item, candidates in tags.items():
+            unit = "USD/shares" if "EPS" in item else "USD"
+            scale = 3.0 if "EPS" in item else rng.uniform(1e8, 5e10)
+            entries = []
+            for year in YEARS:
+                entries.append({"end": f"{year}-12-31", "val": round(scale * rng.uniform(0.5, 1.5), 2),
+                                "fy": year, "fp": "FY", "form": "10-K"})
+                entries.extend({"end": f"{year}-{month:02d}-30", "val": round(scale * rng.uniform(0.1, 0.4), 2),
+                                "fy": year, "fp": f"Q{q}", "form": "10-Q"}
+                               for q, month in enumerate([3, 6, 9], start=1))
+            us_gaap[candidates[0]] = {"units": {unit: entries}}
+    return {"facts": {"us-gaap": us_gaap}}
+
+
+def build(path, n_companies):
+    """Fresh database with n synthetic companies; returns [(ticker, cik)]."""
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    universe = [(f"S{i:05d}", f"{i:010d}") for i in range(1, n_companies + 1)]
+    with conn:
+        conn.executemany("INSERT INTO dim_company (ticker, cik) VALUES (?, ?)", universe)
+    conn.close()
+    return universe
+
+
+def run(path, universe, payloads, latency, workers, write_delay=0.0, **options):
+    conn = sqlite3.connect(path)
+    batch_id = loader.start_load_batch(conn, "full")
+    keys = loader.load_dimension_keys(conn)
+
+    def fetch(cik):
+        time.sleep(latency)
+        return payloads[cik]
+
+    def write(rows):
+        time.sleep(write_delay)
+        loader.write_fact_rows(conn, rows, batch_id)
+
+    stats = run_pipeline(universe, lambda item: loader.sec_fact_rows(*item, keys, list(YEARS), fetch),
+                         write, workers=workers, **options)
+    loader.finish_load_batch(conn, batch_id)
+    facts = conn.execute("SELECT company_id, scenario_id, period_id, line_item_id, amount, source "
+                         "FROM fact_financials ORDER BY 1, 2, 3, 4").fetchall()
+    conn.execute("DELETE FROM fact_financials_history")
+    conn.execute("DELETE FROM fact_financials")
+    conn.commit()
+    conn.close()
+    return stats, facts
+
+
+def main():
+    n_companies = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    rng = np.random.default_rng(49)
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    path = os.path.join(workdir, "universe.db")
+
+    print(f"\n{'='*60}")
+    print(f"  PIPELINE BENCHMARK — {n_companies:,} companies, {latency * 1000:.0f} ms per fetch")
+    print(f"{'='*60}\n")
+    universe = build(path, n_companies)
+    payloads = {cik: synthetic_payload(rng) for _, cik in universe}
+
+    print(f"  {'mode':12s} {'wall s':>8s} {'fetch s':>8s} {'write s':>8s} {'sum s':>8s} {'max s':>8s} "
+          f"{'facts':>10s} {'commits':>8s}")
+    results = {}
+    for label, workers in [("sequential", 0), ("1 worker", 1), (f"{FETCH_WORKERS} workers", FETCH_WORKERS)]:
+        stats, facts = run(path, universe, payloads, latency, workers)
+        fetch = stats["extract_seconds"] / max(workers, 1)
+        write = stats["write_seconds"]
+        print(f"  {label:12s} {stats['seconds']:8.2f} {fetch:8.2f} {write:8.2f} {fetch + write:8.2f} "
+              f"{max(fetch, write):8.2f} {stats['rows']:10,} {stats['commits']:8,}")
+        results[label] = (stats, facts)
+
+    # Backpressure: a writer slower than the fetchers (small batches and commits, 250 ms extra each), a four-batch queue
+    stats, facts = run(path, universe, payloads, latency, FETCH_WORKERS, write_delay=0.25,
+                       queue_batches=4, batch_rows=1_000, commit_rows=10_000)
+    print(f"\n  Slow writer, queue of 4: {stats['seconds']:.1f}s, workers blocked {stats['blocked_seconds']:.1f}s "
+          f"in total, at most {stats['max_queued']} batches queued")
+    results["backpressure"] = (stats, facts)
+    os.remove(path)
+    for suffix in ["-wal", "-shm"]:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(workdir)
+
+    sequential = results["sequential"][0]["seconds"]
+    pipelined = results[f"{FETCH_WORKERS} workers"][0]["seconds"]
+    same = all(facts == results["sequential"][1] and not stats["failed"] for stats, facts in results.values())
+    print(f"\n  Pipelined ({FETCH_WORKERS} workers): {sequential / pipelined:.1f}x faster than sequential")
+    print(f"  {'✓ Every run loaded the same facts' if same else '⚠ Runs loaded different facts'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Benchmark: Star-Schema Query Plans
+==================================
+Runs the project's real query shapes (02 loader lookups, the ratio pivot,
+the reporting views, materialized-table refresh keys, cross-company
+screens) against a synthetically scaled copy of the schema and records,
+for each one, the EXPLAIN QUERY PLAN and the median latency.
+
+The database is scaled out by issuers: the seeded periods plus quarters,
+four scenarios and all line items per company, with as many synthetic
+companies as it takes to reach n_facts. Two layouts hold the same rows:
+    rowid     AUTOINCREMENT id + UNIQUE key + single-column indexes, text dates
+    current   sql/schema.sql as it is now (company-clustered WITHOUT ROWID,
+              prices in fact_stock_bar by day number)
+
+Results for `current` are saved to data/bench/query_plans.json. On the next
+run they are compared with the saved numbers and a query is flagged when
+it got more than 1.5x slower, its plan changed, or it full-scans a fact
+table without being meant to.
+
+Usage: python bench_query_plans.py [n_facts] [--save]   (default 10,000,000)
+"""
+
+import importlib
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from db_backends import day_number
+
+loader = importlib.import_module("02_load_to_sql")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(BASE_DIR, "data", "bench", "query_plans.json")
+TRADING_DAYS = 1000
+REPEATS = 5
+SLOWDOWN_LIMIT = 1.5
+
+# Row-id fact tables: the pre-clustering layout, with company_id added
+ROWID_LAYOUT = """
+DROP TABLE fact_financials;
+DROP TABLE fact_ratios;
+DROP VIEW fact_stock_price;
+DROP TABLE fact_stock_bar;
+CREATE TABLE fact_financials (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id      INTEGER NOT NULL,
+    period_id       INTEGER NOT NULL,
+    line_item_id    INTEGER NOT NULL,
+    scenario_id     INTEGER NOT NULL,
+    amount          REAL,
+    source          TEXT,
+    load_batch_id   INTEGER,
+    UNIQUE(company_id, period_id, line_item_id, scenario_id)
+);
+CREATE TABLE fact_ratios (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id      INTEGER NOT NULL,
+    period_id       INTEGER NOT NULL,
+    ratio_id        INTEGER NOT NULL,
+    scenario_id     INTEGER NOT NULL,
+    value           REAL,
+    load_batch_id   INTEGER,
+    UNIQUE(company_id, period_id, ratio_id, scenario_id)
+);
+CREATE TABLE fact_stock_price (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id      INTEGER NOT NULL,
+    trade_date      DATE NOT NULL,
+    open_price      REAL,
+    high_price      REAL,
+    low_price       REAL,
+    close_price     REAL,
+    adj_close       REAL,
+    volume          INTEGER,
+    load_batch_id   INTEGER,
+    UNIQUE(company_id, trade_date)
+);
+CREATE INDEX idx_fact_financials_period ON fact_financials(period_id);
+CREATE INDEX idx_fact_financials_scenario ON fact_financials(scenario_id);
+CREATE INDEX idx_fact_financials_lineitem ON fact_financials(line_item_id);
+CREATE INDEX idx_fact_financials_batch ON fact_financials(load_batch_id);
+CREATE INDEX idx_fact_ratios_period ON fact_ratios(period_id);
+CREATE INDEX idx_fact_ratios_batch ON fact_ratios(load_batch_id);
+CREATE INDEX idx_fact_stock_date ON fact_stock_price(trade_date);
+"""
+
+# Daily bars per layout: (table, date column, SQL for day n from 2021-01-01, a date as stored)
+PRICE_LAYOUTS = {
+    "rowid": ("fact_stock_price", "trade_date", "date('2021-01-01', '+' || day.n || ' days')", str),
+    "current": ("fact_stock_bar", "trade_day", f"{day_number('2021-01-01')} + day.n", day_number),
+}
+
+
+# =============================================================================
+# SYNTHETIC DATABASE
+# =============================================================================
+def build_database(path, layout, n_facts):
+    """Schema + seed dims from sql/schema.sql, scaled out with synthetic companies."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    loader.ensure_schema(conn)
+    if layout == "rowid":
+        conn.executescript(ROWID_LAYOUT)
+
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO dim_period (fiscal_year, quarter, period_type, period_label) VALUES (?, ?, ?, ?)",
+            [(year, quarter, "actual" if year <= 2024 else "forecast", f"Q{quarter} FY{year}")
+             for year in range(2019, 2028) for quarter in (1, 2, 3, 4)],
+        )
+        per_company = conn.execute(
+            """SELECT (SELECT COUNT(*) FROM dim_period) * (SELECT COUNT(*) FROM dim_scenario)
+                      * (SELECT COUNT(*) FROM dim_line_item)"""
+        ).fetchone()[0]
+        n_companies = max(2, -(-n_facts // per_company))
+        conn.executemany(
+            "INSERT OR IGNORE INTO dim_company (ticker, company_name) VALUES (?, 'synthetic')",
+            [(f"S{i:05d}",) for i in range(n_companies - 1)],
+        )
+        conn.executemany("INSERT INTO etl_load_batch (mode, started_at, status) VALUES ('full', '', 'complete')",
+                         [()] * 50)
+
+        # CROSS JOIN fixes the loop order, so rows arrive in clustered-key order
+        conn.execute(
+            """INSERT INTO fact_financials
+                   (company_id, scenario_id, period_id, line_item_id, amount, source, load_batch_id)
+               SELECT c.company_id, s.scenario_id, p.period_id, l.line_item_id,
+                      (random() % 1000000) / 100.0, 'synthetic', 1 + c.company_id % 50
+               FROM dim_company c CROSS JOIN dim_scenario s CROSS JOIN dim_period p CROSS JOIN dim_line_item l
+               LIMIT ?""",
+            (n_facts,),
+        )
+        conn.execute(
+            """INSERT INTO fact_ratios (company_id, scenario_id, period_id, ratio_id, value, load_batch_id)
+               SELECT c.company_id, s.scenario_id, p.period_id, r.ratio_id, (random() % 10000) / 100.0,
+                      1 + c.company_id % 50
+               FROM dim_company c CROSS JOIN dim_scenario s CROSS JOIN dim_period p CROSS JOIN dim_ratio r
+               LIMIT ?""",
+            (n_facts * 25 // 69,),
+        )
+        table, date_column, day_sql, _ = PRICE_LAYOUTS[layout]
+        conn.execute(
+            f"""WITH RECURSIVE day(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM day WHERE n < ? - 1)
+                INSERT INTO {table}
+                    (company_id, {date_column}, open_price, high_price, low_price, close_price, adj_close, volume)
+                SELECT c.company_id, {day_sql}, 50.0, 51.0, 49.0, 50.5, 50.5, 1000000
+                FROM dim_company c CROSS JOIN day""",
+            (TRADING_DAYS,),
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+# =============================================================================
+# QUERY SHAPES
+# =============================================================================
+def query_shapes(layout="current"):
+    """(name, sql, params, full scan expected) for every query pattern the pipeline and reports issue."""
+    prices, day, _, stored = PRICE_LAYOUTS[layout]
+    return [
+        ("point lookup (get_value)",
+         """SELECT ff.amount FROM fact_financials ff
+            JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+            WHERE ff.company_id = ? AND ff.period_id = ? AND ff.scenario_id = ?
+              AND dli.statement_type = ? AND dli.item_name = ?""",
+         (1, 6, 1, "income_statement", "Total Revenue"), False),
+        # Recomputes every company's ratios, so reading every fact is the point
+        ("ratio input pivot (02)", loader.ratio_pivot_sql(4), (1, 2, 3, 4), True),
+        ("income statement view, one company",
+         "SELECT * FROM vw_income_statement WHERE ticker = ? AND scenario_name = ?", ("PYPL", "Base Case"), False),
+        ("income statement view, company + year",
+         "SELECT * FROM vw_income_statement WHERE ticker = ? AND scenario_name = ? AND fiscal_year = ?",
+         ("PYPL", "Base Case", 2024), False),
+        ("line item history",
+         """SELECT dp.fiscal_year, ff.amount FROM fact_financials ff
+            JOIN dim_period dp ON ff.period_id = dp.period_id
+            WHERE ff.company_id = ? AND ff.scenario_id = ? AND ff.line_item_id = ? AND dp.quarter IS NULL
+            ORDER BY dp.fiscal_year""",
+         (1, 2, 1), False),
+        ("revenue by year (summary)",
+         """SELECT dp.period_label, ff.amount, ff.source
+            FROM fact_financials ff
+            JOIN dim_company dc ON ff.company_id = dc.company_id
+            JOIN dim_period dp ON ff.period_id = dp.period_id
+            JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+            JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+            WHERE dc.ticker = 'PYPL' AND dli.item_name = 'Total Revenue' AND ds.scenario_name = 'Actual'
+            ORDER BY dp.fiscal_year""",
+         (), False),
+        ("ratios view, company + year",
+         "SELECT * FROM vw_ratios WHERE ticker = ? AND scenario_name = ? AND fiscal_year = ?",
+         ("PYPL", "Base Case", 2024), False),
+        ("cross-company: revenue in one year",
+         """SELECT ff.company_id, ff.amount FROM fact_financials ff
+            WHERE ff.line_item_id = ? AND ff.scenario_id = ? AND ff.period_id = ?""",
+         (1, 1, 6), False),
+        ("cross-company: top ROE in one year",
+         """SELECT dc.ticker, fr.value FROM fact_ratios fr
+            JOIN dim_company dc ON fr.company_id = dc.company_id
+            JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+            WHERE dr.ratio_name = 'ROE' AND fr.scenario_id = 1 AND fr.period_id = 6
+            ORDER BY fr.value DESC LIMIT 20""",
+         (), False),
+        ("prices: one company, one year",
+         f"SELECT {day}, adj_close FROM {prices} WHERE company_id = ? AND {day} BETWEEN ? AND ?",
+         (1, stored("2022-01-01"), stored("2022-12-31")), False),
+        ("prices: all companies on one day",
+         f"SELECT company_id, adj_close FROM {prices} WHERE {day} = ?", (stored("2022-06-30"),), False),
+        ("keys touched by a load batch (materialize)",
+         """SELECT company_id, scenario_id, period_id FROM fact_financials WHERE load_batch_id = :b
+            UNION
+            SELECT company_id, scenario_id, period_id FROM fact_ratios WHERE load_batch_id = :b""",
+         {"b": 7}, False),
+    ]
+
+
+def explain(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def full_fact_scan(plan):
+    """A SCAN (not SEARCH) of a fact table means the query reads every fact."""
+    return any(step.startswith("SCAN") and ("fact_" in step or " ff" in step or " fr" in step) for step in plan)
+
+
+def run_layout(path, layout):
+    conn = sqlite3.connect(path)
+    results = {}
+    for name, sql, params, _ in query_shapes(layout):
+        conn.execute(sql, params).fetchall()  # warm the page cache
+        times = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            times.append(time.perf_counter() - start)
+        results[name] = {"ms": statistics.median(times) * 1000, "plan": explain(conn, sql, params)}
+    conn.close()
+    return results
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n_facts = int(args[0]) if args else 10_000_000
+    save = "--save" in sys.argv or not os.path.exists(RESULTS_PATH)
+
+    print(f"\n{'='*60}")
+    print(f"  QUERY PLAN BENCHMARK — {n_facts:,} facts")
+    print(f"{'='*60}\n")
+
+    workdir = tempfile.mkdtemp(prefix="qplan_bench_")
+    layouts = {}
+    for layout in ["rowid", "current"]:
+        path = os.path.join(workdir, f"{layout}.db")
+        start = time.perf_counter()
+        build_database(path, layout, n_facts)
+        print(f"  Built {layout:8s} layout in {time.perf_counter() - start:6.1f}s "
+              f"({os.path.getsize(path) / 1e6:,.0f} MB)")
+        layouts[layout] = run_layout(path, layout)
+        os.remove(path)
+    os.rmdir(workdir)
+
+    previous = {}
+    if os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH) as f:
+            previous = json.load(f)
+    if previous.get("n_facts") != n_facts:
+        previous = {}
+
+    print(f"\n  {'query':44s} {'rowid ms':>9s} {'current ms':>11s} {'speedup':>8s}")
+    flagged = []
+    scans_expected = {name for name, _, _, full in query_shapes() if full}
+    for name, result in layouts["current"].items():
+        old = layouts["rowid"][name]["ms"]
+        print(f"  {name:44s} {old:9.2f} {result['ms']:11.2f} {old / max(result['ms'], 1e-6):7.1f}x")
+        for step in result["plan"]:
+            print(f"      {step}")
+        if full_fact_scan(result["plan"]) and name not in scans_expected:
+            flagged.append(f"{name}: full scan of a fact table")
+        saved = previous.get("queries", {}).get(name)
+        if saved:
+            if result["ms"] > saved["ms"] * SLOWDOWN_LIMIT and result["ms"] - saved["ms"] > 1:
+                flagged.append(f"{name}: {saved['ms']:.2f} ms → {result['ms']:.2f} ms")
+            if result["plan"] != saved["plan"]:
+                flagged.append(f"{name}: plan changed")
+
+    if flagged:
+        print(f"\n  ⚠ {len(flagged)} regression(s):")
+        for line in flagged:
+            print(f"    - {line}")
+    else:
+        print(f"\n  ✓ No regressions")
+
+    if save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w") as f:
+            json.dump({"n_facts": n_facts, "queries": layouts["current"]}, f, indent=2)
+        print(f"  ✓ Results saved to {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
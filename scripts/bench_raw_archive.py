@@ -0,0 +1,86 @@
+"""
+Benchmark: Raw Response Archive
+===============================
+Archives synthetic XBRL-shaped company-facts payloads for many companies
+over several refresh dates, then reports disk usage against the same
+payloads stored as plain JSON files and single-entry read latency.
+
+Usage: python bench_raw_archive.py [n_companies] [n_refreshes]   (default 2,000 × 6)
+"""
+
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from raw_archive import RawArchive
+
+TAGS = ["Revenues", "NetIncomeLoss", "Assets", "Liabilities", "StockholdersEquity",
+        "OperatingIncomeLoss", "CostOfRevenue", "InterestExpense", "LongTermDebt",
+        "NetCashProvidedByUsedInOperatingActivities"]
+
+
+def synthetic_company_facts(cik, refresh):
+    """Roughly the shape of SEC companyfacts JSON; each refresh appends a filing."""
+    rng = random.Random(f"{cik}-{refresh}")
+    facts = {}
+    for tag in TAGS:
+        entries = [
+            {"end": f"{year}-12-31", "val": rng.randint(10**6, 10**11), "accn": f"0000{cik}-{year}-000001",
+             "fy": year, "fp": "FY", "form": "10-K", "filed": f"{year + 1}-02-0{1 + year % 8}"}
+            for year in range(2009, 2019 + refresh)
+        ]
+        facts[tag] = {"label": tag, "description": f"Reported {tag} per us-gaap taxonomy.",
+                      "units": {"USD": entries}}
+    return {"cik": int(cik), "entityName": f"Company {cik}", "facts": {"us-gaap": facts}}
+
+
+def main():
+    n_companies = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_refreshes = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    rng = random.Random(3)
+    root = tempfile.mkdtemp(prefix="raw_archive_bench_")
+
+    print(f"\n{'='*60}")
+    print(f"  RAW ARCHIVE BENCHMARK — {n_companies:,} companies × {n_refreshes} refreshes")
+    print(f"{'='*60}\n")
+
+    archive = RawArchive(root)
+    raw_bytes = 0
+    start = time.perf_counter()
+    for refresh in range(n_refreshes):
+        as_of = f"2025-{refresh + 1:02d}-01"
+        for i in range(n_companies):
+            cik = f"{i:010d}"
+            # Most companies don't file between monthly refreshes: payload repeats
+            version = refresh if i % 3 == 0 else refresh // 3
+            payload = json.dumps(synthetic_company_facts(cik, version)).encode()
+            raw_bytes += len(payload)
+            archive.put("sec_companyfacts", cik, payload, as_of=as_of)
+    write_s = time.perf_counter() - start
+
+    stats = archive.stats()
+    print(f"  Archived {stats['entries']:,} entries ({stats['blobs']:,} distinct) in {write_s:.1f}s")
+    print(f"  Plain JSON files:  {raw_bytes / 1e6:10.1f} MB")
+    print(f"  Archive on disk:   {stats['stored_bytes'] / 1e6:10.1f} MB "
+          f"({stats['stored_bytes'] / raw_bytes * 100:.1f}% of raw)")
+
+    keys = [(f"{rng.randrange(n_companies):010d}", f"2025-{rng.randrange(n_refreshes) + 1:02d}-15")
+            for _ in range(500)]
+    latencies = []
+    for cik, as_of in keys:
+        start = time.perf_counter()
+        archive.get("sec_companyfacts", cik, as_of)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"  Single-entry read: p50 {latencies[len(latencies) // 2]:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms")
+
+    archive.close()
+    shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark: Dashboard Tiles from the Rollup Cube
+===============================================
+Builds a synthetic universe (n companies x 4 scenarios x 9 fiscal years x
+every line item, inserted directly; ratios from the loader's
+calculate_ratios()) with a 25 company peer group. Times three dashboard tiles answered two ways: by
+scanning fact_financials / fact_ratios with their dimensions (aggregating
+in Python where SQLite has no median or percentile), and by reading
+agg_rollup:
+
+    opex by item across scenarios    one year, every company
+    median operating margin by year  peer group
+    p90 revenue by year              every company (quantile sketch)
+
+Then restates one company's FY2024 actuals and compares the incremental
+refresh_rollup(conn, batch_id) with a full rebuild: time, and identical
+cells. Reports how far the sketch's p90 is from the exact value for the
+all-company group.
+
+Usage: python bench_rollup.py [n_companies]   (default 2,000)
+"""
+
+import importlib
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from rollup import define_group, percentile, refresh_rollup
+
+loader = importlib.import_module("02_load_to_sql")
+
+REPEATS = 5
+N_PEERS = 25
+
+TILES = {
+    "opex by item across scenarios": (
+        """SELECT ds.scenario_name, dli.item_name, SUM(ff.amount)
+           FROM fact_financials ff
+           JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+           JOIN dim_period dp ON ff.period_id = dp.period_id
+           JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+           WHERE dli.item_category = 'Operating Expenses' AND dp.fiscal_year = 2024 AND dp.quarter IS NULL
+           GROUP BY ds.scenario_name, dli.item_name""",
+        """SELECT ds.scenario_name, r.measure, r.total
+           FROM dim_scenario ds
+           JOIN agg_rollup r ON r.group_id = 1 AND r.scenario_id = ds.scenario_id
+           WHERE r.fiscal_year = 2024 AND r.item_category = 'Operating Expenses'""",
+        None, None,
+    ),
+    "median operating margin by year": (
+        """SELECT dp.fiscal_year, fr.value
+           FROM dim_company_group g
+           JOIN company_group_member m ON m.group_id = g.group_id
+           JOIN fact_ratios fr ON fr.company_id = m.company_id AND fr.scenario_id = 1
+           JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+           JOIN dim_period dp ON fr.period_id = dp.period_id
+           WHERE g.group_name = 'Peers' AND dr.ratio_name = 'Operating Margin' AND dp.quarter IS NULL""",
+        """SELECT r.fiscal_year, r.median
+           FROM dim_company_group g
+           JOIN agg_rollup r ON r.group_id = g.group_id AND r.scenario_id = 1
+           WHERE g.group_name = 'Peers' AND r.item_category = 'profitability'
+             AND r.measure = 'Operating Margin'""",
+        lambda rows: pd.DataFrame(rows, columns=["year", "value"]).groupby("year")["value"].median(),
+        None,
+    ),
+    "p90 revenue by year": (
+        """SELECT dp.fiscal_year, ff.amount
+           FROM fact_financials ff
+           JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+           JOIN dim_period dp ON ff.period_id = dp.period_id
+           WHERE dli.item_name = 'Total Revenue' AND ff.scenario_id = 1 AND dp.quarter IS NULL""",
+        """SELECT r.fiscal_year, r.sketch FROM agg_rollup r
+           WHERE r.group_id = 1 AND r.scenario_id = 1 AND r.item_category = 'Revenue' AND r.measure = 'Total Revenue'""",
+        lambda rows: pd.DataFrame(rows, columns=["year", "value"]).groupby("year")["value"].quantile(0.9),
+        lambda rows: {year: percentile(sketch, 0.9) for year, sketch in rows},
+    ),
+}
+
+
+def build(path, n_companies, rng):
+    """Synthetic universe: every scenario, annual period and line item per company, plus ratios and the cube."""
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        conn.executemany("INSERT INTO dim_company (ticker) VALUES (?)", [(f"S{i:05d}",) for i in range(n_companies)])
+    keys = loader.load_dimension_keys(conn)
+    line_items = sorted(keys["line_item"].values())
+    periods = sorted(keys["period"].values())
+    scenarios = [keys["scenario"][name] for name in ["Actual", "Base Case", "Bull Case", "Bear Case"]]
+    batch_id = loader.start_load_batch(conn, "full")
+    key = pd.MultiIndex.from_product([scenarios, periods, line_items]).to_frame(index=False).to_numpy()
+    for company_id in range(2, n_companies + 2):                # 1 is PYPL, seeded by the schema
+        amounts = (rng.lognormal(7, 1.5) * rng.uniform(0.05, 1.0, len(key))).round(2)
+        with conn:
+            conn.executemany("""INSERT INTO fact_financials (company_id, scenario_id, period_id, line_item_id,
+                                                             amount, source, load_batch_id)
+                                VALUES (?, ?, ?, ?, ?, 'synthetic', ?)""",
+                             [(company_id, *k, amount, batch_id) for k, amount in zip(key.tolist(), amounts.tolist())])
+    loader.calculate_ratios(conn, batch_id)
+    loader.finish_load_batch(conn, batch_id)
+    start = time.perf_counter()
+    cells = refresh_rollup(conn)
+    seconds = time.perf_counter() - start
+    define_group(conn, "Peers", [f"S{i:05d}" for i in range(0, n_companies, max(1, n_companies // N_PEERS))][:N_PEERS])
+    conn.execute("ANALYZE")
+    conn.close()
+    return cells, seconds
+
+
+def median_ms(conn, sql, shape):
+    times = []
+    for _ in range(REPEATS + 1):
+        start = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        result = shape(rows) if shape else rows
+        times.append(time.perf_counter() - start)
+    return statistics.median(times[1:]) * 1000, result
+
+
+def restate(conn, company_id, rng):
+    """
+    A load batch restating one company's FY2024 actuals (a new 10-K);
+    returns (cells refreshed, incremental refresh seconds).
+    """
+    batch_id = loader.start_load_batch(conn, "incremental")
+    rows = pd.read_sql("""SELECT ff.company_id, ff.period_id, ff.line_item_id, ff.scenario_id, ff.amount, ff.source
+                          FROM fact_financials ff JOIN dim_period dp ON dp.period_id = ff.period_id
+                          WHERE ff.company_id = ? AND ff.scenario_id = 1 AND dp.fiscal_year = 2024
+                            AND dp.quarter IS NULL""", conn, params=(company_id,))
+    rows["amount"] = (rows["amount"] * rng.uniform(0.9, 1.1, len(rows))).round(2)
+    loader.write_fact_rows(conn, rows, batch_id)
+    loader.calculate_ratios(conn, batch_id)
+    start = time.perf_counter()
+    cells = refresh_rollup(conn, batch_id)
+    seconds = time.perf_counter() - start
+    loader.finish_load_batch(conn, batch_id)
+    return cells, seconds
+
+
+def main():
+    n_companies = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    rng = np.random.default_rng(50)
+    workdir = tempfile.mkdtemp(prefix="rollup_bench_")
+    path = os.path.join(workdir, "universe.db")
+
+    print(f"\n{'='*60}")
+    print(f"  ROLLUP CUBE BENCHMARK — {n_companies:,} companies")
+    print(f"{'='*60}\n")
+    start = time.perf_counter()
+    cells, seconds = build(path, n_companies, rng)
+    print(f"\n  Built universe in {time.perf_counter() - start:.1f}s; full cube: {cells:,} cells in {seconds:.2f}s\n")
+
+    conn = sqlite3.connect(path)
+    print(f"  {'tile':34s} {'scan ms':>9s} {'cube ms':>9s} {'speedup':>9s}")
+    answers = {}
+    for name, (scan_sql, cube_sql, scan_shape, cube_shape) in TILES.items():
+        scan_ms, scanned = median_ms(conn, scan_sql, scan_shape)
+        cube_ms, looked_up = median_ms(conn, cube_sql, cube_shape)
+        answers[name] = (scanned, looked_up)
+        print(f"  {name:34s} {scan_ms:9.2f} {cube_ms:9.3f} {scan_ms / cube_ms:8.0f}x")
+
+    scanned, looked_up = answers["opex by item across scenarios"]
+    same_opex = np.allclose(sorted(r[2] for r in scanned), sorted(r[2] for r in looked_up))
+    scanned, looked_up = answers["median operating margin by year"]
+    same_median = np.allclose(scanned.to_numpy(), [m for _, m in sorted(looked_up)])
+    scanned, looked_up = answers["p90 revenue by year"]
+    p90_error = max(abs(looked_up[year] - exact) / exact for year, exact in scanned.items())
+    n_points = len(np.frombuffer(conn.execute("SELECT sketch FROM agg_rollup WHERE group_id = 1").fetchone()[0]))
+    print(f"\n  Sketch of {n_points} points for {n_companies:,} companies: p90 revenue within "
+          f"{p90_error:.2%} of the exact value")
+
+    cells, incremental = restate(conn, n_companies // 2, rng)
+    incremental_cells = pd.read_sql("SELECT * FROM agg_rollup ORDER BY 1, 2, 3, 4, 5", conn)
+    start = time.perf_counter()
+    refresh_rollup(conn)
+    full = time.perf_counter() - start
+    rebuilt_cells = pd.read_sql("SELECT * FROM agg_rollup ORDER BY 1, 2, 3, 4, 5", conn)
+    conn.close()
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(workdir)
+
+    columns = [c for c in rebuilt_cells.columns if c != "refreshed_batch_id"]
+    same_cube = incremental_cells[columns].equals(rebuilt_cells[columns])
+    print(f"\n  One company's FY2024 actuals restated: incremental refresh {cells:,} cells in {incremental * 1000:.0f} ms, "
+          f"full rebuild {full * 1000:.0f} ms ({full / incremental:.0f}x)")
+    checks = {"opex totals": same_opex, "peer medians": same_median, "incremental = full rebuild": same_cube}
+    for check, ok in checks.items():
+        print(f"  {'✓' if ok else '⚠'} {check}")
+
+
+if __name__ == "__main__":
+    main()
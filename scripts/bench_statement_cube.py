@@ -0,0 +1,106 @@
+"""
+Benchmark: Universe Statement Cube
+==================================
+Builds the company × year × line item cube for a synthetic universe with
+1, 2, 4 … cores and reports throughput and speedup. Synthetic XBRL
+company-facts payloads are written once to a temporary raw archive, and
+every timed build reads and parses them from there, as a real rebuild
+from data/raw/archive/ does.
+
+Usage: python bench_statement_cube.py [n_companies] [n_years]   (default 5,000 × 15)
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+
+import statement_cube
+from raw_archive import RawArchive
+from statement_cube import LINE_ITEMS, STATEMENT_TAGS, build_statement_cube, load_archived_payload
+
+FIRST_YEAR = 2010
+N_YEARS = 15
+
+
+def synthetic_payload(cik):
+    """Company facts JSON for one CIK: every mapped tag, 10-K FY + 10-Q entries."""
+    rng = random.Random(cik)
+    us_gaap = {}
+    for stmt, item in LINE_ITEMS:
+        tags = STATEMENT_TAGS[stmt][item]
+        tag = tags[rng.randrange(len(tags))]
+        unit = "USD/shares" if "EPS" in item else "shares" if "Shares" in item else "USD"
+        entries = []
+        for year in range(FIRST_YEAR - 2, FIRST_YEAR + N_YEARS):
+            for q, month in enumerate([3, 6, 9], start=1):
+                entries.append({"end": f"{year}-{month:02d}-30", "val": rng.randint(1, 10**9),
+                                "fy": year, "fp": f"Q{q}", "form": "10-Q"})
+            entries.append({"end": f"{year}-12-31", "val": rng.randint(1, 10**10),
+                            "fy": year, "fp": "FY", "form": "10-K"})
+        us_gaap[tag] = {"label": tag, "units": {unit: entries}}
+    return json.dumps({"cik": int(cik), "facts": {"us-gaap": us_gaap}}).encode()
+
+
+def write_synthetic_archive(ciks):
+    root = tempfile.mkdtemp(prefix="cube_bench_")
+    archive = RawArchive(root)
+    for cik in ciks:
+        archive.put(statement_cube._sec.SEC_ARCHIVE_SOURCE, cik, synthetic_payload(cik))
+    archive.close()
+    return root
+
+
+def check_against_01b(cik, years, cube):
+    """Cube values must match 01b.extract_annual_value for every item and year."""
+    facts = json.loads(synthetic_payload(cik))
+    for col, (stmt, item) in enumerate(LINE_ITEMS):
+        tags = STATEMENT_TAGS[stmt][item]
+        for row, year in enumerate(years):
+            expected = statement_cube._sec.extract_annual_value(facts, tags, year)
+            got = cube.values[cube.ciks.index(cik), row, col]
+            assert (expected is None and np.isnan(got)) or expected == got, (cik, item, year)
+
+
+def main():
+    n_companies = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else N_YEARS
+    years = range(FIRST_YEAR, FIRST_YEAR + n_years)
+    ciks = [f"{1_000_000 + i * 37:010d}" for i in range(n_companies)]
+    cores = os.cpu_count() or 1
+
+    print(f"\n{'='*60}")
+    print(f"  STATEMENT CUBE BENCHMARK — {n_companies:,} companies × {n_years} years × {len(LINE_ITEMS)} items")
+    print(f"{'='*60}\n")
+
+    start = time.perf_counter()
+    archive_root = write_synthetic_archive(ciks)
+    load_payload = partial(load_archived_payload, archive_root=archive_root)
+    print(f"  Setup: synthetic archive written in {time.perf_counter() - start:.1f}s\n")
+
+    worker_counts = sorted({1, *[w for w in (2, 4, 8, 16, 32, 64) if w <= cores], cores})
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        cube = build_statement_cube(ciks, years, workers=workers, load_payload=load_payload)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {workers:3d} worker(s): {elapsed:8.1f}s  "
+              f"{n_companies / elapsed:8.0f} companies/s  speedup {baseline / elapsed:5.2f}x")
+
+    for cik in ciks[:: max(1, n_companies // 10)]:
+        check_against_01b(cik, years, cube)
+    print(f"\n  ✓ Cube matches 01b.extract_annual_value on sampled companies")
+    print(f"  Cube: {cube.values.shape} = {cube.values.nbytes / 1e6:.1f} MB, "
+          f"{np.isfinite(cube.values).mean() * 100:.0f}% populated")
+    shutil.rmtree(archive_root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark: Daily Bar Storage Layout
+===================================
+Stores the same synthetic daily bars (n tickers x n trading days, random
+walks) in each layout fact_stock_price has had, one database file per
+layout built through the loader's ensure_schema(). Each ticker's history
+is backfilled in one go and the last APPENDED_DAYS are then added a day at
+a time for every ticker, the way daily refreshes arrive:
+
+    rowid      AUTOINCREMENT id, UNIQUE(company_id, trade_date), an index on
+               trade_date and one on load_batch_id; dates as TEXT
+    text key   WITHOUT ROWID on (company_id, trade_date TEXT), a covering
+               (trade_date, company_id, adj_close, close_price) index
+    compact    fact_stock_bar as it is now: WITHOUT ROWID on
+               (company_id, trade_day INTEGER), slim day and batch indexes
+
+Reports each file's size and bytes per bar, then the median time of the
+range scans price consumers issue (several tickers' histories over a
+window, one ticker's full history, every ticker over one year read
+company by company as stock_returns.py and the export do, one day across
+tickers), checking that every layout returns the same bars. Each scan is
+timed twice: aggregated inside SQLite (COUNT / SUM, the cost of the
+layout itself) and fetched into Python rows (what a consumer waits for).
+
+Usage: python bench_stock_layout.py [n_tickers] [n_days]   (default 1,000 / 2,520)
+"""
+
+import importlib
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_backends import day_dates, day_number
+
+loader = importlib.import_module("02_load_to_sql")
+
+REPEATS = 5
+N_WINDOW_TICKERS = 50
+APPENDED_DAYS = 63                  # one quarter of daily refreshes
+
+PRICE_COLUMNS = "open_price REAL, high_price REAL, low_price REAL, close_price REAL, adj_close REAL, volume INTEGER"
+
+# Earlier layouts, swapped in for fact_stock_bar and the fact_stock_price view
+OLD_LAYOUTS = {
+    "rowid": f"""
+        DROP VIEW fact_stock_price;
+        DROP TABLE fact_stock_bar;
+        CREATE TABLE fact_stock_price (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, company_id INTEGER NOT NULL, trade_date DATE NOT NULL,
+            {PRICE_COLUMNS}, load_batch_id INTEGER, UNIQUE(company_id, trade_date));
+        CREATE INDEX idx_fact_stock_date ON fact_stock_price(trade_date);
+        CREATE INDEX idx_fact_stock_batch ON fact_stock_price(load_batch_id);""",
+    "text key": f"""
+        DROP VIEW fact_stock_price;
+        DROP TABLE fact_stock_bar;
+        CREATE TABLE fact_stock_price (
+            company_id INTEGER NOT NULL, trade_date DATE NOT NULL,
+            {PRICE_COLUMNS}, load_batch_id INTEGER, PRIMARY KEY (company_id, trade_date)) WITHOUT ROWID;
+        CREATE INDEX idx_fact_stock_date ON fact_stock_price(trade_date, company_id, adj_close, close_price);
+        CREATE INDEX idx_fact_stock_batch ON fact_stock_price(load_batch_id);""",
+}
+
+# Per layout: (table, date column, a date as stored)
+LAYOUT_KEYS = {
+    "rowid": ("fact_stock_price", "trade_date", str),
+    "text key": ("fact_stock_price", "trade_date", str),
+    "compact": ("fact_stock_bar", "trade_day", day_number),
+}
+
+
+def bars(n_tickers, days, rng):
+    """(company_id, day, open, high, low, close, adj_close, volume) rows: a random walk per ticker."""
+    closes = rng.uniform(20, 200, (n_tickers, 1)) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_tickers, len(days))),
+                                                                     axis=1))
+    return [[(company_id, day, c, round(c * 1.01, 4), round(c * 0.99, 4), c, c, 1_000_000 + i)
+             for i, (day, c) in enumerate(zip(days, row))]
+            for company_id, row in enumerate(closes.round(4).tolist(), start=1)]
+
+
+def build(path, layout, n_tickers, dates, seed):
+    """One layout's database: histories ticker by ticker, then daily appends. Returns the file size in bytes."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    loader.ensure_schema(conn)
+    if layout in OLD_LAYOUTS:
+        conn.executescript(OLD_LAYOUTS[layout])
+    table, date_column, stored = LAYOUT_KEYS[layout]
+    days = [stored(d) for d in dates]
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO dim_company (company_id, ticker) VALUES (?, ?)",
+                         [(cid, f"S{cid:05d}") for cid in range(1, n_tickers + 1)])
+    insert = f"""INSERT INTO {table} (company_id, {date_column}, open_price, high_price, low_price,
+                                      close_price, adj_close, volume, load_batch_id)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+    rows = bars(n_tickers, days, np.random.default_rng(seed))
+    history = len(days) - APPENDED_DAYS
+    for ticker_rows in rows:
+        with conn:
+            conn.executemany(insert, [(*row, 1) for row in ticker_rows[:history]])
+    for i in range(history, len(days)):
+        with conn:
+            conn.executemany(insert, [(*ticker_rows[i], 2 + i - history) for ticker_rows in rows])
+    conn.execute("ANALYZE")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def scans(layout, dates, n_tickers):
+    """(name, sql, params) for the range scans, in the layout's table and date encoding."""
+    table, day, stored = LAYOUT_KEYS[layout]
+    window = [stored(dates[-756]), stored(dates[-1])]                          # last three years
+    quarter = [stored(dates[-APPENDED_DAYS]), stored(dates[-1])]
+    year = [stored(dates[-252]), stored(dates[-1])]
+    tickers = list(range(1, n_tickers + 1, max(1, n_tickers // N_WINDOW_TICKERS)))[:N_WINDOW_TICKERS]
+    holders = ", ".join("?" * len(tickers))
+    return [
+        (f"{len(tickers)} tickers x 3 years",
+         f"SELECT company_id, {day}, adj_close FROM {table} WHERE company_id IN ({holders}) AND {day} BETWEEN ? AND ?",
+         [*tickers, *window]),
+        (f"{len(tickers)} tickers x last quarter",
+         f"SELECT company_id, {day}, adj_close FROM {table} WHERE company_id IN ({holders}) AND {day} BETWEEN ? AND ?",
+         [*tickers, *quarter]),
+        ("one ticker, full history",
+         f"SELECT company_id, {day}, adj_close FROM {table} WHERE company_id = ?", [n_tickers // 2]),
+        ("every ticker, one year",
+         f"""SELECT p.company_id, p.{day}, p.adj_close FROM dim_company c
+             JOIN {table} p ON p.company_id = c.company_id AND p.{day} BETWEEN ? AND ?""", year),
+        ("every ticker, one day",
+         f"SELECT company_id, {day}, adj_close FROM {table} WHERE {day} = ?", [stored(dates[-126])]),
+    ]
+
+
+def median_ms(conn, sql, params):
+    conn.execute(sql, params).fetchall()                              # warm the page cache
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run_scans(path, layout, dates, n_tickers):
+    """{scan: (scan ms, fetch ms, rows as sorted (company_id, YYYY-MM-DD, adj_close))}."""
+    conn = sqlite3.connect(path)
+    results = {}
+    for name, sql, params in scans(layout, dates, n_tickers):
+        scan = median_ms(conn, f"SELECT COUNT(*), SUM(adj_close) FROM ({sql})", params)
+        fetch = median_ms(conn, sql, params)
+        rows = conn.execute(sql, params).fetchall()
+        if layout == "compact" and rows:
+            company, day, price = zip(*rows)
+            rows = list(zip(company, day_dates(day).tolist(), price))
+        results[name] = (scan, fetch, sorted(rows))
+    conn.close()
+    return results
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 2_520
+    dates = [d.date().isoformat() for d in pd.bdate_range("2015-01-01", periods=n_days)]
+    workdir = tempfile.mkdtemp(prefix="stock_layout_bench_")
+
+    print(f"\n{'='*60}")
+    print(f"  DAILY BAR LAYOUT BENCHMARK — {n_tickers:,} tickers x {n_days:,} days")
+    print(f"{'='*60}\n")
+    print(f"  {'layout':10s} {'build s':>8s} {'MB':>8s} {'bytes/bar':>10s}")
+    sizes, results = {}, {}
+    for layout in ["rowid", "text key", "compact"]:
+        path = os.path.join(workdir, f"{layout.replace(' ', '_')}.db")
+        start = time.perf_counter()
+        sizes[layout] = build(path, layout, n_tickers, dates, seed=48)
+        seconds = time.perf_counter() - start
+        print(f"  {layout:10s} {seconds:8.1f} {sizes[layout] / (1 << 20):8.1f} "
+              f"{sizes[layout] / (n_tickers * n_days):10.1f}")
+        results[layout] = run_scans(path, layout, dates, n_tickers)
+        os.remove(path)
+    os.rmdir(workdir)
+
+    same = all(results["rowid"][name][2] == results["text key"][name][2] == rows
+               for name, (_, _, rows) in results["compact"].items())
+    for i, label in enumerate(["scanned in SQLite", "fetched to Python"]):
+        print(f"\n  {label + ', ms':26s} {'rows':>9s} {'rowid':>8s} {'text key':>9s} {'compact':>8s} "
+              f"{'vs rowid':>9s} {'vs text key':>12s}")
+        for name, compact in results["compact"].items():
+            old, text, ms = results["rowid"][name][i], results["text key"][name][i], compact[i]
+            print(f"  {name:26s} {len(compact[2]):9,} {old:8.2f} {text:9.2f} {ms:8.2f} "
+                  f"{old / ms:8.1f}x {text / ms:11.1f}x")
+
+    print(f"\n  Compact file: {1 - sizes['compact'] / sizes['rowid']:.0%} smaller than rowid, "
+          f"{1 - sizes['compact'] / sizes['text key']:.0%} smaller than text key")
+    print(f"  {'✓ Every layout returned the same bars' if same else '⚠ Layouts returned different bars'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: Incremental Stock Return Analytics
+=============================================
+Fills a fresh database (schema applied through the loader's
+ensure_schema()) with synthetic daily bars for n tickers, computes
+fact_stock_returns in full, then appends one trading day for every ticker
+as a new load batch and times stock_returns.refresh_stock_returns() for
+that batch against recomputing everything. The incremental result is
+checked against the full recompute before timings are reported.
+
+Usage: python bench_stock_returns.py [n_tickers] [n_days]   (default 1,000 / 2,520)
+"""
+
+import datetime
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_backends import day_number
+from stock_returns import RETURN_COLUMNS, refresh_stock_returns
+
+loader = importlib.import_module("02_load_to_sql")
+
+
+def trading_days(n_days, start=datetime.date(2015, 1, 1)):
+    days = pd.bdate_range(start, periods=n_days + 1)
+    return [day_number(d) for d in days]
+
+
+def insert_bars(conn, company_ids, dates, batch_id, rng, last_close=None):
+    """Random-walk closes for every company over `dates`; returns the final closes."""
+    steps = rng.normal(0.0003, 0.02, (len(company_ids), len(dates)))
+    start = last_close if last_close is not None else rng.uniform(20, 200, len(company_ids))
+    closes = start[:, None] * np.exp(np.cumsum(steps, axis=1))
+    with conn:
+        conn.executemany(
+            """INSERT INTO fact_stock_bar (company_id, trade_day, close_price, adj_close, volume, load_batch_id)
+               VALUES (?, ?, ?, ?, 1000000, ?)""",
+            ((cid, day, close, close, batch_id)
+             for cid, row in zip(company_ids, closes.round(4).tolist()) for day, close in zip(dates, row)),
+        )
+    return closes[:, -1]
+
+
+def snapshot(conn):
+    frame = pd.read_sql_query("SELECT * FROM fact_stock_returns ORDER BY company_id, trade_date", conn)
+    return frame[["company_id", "trade_date", *RETURN_COLUMNS]]
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 2_520
+
+    print(f"\n{'='*60}")
+    print(f"  STOCK RETURNS BENCHMARK — {n_tickers:,} tickers x {n_days:,} days")
+    print(f"{'='*60}\n")
+
+    workdir = tempfile.mkdtemp(prefix="returns_bench_")
+    path = os.path.join(workdir, "returns.db")
+    conn = sqlite3.connect(path)
+    loader.ensure_schema(conn)
+    with conn:
+        conn.executemany("INSERT INTO dim_company (ticker, company_name) VALUES (?, 'synthetic')",
+                         [(f"S{i:05d}",) for i in range(n_tickers)])
+    company_ids = [cid for (cid,) in conn.execute("SELECT company_id FROM dim_company ORDER BY company_id")]
+    dates = trading_days(n_days)
+    rng = np.random.default_rng(11)
+
+    batch_id = loader.start_load_batch(conn, "full")
+    start = time.perf_counter()
+    last_close = insert_bars(conn, company_ids, dates[:-1], batch_id, rng)
+    print(f"  Loaded {len(company_ids) * (len(dates) - 1):,} bars in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    written, _ = refresh_stock_returns(conn, batch_id)
+    initial = time.perf_counter() - start
+    loader.finish_load_batch(conn, batch_id)
+
+    # One new trading day for every ticker
+    batch_id = loader.start_load_batch(conn, "incremental")
+    insert_bars(conn, company_ids, dates[-1:], batch_id, rng, last_close)
+    start = time.perf_counter()
+    appended, companies = refresh_stock_returns(conn, batch_id)
+    incremental = time.perf_counter() - start
+    loader.finish_load_batch(conn, batch_id)
+    result = snapshot(conn)
+
+    start = time.perf_counter()
+    refresh_stock_returns(conn)
+    full = time.perf_counter() - start
+    same = np.allclose(result[RETURN_COLUMNS].to_numpy(float), snapshot(conn)[RETURN_COLUMNS].to_numpy(float),
+                       rtol=1e-9, atol=1e-12, equal_nan=True)
+    conn.close()
+    for suffix in ["", "-journal", "-wal", "-shm"]:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(workdir)
+
+    print(f"\n  {'refresh':28s} {'rows':>12s} {'seconds':>9s}")
+    print(f"  {'initial (full history)':28s} {written:12,} {initial:9.2f}")
+    print(f"  {'append 1 day (incremental)':28s} {appended:12,} {incremental:9.2f}")
+    print(f"  {'append 1 day (full recompute)':28s} {len(result):12,} {full:9.2f}")
+    print(f"\n  Incremental refresh: {full / incremental:.0f}x faster, "
+          f"{incremental / companies * 1000:.2f} ms per ticker; "
+          f"{'✓ matches' if same else '⚠ DIFFERS from'} the full recompute")
+
+
+if __name__ == "__main__":
+    main()
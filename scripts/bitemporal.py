@@ -0,0 +1,174 @@
+"""
+Bitemporal Financial Facts
+==========================
+fact_financials holds the current value of every fact. Its valid time is
+the period it is keyed on (dim_period start/end dates); known_from is its
+knowledge time, when the warehouse first held that value (the start of
+the load batch that wrote it). Restatements and patches (e.g. 01c) used to
+overwrite the value and lose the previous one. Now every version goes into
+fact_financials_history with the interval it was current:
+
+    [known_from, known_to)     known_to NULL = still current
+
+The write paths (02's write_fact_rows, ttm.refresh_ttm) stage the keys
+they upsert and call record_versions() in the same transaction. It
+closes the open version of every staged fact that changed and opens the
+new one. A fact whose source no longer has it is deleted with
+retire_facts(), which closes its open version. So the history always
+matches fact_financials.
+History is keyed like the facts with known_from appended. One company
+and scenario's statement as it was known at a date D is therefore a
+single range scan of that key prefix (see QueryAPI.statement_as_of):
+
+    known_from <= D AND (known_to IS NULL OR known_to > D)
+
+Runs on SQLite and DuckDB.
+
+Usage:
+    from bitemporal import knowledge_time, record_versions
+    known_at = knowledge_time(conn, batch_id)
+    ... stage the keys in temp._written_facts, upsert them with known_from = known_at ...
+    record_versions(conn, known_at)
+    ... stage keys no longer in the source in temp._retired_facts ...
+    retire_facts(conn, known_at, batch_id)
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from migrations import key_ranges
+
+HISTORY_COLUMNS = ["company_id", "scenario_id", "period_id", "line_item_id", "known_from", "known_to",
+                   "amount", "source", "load_batch_id"]
+
+# Keys staged in temp._written_facts, matched to the facts the write set to
+# known_at: close the open version of every one that changed...
+_WRITTEN = """_written_facts w
+    JOIN fact_financials ff ON ff.company_id = w.company_id AND ff.scenario_id = w.scenario_id
+                           AND ff.period_id = w.period_id AND ff.line_item_id = w.line_item_id"""
+
+CLOSE_SQL = f"""
+    UPDATE fact_financials_history SET known_to = ff.known_from
+    FROM {_WRITTEN}
+    WHERE ff.known_from = :known_at
+      AND fact_financials_history.company_id = ff.company_id
+      AND fact_financials_history.scenario_id = ff.scenario_id
+      AND fact_financials_history.period_id = ff.period_id
+      AND fact_financials_history.line_item_id = ff.line_item_id
+      AND fact_financials_history.known_to IS NULL
+      AND fact_financials_history.known_from <> ff.known_from"""
+
+# ...and open its new one (a second write in the same batch updates it in place)
+OPEN_SQL = f"""
+    INSERT INTO fact_financials_history ({", ".join(HISTORY_COLUMNS)})
+    SELECT ff.company_id, ff.scenario_id, ff.period_id, ff.line_item_id, ff.known_from, NULL,
+           ff.amount, ff.source, ff.load_batch_id
+    FROM {_WRITTEN}
+    WHERE ff.known_from = :known_at
+    ON CONFLICT(company_id, scenario_id, period_id, line_item_id, known_from) DO UPDATE SET
+        amount = excluded.amount, source = excluded.source, known_to = NULL
+    WHERE amount IS NOT excluded.amount OR source IS NOT excluded.source OR known_to IS NOT NULL"""
+
+
+# Keys staged in temp._retired_facts: close their open versions, record them
+# as deleted by the batch (etl_deleted_fact), then delete the current facts
+_RETIRED = """EXISTS (SELECT 1 FROM _retired_facts r
+                      WHERE r.company_id = {t}.company_id AND r.scenario_id = {t}.scenario_id
+                        AND r.period_id = {t}.period_id AND r.line_item_id = {t}.line_item_id)"""
+
+RETIRE_CLOSE_SQL = f"""
+    UPDATE fact_financials_history SET known_to = :known_at
+    WHERE known_to IS NULL AND {_RETIRED.format(t="fact_financials_history")}"""
+
+RETIRE_RECORD_SQL = f"""
+    INSERT INTO etl_deleted_fact (batch_id, fact_table, company_id, scenario_id, period_id, member_id)
+    SELECT :batch, 'fact_financials', ff.company_id, ff.scenario_id, ff.period_id, ff.line_item_id
+    FROM fact_financials ff
+    WHERE {_RETIRED.format(t="ff")}
+    ON CONFLICT(batch_id, fact_table, company_id, scenario_id, period_id, member_id) DO NOTHING"""
+
+RETIRE_DELETE_SQL = f"DELETE FROM fact_financials WHERE {_RETIRED.format(t='fact_financials')}"
+
+
+def staging_table(conn, table="_retired_facts"):
+    """
+    (Re)create an empty temp staging table of fact keys: _retired_facts
+    for retire_facts(), _written_facts for record_versions().
+    """
+    conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(f"""CREATE TEMP TABLE {table} (company_id INTEGER, scenario_id INTEGER, period_id INTEGER,
+                                                line_item_id INTEGER)""")
+
+
+def knowledge_time(conn, batch_id=None):
+    """Knowledge time for facts written by a batch: its start (ISO, microseconds); now without a batch."""
+    row = None
+    if batch_id is not None:
+        row = conn.execute("SELECT started_at FROM etl_load_batch WHERE batch_id = ?", (batch_id,)).fetchone()
+    return row[0] if row else datetime.now().isoformat(timespec="microseconds")
+
+
+def as_of_bound(as_of):
+    """
+    Knowledge-time bound for an as-of query, comparable with known_from
+    (fixed-width microseconds; older second-resolution times compare
+    correctly against it). A bare date means everything known by the end
+    of that day.
+    """
+    if isinstance(as_of, date) and not isinstance(as_of, datetime):
+        as_of = as_of.isoformat()
+    if isinstance(as_of, str) and len(as_of) == 10:
+        as_of += "T23:59:59.999999"
+    return pd.Timestamp(as_of).isoformat(timespec="microseconds")
+
+
+def record_versions(conn, known_at):
+    """
+    Version the facts keyed in temp._written_facts (see staging_table())
+    that the write set to known_from = known_at (run inside the writer's
+    transaction). Only the staged keys are visited, so a batch written in
+    many chunks costs each chunk its own size. Drops the staging table.
+    Returns the number of versions opened or updated.
+    """
+    params = {"known_at": known_at}
+    conn.execute(CLOSE_SQL, params)
+    cursor = conn.execute(OPEN_SQL, params)
+    conn.execute("DROP TABLE IF EXISTS temp._written_facts")
+    return max(cursor.rowcount, 0)
+
+
+def retire_facts(conn, known_at, batch_id=None):
+    """
+    Delete the facts keyed in temp._retired_facts (see staging_table()),
+    closing their open versions at known_at and recording the keys in
+    etl_deleted_fact for the batch (run inside the writer's transaction).
+    Drops the staging table. Returns the number of facts deleted.
+    """
+    conn.execute(RETIRE_CLOSE_SQL, {"known_at": known_at})
+    if batch_id is not None:
+        conn.execute(RETIRE_RECORD_SQL, {"batch": batch_id})
+    cursor = conn.execute(RETIRE_DELETE_SQL)
+    conn.execute("DROP TABLE IF EXISTS temp._retired_facts")
+    return max(cursor.rowcount, 0)
+
+
+def backfill_versions(conn):
+    """
+    Open a version for every fact that has none yet (facts loaded before
+    versioning, once they have a known_from), one primary-key slice of
+    fact_financials per transaction. Safe to re-run. Returns versions added.
+    """
+    added = 0
+    for condition, bounds in key_ranges(conn, "fact_financials"):
+        with conn:
+            cursor = conn.execute(
+                f"""INSERT INTO fact_financials_history ({", ".join(HISTORY_COLUMNS)})
+                    SELECT company_id, scenario_id, period_id, line_item_id, known_from, NULL, amount, source,
+                           load_batch_id
+                    FROM fact_financials WHERE known_from IS NOT NULL AND {condition}
+                    ON CONFLICT(company_id, scenario_id, period_id, line_item_id, known_from) DO NOTHING""",
+                bounds,
+            )
+        added += max(cursor.rowcount, 0)
+    return added
@@ -0,0 +1,253 @@
+"""
+Ticker ↔ CIK Resolution Index
+=============================
+Local index over SEC's company_tickers.json mapping, so extraction can
+resolve any ticker to its CIK (and back) without hard-coded constants.
+
+- Built and refreshed with `python cik_index.py` (one SEC request).
+- Stored in data/reference/sec_tickers.sqlite together with a history of
+  every (ticker, CIK) pair and the snapshot dates it was seen, so renamed
+  or re-used tickers still resolve to the right issuer.
+- Loaded lazily: nothing is read until the first lookup, and then only
+  a ticker → CIK and a CIK → ticker dict (CIKs as ints). Company names
+  for fuzzy search are loaded on the first search only.
+
+Usage:
+    from cik_index import resolve_cik, ticker_for_cik, search_companies
+    resolve_cik("PYPL")                 # "0001633917"
+    ticker_for_cik(1633917)             # "PYPL"
+    search_companies("paypal holdings")  # [("PYPL", "0001633917", "PayPal Holdings, Inc."), ...]
+"""
+
+import difflib
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_PATH = os.path.join(BASE_DIR, "data", "reference", "sec_tickers.sqlite")
+COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+SEC_HEADERS = {"User-Agent": "InvestmentAnalysis carlos@example.com"}
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS company_ticker (
+    ticker      TEXT PRIMARY KEY,
+    cik         INTEGER NOT NULL,
+    title       TEXT NOT NULL,
+    listing_rank INTEGER NOT NULL          -- position in SEC's file; lowest = primary ticker
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_company_ticker_cik ON company_ticker(cik, listing_rank);
+
+CREATE TABLE IF NOT EXISTS ticker_history (
+    ticker      TEXT NOT NULL,
+    cik         INTEGER NOT NULL,
+    first_seen  TEXT NOT NULL,            -- snapshot date the pair first appeared
+    last_seen   TEXT NOT NULL,            -- latest snapshot date that still had it
+    PRIMARY KEY (ticker, cik)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ticker_history_cik ON ticker_history(cik);
+
+CREATE TABLE IF NOT EXISTS index_meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT
+) WITHOUT ROWID;
+"""
+
+
+def format_cik(cik):
+    """Zero-pad a CIK to the 10 digits SEC URLs expect."""
+    return f"{int(cik):010d}"
+
+
+def normalize_ticker(ticker):
+    """SEC uses '-' for share classes (BRK-B); yfinance accepts the same form."""
+    return ticker.strip().upper().replace(".", "-")
+
+
+def _normalize_name(name):
+    name = re.sub(r"[^a-z0-9 ]", " ", name.lower())
+    name = re.sub(r"\b(inc|corp|corporation|co|ltd|plc|holdings?|group|the)\b", " ", name)
+    return " ".join(name.split())
+
+
+# =============================================================================
+# BUILD / REFRESH
+# =============================================================================
+def fetch_company_tickers():
+    """Download SEC's ticker mapping: {"0": {"cik_str": ..., "ticker": ..., "title": ...}, ...}."""
+    response = requests.get(COMPANY_TICKERS_URL, headers=SEC_HEADERS, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def build_index(mapping, as_of=None, index_path=INDEX_PATH):
+    """
+    Replace the current ticker table with `mapping` (SEC JSON format) and
+    extend the ticker history. Returns (tickers, companies, history rows).
+    """
+    as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+
+    rows = []
+    seen = set()
+    for rank, entry in enumerate(mapping.values()):
+        ticker = normalize_ticker(entry["ticker"])
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        rows.append((ticker, int(entry["cik_str"]), entry["title"], rank))
+
+    conn = sqlite3.connect(index_path)
+    with conn:
+        conn.executescript(INDEX_SCHEMA)
+        conn.execute("DELETE FROM company_ticker")
+        conn.executemany(
+            "INSERT INTO company_ticker (ticker, cik, title, listing_rank) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.executemany(
+            """INSERT INTO ticker_history (ticker, cik, first_seen, last_seen) VALUES (?, ?, ?, ?)
+               ON CONFLICT(ticker, cik) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)""",
+            [(ticker, cik, as_of, as_of) for ticker, cik, _, _ in rows],
+        )
+        conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('snapshot_date', ?)", (as_of,))
+    counts = (
+        len(rows),
+        conn.execute("SELECT COUNT(DISTINCT cik) FROM company_ticker").fetchone()[0],
+        conn.execute("SELECT COUNT(*) FROM ticker_history").fetchone()[0],
+    )
+    conn.close()
+    _default_index.reset()
+    return counts
+
+
+# =============================================================================
+# LOOKUP
+# =============================================================================
+class CikIndex:
+    """Lazily loaded, read-only view over the persisted index."""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.index_path = index_path
+        self.reset()
+
+    def reset(self):
+        self._by_ticker = None
+        self._by_cik = None
+        self._names = None
+
+    def _connect(self):
+        if not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"{self.index_path} not found — run `python cik_index.py` to build it")
+        return sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+
+    def _load(self):
+        conn = self._connect()
+        by_ticker, by_cik = {}, {}
+        # Ordered by rank so the first ticker seen for a CIK is its primary listing
+        for ticker, cik in conn.execute("SELECT ticker, cik FROM company_ticker ORDER BY listing_rank"):
+            ticker = sys.intern(ticker)
+            by_ticker[ticker] = cik
+            by_cik.setdefault(cik, ticker)
+        conn.close()
+        self._by_ticker, self._by_cik = by_ticker, by_cik
+
+    def cik(self, ticker, include_history=True):
+        """CIK (int) for a ticker, falling back to historical tickers; None if unknown."""
+        if self._by_ticker is None:
+            self._load()
+        ticker = normalize_ticker(ticker)
+        cik = self._by_ticker.get(ticker)
+        if cik is None and include_history:
+            cik = self.historical_cik(ticker)
+        return cik
+
+    def ticker(self, cik):
+        """Primary current ticker for a CIK, or None."""
+        if self._by_cik is None:
+            self._load()
+        return self._by_cik.get(int(cik))
+
+    def historical_cik(self, ticker, as_of=None):
+        """CIK that used `ticker` most recently (on or before `as_of`)."""
+        conn = self._connect()
+        row = conn.execute(
+            """SELECT cik FROM ticker_history
+               WHERE ticker = ? AND first_seen <= ?
+               ORDER BY last_seen DESC LIMIT 1""",
+            (normalize_ticker(ticker), as_of or "9999-12-31"),
+        ).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def ticker_history(self, cik):
+        """[(ticker, first_seen, last_seen), ...] for a CIK, oldest first."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT ticker, first_seen, last_seen FROM ticker_history WHERE cik = ? ORDER BY first_seen",
+            (int(cik),),
+        ).fetchall()
+        conn.close()
+        return rows
+
+    def search(self, query, limit=10, cutoff=0.6):
+        """Fuzzy company-name search: [(ticker, cik, title), ...], best match first."""
+        if self._names is None:
+            conn = self._connect()
+            names = {}
+            for ticker, cik, title in conn.execute(
+                "SELECT ticker, cik, title FROM company_ticker ORDER BY listing_rank"
+            ):
+                names.setdefault(_normalize_name(title), (ticker, cik, title))
+            conn.close()
+            self._names = names
+
+        wanted = _normalize_name(query)
+        keys = [k for k in self._names if k.startswith(wanted)] if wanted else []
+        keys += [k for k in difflib.get_close_matches(wanted, self._names.keys(), n=limit, cutoff=cutoff)
+                 if k not in keys]
+        return [
+            (ticker, format_cik(cik), title)
+            for ticker, cik, title in (self._names[k] for k in keys[:limit])
+        ]
+
+
+_default_index = CikIndex()
+
+
+def resolve_cik(ticker, default=None):
+    """Zero-padded CIK for a ticker, or `default` when the index is missing or has no match."""
+    try:
+        cik = _default_index.cik(ticker)
+    except FileNotFoundError:
+        cik = None
+    return format_cik(cik) if cik is not None else default
+
+
+def ticker_for_cik(cik):
+    return _default_index.ticker(cik)
+
+
+def search_companies(query, limit=10):
+    return _default_index.search(query, limit)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    print(f"\n{'='*60}")
+    print(f"  REFRESHING SEC TICKER ↔ CIK INDEX")
+    print(f"{'='*60}\n")
+
+    mapping = fetch_company_tickers()
+    tickers, companies, history = build_index(mapping)
+    print(f"  ✓ {tickers:,} tickers for {companies:,} companies → {INDEX_PATH}")
+    print(f"  ✓ Ticker history: {history:,} (ticker, CIK) pairs tracked")
+
+
+if __name__ == "__main__":
+    main()
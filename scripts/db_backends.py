@@ -0,0 +1,340 @@
+"""
+Database Backends
+=================
+The star schema in sql/schema.sql can live in either of two engines:
+
+    sqlite   one file, row storage, no extra packages (default)
+    duckdb   columnar storage for scan-heavy analytics, e.g. screening
+             ratios across every company and year (optional: pip install duckdb)
+
+`connect(path, backend)` returns a connection with the sqlite3 surface the
+02 loader and materialize.py already use (execute / executemany /
+executescript, cursor(), rowcount, lastrowid, `with conn:` transactions),
+so the same loader code writes to both. For DuckDB, statements are
+translated on the way in:
+
+    INTEGER / REAL                    → BIGINT / DOUBLE (SQLite's 64-bit widths)
+    INTEGER PRIMARY KEY AUTOINCREMENT → BIGINT PRIMARY KEY DEFAULT nextval(sequence)
+    WITHOUT ROWID, REFERENCES ...     → dropped (tables are columnar; SQLite
+                                        doesn't enforce foreign keys here either)
+    CREATE INDEX                      → skipped: DuckDB prunes scans with
+                                        per-row-group min/max, and ART indexes
+                                        only slow the load down
+    a IS NOT b                        → a IS DISTINCT FROM b
+    date(2440587.5 + day)             → DATE '1970-01-01' + day   (day numbers,
+    julianday(d)                      → julian(d) - 0.5            see DAY NUMBERS)
+    :name parameters                  → $name
+    executemany(... VALUES (?, ...))  → one INSERT ... SELECT over a DataFrame
+
+Views, seeds and every query the loader and reports issue run unchanged.
+
+Usage:
+    from db_backends import connect, read_sql
+    conn = connect("data/paypal_analysis.duckdb", "duckdb")
+    frame = read_sql(conn, "SELECT * FROM vw_ratios WHERE ticker = ?", ["PYPL"])
+    for rows in iter_rows(conn, "SELECT * FROM fact_stock_price", size=50_000): ...
+"""
+
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # SQLite remains the default backend
+    duckdb = None
+
+BACKENDS = ("sqlite", "duckdb")
+FILE_SUFFIX = {"sqlite": ".db", "duckdb": ".duckdb"}
+
+
+def connect(path, backend="sqlite", read_only=False):
+    """
+    Open (or create) a database file with the given backend. Read-only
+    connections require the file to exist and may be handed between
+    threads (one user at a time, see query_api.py).
+    """
+    if backend == "sqlite":
+        if read_only:
+            return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        return sqlite3.connect(path)
+    if backend != "duckdb":
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if duckdb is None:
+        raise RuntimeError("The duckdb backend needs the duckdb package: pip install duckdb")
+    return DuckDBConnection(duckdb.connect(path, read_only=read_only))
+
+
+def backend_name(conn):
+    return "duckdb" if isinstance(conn, DuckDBConnection) else "sqlite"
+
+
+def read_sql(conn, sql, params=()):
+    """Query result as a DataFrame on either backend."""
+    if isinstance(conn, DuckDBConnection):
+        return conn.raw.execute(translate_sql(sql), _params(sql, params)).df()
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def iter_rows(conn, sql, params=(), size=10_000):
+    """
+    Query result in lists of at most `size` row tuples, fetched from the
+    cursor as they are consumed, so the whole result is never in memory.
+    """
+    if isinstance(conn, DuckDBConnection):
+        cursor = conn.raw.execute(translate_sql(sql), _params(sql, params))
+    else:
+        cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+# =============================================================================
+# DAY NUMBERS
+# =============================================================================
+# fact_stock_bar stores dates as integer days since 1970-01-01. In SQL (both
+# backends): date(2440587.5 + day) and CAST(julianday(d) - 2440587.5 AS INTEGER).
+def day_number(day):
+    """Day number of a date, timestamp or 'YYYY-MM-DD...' text."""
+    return int(np.datetime64(str(day)[:10], "D").astype(np.int64))
+
+
+def day_dates(days):
+    """YYYY-MM-DD text for a sequence of day numbers."""
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype(str)
+
+
+# =============================================================================
+# SQL TRANSLATION (SQLite dialect → DuckDB)
+# =============================================================================
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+COMMENT = re.compile(r"('(?:[^']|'')*')|--[^\n]*")
+AUTOINCREMENT = re.compile(r"\bINTEGER\s+PRIMARY\s+KEY\s+AUTOINCREMENT\b", re.I)
+CREATE_TABLE = re.compile(r"^\s*CREATE\s+(?:TEMP\w*\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I)
+CREATE_INDEX = re.compile(r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\b", re.I)
+INSERT_INTO = re.compile(r"^\s*(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO\s+(\w+)", re.I)
+INSERT_OR_IGNORE = re.compile(r"^\s*INSERT\s+OR\s+IGNORE\b", re.I)
+DML = re.compile(r"^\s*(?:INSERT|REPLACE|UPDATE|DELETE)\b", re.I)
+PRAGMA_TABLE_INFO = re.compile(r"^\s*PRAGMA\s+table_info\b", re.I)
+INSERT_COLUMNS = re.compile(r"\bINTO\s+\w+\s*\(([^)]*)\)\s*VALUES\b", re.I)
+ON_CONFLICT = re.compile(r"\bON\s+CONFLICT\s*\(([^)]*)\)", re.I)
+VALUES_PLACEHOLDERS = re.compile(r"\bVALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+TRANSLATIONS = [
+    (re.compile(r"\bdate\(\s*2440587\.5\s*\+\s*([\w.]+)\s*\)", re.I), r"(DATE '1970-01-01' + CAST(\1 AS INT4))"),
+    (re.compile(r"\bjulianday\(\s*([\w.]+)\s*\)", re.I), r"(julian(CAST(\1 AS DATE)) - 0.5)"),
+    (re.compile(r"\bWITHOUT\s+ROWID\b", re.I), ""),
+    (re.compile(r"\s*\bREFERENCES\s+\w+\s*\(\s*\w+\s*\)", re.I), ""),
+    (re.compile(r"\bINTEGER\b", re.I), "BIGINT"),
+    (re.compile(r"\bREAL\b", re.I), "DOUBLE"),
+    (re.compile(r"\bIS\s+NOT\s+(?!NULL\b|DISTINCT\b|TRUE\b|FALSE\b)", re.I), "IS DISTINCT FROM "),
+]
+
+
+def _outside_strings(sql, fn):
+    """Apply fn to every part of sql that is not inside a '...' literal."""
+    parts = STRING_LITERAL.split(sql)
+    return "".join(part if i % 2 else fn(part) for i, part in enumerate(parts))
+
+
+def _params(sql, params):
+    return params if isinstance(params, dict) else list(params)
+
+
+def split_statements(script):
+    """Split a SQL script on top-level semicolons, with comments removed."""
+    script = COMMENT.sub(lambda m: m.group(1) or "", script)
+    statements, current = [], []
+    for i, part in enumerate(STRING_LITERAL.split(script)):
+        if i % 2:
+            current.append(part)
+            continue
+        pieces = part.split(";")
+        for piece in pieces[:-1]:
+            current.append(piece)
+            statements.append("".join(current).strip())
+            current = []
+        current.append(pieces[-1])
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def translate_sql(sql):
+    """One SQLite statement in DuckDB's dialect (see the module docstring)."""
+    table = CREATE_TABLE.match(sql)
+    prefix = ""
+    if table and AUTOINCREMENT.search(sql):
+        sequence = f"seq_{table.group(1)}"
+        prefix = f"CREATE SEQUENCE IF NOT EXISTS {sequence}; "
+        sql = AUTOINCREMENT.sub(f"BIGINT PRIMARY KEY DEFAULT nextval('{sequence}')", sql)
+
+    def rewrite(part):
+        for pattern, replacement in TRANSLATIONS:
+            part = pattern.sub(replacement, part)
+        return re.sub(r"(?<![:\w]):(\w+)", r"$\1", part)
+
+    return prefix + _outside_strings(sql, rewrite)
+
+
+# =============================================================================
+# DUCKDB CONNECTION (sqlite3-compatible surface)
+# =============================================================================
+class DuckDBCursor:
+    """Result of one statement: rows are fetched eagerly, like sqlite3 does for DML."""
+
+    def __init__(self, conn):
+        self.connection = conn
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.rowcount, self.lastrowid, self.description = -1, None, None
+        if CREATE_INDEX.match(sql):
+            self._rows = []
+            return self
+        if PRAGMA_TABLE_INFO.match(sql):
+            try:
+                self._rows = self.connection.raw.execute(sql).fetchall()
+            except duckdb.CatalogException:         # sqlite3 returns no rows for a missing table
+                self._rows = []
+            return self
+
+        result = self.connection.raw.execute(translate_sql(sql), _params(sql, params))
+        self.description = result.description
+        self._rows = result.fetchall()
+        if DML.match(sql) and "RETURNING" not in sql.upper():
+            self.rowcount = self._rows[0][0] if self._rows else 0
+            self._rows = []
+            target = INSERT_INTO.match(sql)
+            if target and self.rowcount:
+                self.lastrowid = self.connection.last_id(target.group(1))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        """INSERT ... VALUES (?, ...) runs once over all rows as INSERT ... SELECT from a DataFrame."""
+        rows = list(seq_of_params)
+        placeholders = VALUES_PLACEHOLDERS.search(sql)
+        # A multi-row INSERT OR IGNORE in DuckDB treats NULLs in a UNIQUE key
+        # (dim_period's quarter) as duplicates of each other; dimension rows go one by one
+        if placeholders is None or INSERT_OR_IGNORE.match(sql):
+            total = 0
+            for params in rows:
+                total += max(self.execute(sql, params).rowcount, 0)
+            self.rowcount = total
+            return self
+        if not rows:
+            self.rowcount = 0
+            return self
+        columns = INSERT_COLUMNS.search(sql)
+        columns = [c.strip() for c in columns.group(1).split(",")] if columns else []
+        if len(columns) != len(rows[0]):
+            columns = [f"p{i}" for i in range(len(rows[0]))]
+        frame = pd.DataFrame.from_records(rows, columns=columns)
+        # sqlite3 applies the rows one by one, so for a repeated key the last row wins
+        conflict = ON_CONFLICT.search(sql)
+        if conflict:
+            frame = frame.drop_duplicates([c.strip() for c in conflict.group(1).split(",")], keep="last")
+        self.connection.raw.register("_executemany_rows", frame)
+        try:
+            self.execute(sql[:placeholders.start()] + "SELECT * FROM _executemany_rows" + sql[placeholders.end():])
+        finally:
+            self.connection.raw.unregister("_executemany_rows")
+        return self
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+
+
+class DuckDBConnection:
+    """
+    A DuckDB connection behind the sqlite3.Connection methods the loader
+    uses. `with conn:` is one transaction (nested blocks join the outer
+    one); outside of it every statement autocommits.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._depth = 0
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def execute(self, sql, params=()):
+        return DuckDBCursor(self).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return DuckDBCursor(self).executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        for statement in split_statements(script):
+            self.execute(statement)
+        self.sync_sequences()
+
+    def last_id(self, table):
+        """Key the last insert into an AUTOINCREMENT table got (sqlite3's lastrowid)."""
+        try:
+            return self.raw.execute(f"SELECT currval('seq_{table}')").fetchone()[0]
+        except duckdb.Error:                          # not a sequence-keyed table
+            return None
+
+    def sync_sequences(self):
+        """
+        Move each AUTOINCREMENT sequence past the largest key already in its
+        table, so seed rows inserted with explicit ids don't collide later.
+        """
+        keyed = self.raw.execute(
+            """SELECT table_name, column_name, regexp_extract(column_default, 'nextval\\(''(\\w+)''\\)', 1)
+               FROM duckdb_columns() WHERE column_default LIKE 'nextval(%'"""
+        ).fetchall()
+        for table, column, sequence in keyed:
+            stored = self.raw.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}").fetchone()[0]
+            issued = self.raw.execute(
+                "SELECT last_value FROM duckdb_sequences() WHERE sequence_name = ?", (sequence,)
+            ).fetchone()[0]
+            if stored > (issued or 0):
+                self.raw.execute(f"SELECT MAX(nextval('{sequence}')) FROM range(?)", (stored - (issued or 0),))
+
+    def commit(self):
+        """Statements outside `with conn:` have already autocommitted."""
+
+    def rollback(self):
+        if self._depth:
+            self.raw.rollback()
+
+    def __enter__(self):
+        if self._depth == 0:
+            self.raw.begin()
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
+            if exc_type is None:
+                self.raw.commit()
+            else:
+                self.raw.rollback()
+        return False
+
+    def close(self):
+        self.raw.close()
@@ -0,0 +1,110 @@
+"""
+Stage Hand-off Files (Arrow IPC)
+================================
+When the pipeline runs one process per stage (01 → 01b → 01c → 02), each
+stage used to re-parse the CSVs the previous one wrote. This module adds a
+binary hand-off next to the CSVs: uncompressed Arrow IPC files under
+data/handoff/ that downstream stages memory-map instead of parsing.
+
+- Float columns are written with NaN kept as a value (no validity bitmap),
+  so they convert to NumPy without a copy.
+- Readers map the file read-only; every process reading the same hand-off
+  shares one copy through the OS page cache.
+- CSVs remain the source of truth. A hand-off is only used when it is at
+  least as new as its CSV, so a stage that only rewrites the CSV (or an
+  install without pyarrow) falls back to parsing.
+
+Requires pyarrow; without it every function degrades to the CSV path.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # hand-off is an optimization, CSV still works
+    pa = None
+
+HANDOFF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "handoff")
+INDEX_METADATA_KEY = b"handoff.index"
+
+
+def handoff_path(name):
+    return os.path.join(HANDOFF_DIR, f"{name}.arrow")
+
+
+def _column_to_arrow(series):
+    """Keep float NaN as data so the column maps back to NumPy zero-copy."""
+    if series.dtype.kind == "f":
+        return pa.array(series.to_numpy(), from_pandas=False)
+    return pa.array(series, from_pandas=True)
+
+
+def write_frame(df, name):
+    """
+    Write `df` (index included) as an Arrow IPC file. The file is written
+    to a temporary name and renamed, so readers never map a partial file.
+    Returns the path, or None when pyarrow is not installed.
+    """
+    if pa is None:
+        return None
+    os.makedirs(HANDOFF_DIR, exist_ok=True)
+
+    index_names = [n if n is not None else f"__index_level_{i}__" for i, n in enumerate(df.index.names)]
+    flat = df.copy(deep=False)
+    flat.index.names = index_names
+    flat = flat.reset_index()
+    flat.columns = [str(c) for c in flat.columns]
+
+    table = pa.table({col: _column_to_arrow(flat[col]) for col in flat.columns})
+    table = table.replace_schema_metadata({
+        INDEX_METADATA_KEY: json.dumps({"names": index_names, "original": list(df.index.names)}).encode(),
+    })
+
+    path = handoff_path(name)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(name):
+    """Memory-map a hand-off file and return the Arrow table (no copy, no parse)."""
+    source = pa.memory_map(handoff_path(name), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def frame_from_table(table):
+    """Convert a mapped hand-off table to a DataFrame, restoring the original index."""
+    meta = json.loads(table.schema.metadata[INDEX_METADATA_KEY])
+    # split_blocks avoids consolidating columns into a single (copied) 2-D block
+    df = table.to_pandas(split_blocks=True)
+    df = df.set_index(meta["names"])
+    df.index.names = meta["original"]
+    return df
+
+
+def read_frame(name):
+    """Map a hand-off file as a DataFrame."""
+    return frame_from_table(read_table(name))
+
+
+def is_fresh(name, csv_path):
+    """True when a hand-off exists and is not older than the CSV it mirrors."""
+    path = handoff_path(name)
+    if pa is None or not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def load_frame(name, csv_path, **read_csv_kwargs):
+    """Read a stage output: the mapped hand-off if fresh, else the CSV."""
+    if is_fresh(name, csv_path):
+        return read_frame(name)
+    return pd.read_csv(csv_path, **read_csv_kwargs)
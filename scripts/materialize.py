@@ -0,0 +1,151 @@
+"""
+Materialized Wide Statement Tables
+==================================
+Pivoted copies of the star schema for dashboards and exports: one row per
+(company, scenario, period) and one column per line item or ratio, with
+the ticker, period and scenario labels denormalized in. A dashboard query
+becomes a range scan over a single table instead of a four-way join plus
+ORDER BY.
+
+    mv_income_statement   mv_balance_sheet   mv_cash_flow   mv_ratios
+
+Columns are generated from dim_line_item / dim_ratio ("Total Revenue" →
+total_revenue). If those dimensions change, the affected table is dropped
+and rebuilt in full. Otherwise `refresh_materialized(conn, batch_id)` only
+recomputes the (company, scenario, period) keys that have facts written by
+that load batch (see load_batch_id in schema.sql) or facts it deleted
+(etl_deleted_fact); a key left without facts loses its row.
+
+Usage:
+    from materialize import refresh_materialized
+    refresh_materialized(conn, batch_id)     # keys touched by one load
+    refresh_materialized(conn)               # everything
+"""
+
+import re
+
+# table → (fact table, value column, dimension table, dimension key, name column, filter on the dimension)
+MATERIALIZED_TABLES = {
+    "mv_income_statement": ("fact_financials", "amount", "dim_line_item", "line_item_id", "item_name",
+                            "statement_type = 'income_statement'"),
+    "mv_balance_sheet": ("fact_financials", "amount", "dim_line_item", "line_item_id", "item_name",
+                         "statement_type = 'balance_sheet'"),
+    "mv_cash_flow": ("fact_financials", "amount", "dim_line_item", "line_item_id", "item_name",
+                     "statement_type = 'cash_flow'"),
+    "mv_ratios": ("fact_ratios", "value", "dim_ratio", "ratio_id", "ratio_name", "1 = 1"),
+}
+KEY_COLUMNS = ["company_id", "scenario_id", "period_id"]
+LABEL_COLUMNS = ["ticker", "fiscal_year", "period_label", "period_type", "scenario_name"]
+
+
+def column_name(label):
+    """SQL column for a line item or ratio name: "Cash & Cash Equivalents" → cash_cash_equivalents."""
+    name = re.sub(r"[^0-9a-z]+", "_", label.lower()).strip("_")
+    return f"c_{name}" if name[:1].isdigit() else name
+
+
+def _members(conn, table):
+    """[(dimension key, column name), ...] for one materialized table, in display order."""
+    _, _, dim_table, dim_key, name_col, where = MATERIALIZED_TABLES[table]
+    rows = conn.execute(f"SELECT {dim_key}, {name_col} FROM {dim_table} WHERE {where} ORDER BY {dim_key}").fetchall()
+    members, seen = [], set()
+    for key, label in rows:
+        col = column_name(label)
+        while col in seen:
+            col += "_"
+        seen.add(col)
+        members.append((key, col))
+    return members
+
+
+def ensure_materialized_table(conn, table):
+    """
+    Create the table, or re-create it when its columns no longer match the
+    dimension. Returns True if it was (re)created and needs a full refresh.
+    """
+    members = _members(conn, table)
+    expected = [*KEY_COLUMNS, *LABEL_COLUMNS, *(col for _, col in members), "refreshed_batch_id"]
+    current = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if current == expected:
+        return False
+
+    value_columns = "".join(f"    {col} REAL,\n" for _, col in members)
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(f"""CREATE TABLE {table} (
+    company_id INTEGER NOT NULL,
+    scenario_id INTEGER NOT NULL,
+    period_id INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    fiscal_year INTEGER NOT NULL,
+    period_label TEXT,
+    period_type TEXT,
+    scenario_name TEXT,
+{value_columns}    refreshed_batch_id INTEGER,
+    PRIMARY KEY (company_id, scenario_id, period_id)
+) WITHOUT ROWID""")
+    conn.execute(f"CREATE INDEX idx_{table}_ticker ON {table}(ticker, scenario_name, fiscal_year)")
+    conn.execute(f"CREATE INDEX idx_{table}_year ON {table}(scenario_name, fiscal_year)")
+    return True
+
+
+def _refresh_table(conn, table, batch_id, full):
+    fact_table, value_col, _, dim_key, _, _ = MATERIALIZED_TABLES[table]
+    members = _members(conn, table)
+    pivot = ",\n       ".join(f"MAX(CASE WHEN f.{dim_key} = {key} THEN f.{value_col} END)" for key, _ in members)
+    member_keys = ", ".join(str(key) for key, _ in members)
+    columns = ", ".join([*KEY_COLUMNS, *LABEL_COLUMNS, *(col for _, col in members), "refreshed_batch_id"])
+    touched = "" if full else (
+        "JOIN _mv_touched t ON t.company_id = f.company_id "
+        "AND t.scenario_id = f.scenario_id AND t.period_id = f.period_id"
+    )
+
+    if full:
+        conn.execute(f"DELETE FROM {table}")
+    else:
+        conn.execute(f"""DELETE FROM {table} WHERE EXISTS (
+                             SELECT 1 FROM _mv_touched t
+                             WHERE t.company_id = {table}.company_id AND t.scenario_id = {table}.scenario_id
+                               AND t.period_id = {table}.period_id)""")
+    cursor = conn.execute(
+        f"""INSERT INTO {table} ({columns})
+            SELECT f.company_id, f.scenario_id, f.period_id,
+                   dc.ticker, dp.fiscal_year, dp.period_label, dp.period_type, ds.scenario_name,
+                   {pivot},
+                   ?
+            FROM {fact_table} f
+            {touched}
+            JOIN dim_company dc ON f.company_id = dc.company_id
+            JOIN dim_period dp ON f.period_id = dp.period_id
+            JOIN dim_scenario ds ON f.scenario_id = ds.scenario_id
+            WHERE f.{dim_key} IN ({member_keys})
+            GROUP BY f.company_id, f.scenario_id, f.period_id,
+                     dc.ticker, dp.fiscal_year, dp.period_label, dp.period_type, ds.scenario_name""",
+        (batch_id,),
+    )
+    return max(cursor.rowcount, 0)
+
+
+def refresh_materialized(conn, batch_id=None):
+    """
+    Bring every mv_* table up to date in one transaction. With a batch id,
+    only (company, scenario, period) keys that batch wrote or deleted are
+    recomputed; tables that had to be (re)created are always rebuilt in
+    full. Returns {table: rows refreshed}.
+    """
+    refreshed = {}
+    with conn:
+        if batch_id is not None:
+            conn.execute("DROP TABLE IF EXISTS temp._mv_touched")
+            conn.execute("""CREATE TEMP TABLE _mv_touched AS
+                            SELECT company_id, scenario_id, period_id FROM fact_financials WHERE load_batch_id = :b
+                            UNION
+                            SELECT company_id, scenario_id, period_id FROM fact_ratios WHERE load_batch_id = :b
+                            UNION
+                            SELECT company_id, scenario_id, period_id FROM etl_deleted_fact
+                            WHERE batch_id = :b AND fact_table IN ('fact_financials', 'fact_ratios')""",
+                         {"b": batch_id})
+        for table in MATERIALIZED_TABLES:
+            created = ensure_materialized_table(conn, table)
+            refreshed[table] = _refresh_table(conn, table, batch_id, full=created or batch_id is None)
+        conn.execute("DROP TABLE IF EXISTS temp._mv_touched")
+    return refreshed
@@ -0,0 +1,199 @@
+"""
+Schema Migrations
+=================
+Upgrades an existing database in place instead of deleting it and
+reloading from CSV. sql/schema.sql always describes the current schema
+and is idempotent, so new tables, views, seeds and indexes on new tables
+only need to be added there. Changes CREATE ... IF NOT EXISTS cannot
+express, such as new columns, table rebuilds or backfills, become a
+numbered migration:
+
+    (version, description, before, after)
+
+    before(conn)   runs before schema.sql is applied: ALTERs and set-asides
+                   that schema.sql's indexes depend on
+    after(conn)    runs once schema.sql has created every table: copies,
+                   backfills, index builds
+
+Applied versions are recorded in schema_version. A new database gets
+schema.sql and every version stamped without running anything. Each
+step is written to be safe to repeat: a migration interrupted halfway is
+simply run again on the next start, and a database that predates
+schema_version just runs the whole list.
+
+Helpers keep large migrations online:
+
+- backfill() updates a table in BACKFILL_ROWS slices of its primary key,
+  one short transaction per slice. Readers (WAL) and other writers get in
+  between slices, and after a restart the finished slices match nothing
+  and cost only their scan.
+- deferred_indexes() drops a table's secondary indexes around a table
+  rebuild (one copy transaction either way) and builds them back one per
+  transaction (build_index), far cheaper than maintaining them row by
+  row. Sliced backfills keep their indexes, so no step holds the lock for
+  longer than a slice.
+
+On DuckDB a backfill is one statement (columnar UPDATEs are cheap and the
+file has one writer) and there are no secondary indexes to defer.
+
+Usage:
+    from migrations import migrate
+    applied = migrate(conn, SCHEMA_PATH, MIGRATIONS)   # [(version, description, seconds), ...]
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from db_backends import backend_name
+
+BACKFILL_ROWS = 20_000              # rows per slice: ~0.2s of write lock with a covering index
+
+VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version         INTEGER PRIMARY KEY,
+        description     TEXT NOT NULL,
+        applied_at      TEXT NOT NULL,
+        seconds         REAL                                  -- NULL when stamped on a new database
+    )"""
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+def applied_versions(conn):
+    conn.execute(VERSION_TABLE_SQL)
+    conn.commit()
+    return {version for (version,) in conn.execute("SELECT version FROM schema_version")}
+
+
+def _record(conn, version, description, seconds):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO schema_version (version, description, applied_at, seconds) VALUES (?, ?, ?, ?)",
+            (version, description, datetime.now().isoformat(timespec="seconds"), seconds),
+        )
+
+
+def migrate(conn, schema_path, migrations):
+    """
+    Bring the database to the current schema: pending migrations' before
+    steps, schema.sql, then their after steps, each version recorded once
+    its after step is done. Returns [(version, description, seconds)] for
+    the migrations run (empty for a new or up-to-date database).
+    """
+    applied = applied_versions(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    fresh = not tables - {"schema_version", "sqlite_sequence"}
+    pending = [] if fresh else [m for m in migrations if m[0] not in applied]
+
+    for version, description, before, after in pending:
+        if before:
+            before(conn)
+    with open(schema_path, "r") as f:
+        conn.executescript(f.read())
+    conn.commit()
+
+    done = []
+    for version, description, before, after in pending:
+        start = time.perf_counter()
+        if after:
+            after(conn)
+        seconds = time.perf_counter() - start
+        _record(conn, version, description, seconds)
+        done.append((version, description, seconds))
+    if fresh:
+        for version, description, _, _ in migrations:
+            _record(conn, version, description, None)
+    return done
+
+
+def current_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] if row else None
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+def add_column(conn, table, column, decl):
+    """ALTER in a column unless the table is missing or already has it. Returns True if added."""
+    present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if not present or column in present:
+        return False
+    with conn:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
+
+def key_columns(conn, table):
+    """Primary-key columns of a table, in key order."""
+    info = sorted((row for row in conn.execute(f"PRAGMA table_info({table})") if row[5]), key=lambda r: r[5])
+    return [row[1] for row in info]
+
+
+def key_ranges(conn, table, batch_rows=BACKFILL_ROWS):
+    """
+    Yield (condition, params) slices that cover `table` in primary-key
+    order, at most batch_rows rows each, as row-value bounds on the bare
+    key columns. Each upper bound is one keyset seek from the previous
+    one, so finding a slice costs a slice-length index walk however far
+    into the table it is. DuckDB gets the whole table as one slice.
+    """
+    if backend_name(conn) == "duckdb":
+        yield "1 = 1", []
+        return
+    keys = key_columns(conn, table)
+    row_key = f"({', '.join(keys)})"
+    holders = f"({', '.join('?' * len(keys))})"
+    lower = None
+    while True:
+        after = f"WHERE {row_key} > {holders}" if lower else ""
+        upper = conn.execute(
+            f"SELECT {', '.join(keys)} FROM {table} {after} ORDER BY {', '.join(keys)} LIMIT 1 OFFSET ?",
+            [*(lower or []), batch_rows - 1],
+        ).fetchone()
+        bounds = ([f"{row_key} > {holders}"] if lower else []) + ([f"{row_key} <= {holders}"] if upper else [])
+        yield " AND ".join(bounds) or "1 = 1", [*(lower or []), *(upper or [])]
+        if upper is None:
+            return
+        lower = list(upper)
+
+
+def backfill(conn, table, assignments, where="1 = 1", params=(), batch_rows=BACKFILL_ROWS):
+    """
+    UPDATE {table} SET {assignments} WHERE {where}, one key slice per
+    transaction. `params` bind the ?s of assignments and where, in that
+    order. Returns the number of rows updated.
+    """
+    updated = 0
+    for condition, bounds in key_ranges(conn, table, batch_rows):
+        with conn:
+            cursor = conn.execute(f"UPDATE {table} SET {assignments} WHERE ({where}) AND {condition}",
+                                  [*params, *bounds])
+        updated += max(cursor.rowcount, 0)
+    return updated
+
+
+def build_index(conn, create_sql):
+    """Build one index in its own transaction; returns seconds taken."""
+    start = time.perf_counter()
+    with conn:
+        conn.execute(create_sql)
+    return time.perf_counter() - start
+
+
+@contextmanager
+def deferred_indexes(conn, table):
+    """Drop `table`'s secondary indexes for the duration of the block, then build them back."""
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    ).fetchall()
+    with conn:
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+    try:
+        yield
+    finally:
+        for _, sql in indexes:
+            build_index(conn, sql)
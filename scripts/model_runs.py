@@ -0,0 +1,514 @@
+"""
+Model Run Persistence
+=====================
+Records each model or scenario run, its full driver set (growth, margins,
+capex, WACC, TGR, the EV-to-equity bridge) and its valuation outputs,
+in fact_assumptions / fact_valuation, so scenario cases, WACC x TGR
+grids and Monte Carlo draws can be compared in SQL instead of living
+only as literals in the Excel builders.
+
+- Runs are recorded in sets (model_run_set) and keyed by an integer
+  run_id, allocated in one contiguous block per set. Driver and metric
+  names are dictionary-encoded (dim_driver, dim_valuation_metric), so a
+  stored value costs a few bytes of integer key plus the REAL.
+- A set can name a base run. Its runs then store only the drivers that
+  differ from the base (a Monte Carlo draw around the Base Case keeps the
+  handful it perturbs) and inherit the rest; run_drivers() and
+  run_table() resolve the full set.
+- Rows are written with executemany in BATCH_ROWS chunks, in clustered
+  key order, inside one transaction per set.
+- value_runs() is the Scenarios tab's DCF (03f), vectorized over runs.
+  Where a run has no explicit free_cash_flow path, FCF is derived the way
+  the Cash Flow tab (03d) derives it: (EBIT + interest income - interest
+  expense) x (1 - tax) + D&A + SBC - capex - the working-capital build,
+  with receivables less payables scaling with revenue and the other
+  working capital (customer accounts less accruals) growing at its own
+  rate.
+
+02 keeps recorded runs on every load, full or incremental.
+
+Usage:
+    python model_runs.py                        # record the Bull / Base / Bear cases
+    python model_runs.py --grid                 # + WACC x TGR grid around the Base Case
+    python model_runs.py --monte-carlo 100000   # + 100k draws around the Base Case
+
+    from model_runs import run_table
+    run_table(conn, drivers=["wacc", "terminal_growth"], metrics=["implied_share_price"], run_set_id=3)
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cik_index import normalize_ticker
+from db_backends import BACKENDS, FILE_SUFFIX, connect, read_sql
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "data", "paypal_analysis.db")
+TICKER = "PYPL"
+FORECAST_YEARS = (2026, 2027, 2028)
+RUN_LEVEL = 0                       # period_id of drivers that apply to the whole run
+BATCH_ROWS = 50_000
+RUN_FACT_TABLES = ("fact_assumptions", "fact_valuation")
+
+# =============================================================================
+# SCENARIO DRIVER SETS
+# =============================================================================
+# The drivers the Excel builders write as literals: Base Case from the
+# Assumptions tab (03_build_excel_model.py) plus the interest income and
+# working-capital rules of the Income Statement / Balance Sheet tabs (03b /
+# 03c), so its derived FCF is the Cash Flow tab's; Bull / Bear from the
+# Scenarios tab (03f, which gives FCF paths directly and FY2028 / average
+# operating figures), bridge inputs from the FY2025 actuals in 03b / 03c.
+BRIDGE = {
+    "net_debt": 9987 - 8049,        # LT debt - cash, FY2025
+    "diluted_shares": 941,          # FY2025
+    "current_price": 40.42,         # Feb 9, 2026
+}
+
+SCENARIO_DRIVERS = {
+    "Base Case": {
+        "last_actual_revenue": 33172,
+        "revenue_growth": {2026: 0.030, 2027: 0.040, 2028: 0.050},
+        "gross_margin": {2026: 0.460, 2027: 0.462, 2028: 0.465},
+        "opex_pct_revenue": {2026: 0.280, 2027: 0.275, 2028: 0.270},
+        "operating_margin": {2026: 0.180, 2027: 0.187, 2028: 0.195},
+        "sbc_pct_revenue": {2026: 0.040, 2027: 0.039, 2028: 0.038},
+        "tax_rate": {2026: 0.175, 2027: 0.175, 2028: 0.175},
+        "interest_income": {2026: 380, 2027: 350, 2028: 330},
+        "interest_expense": {2026: 410, 2027: 420, 2028: 420},
+        "depreciation_amortization": {2026: 1300, 2027: 1320, 2028: 1340},
+        "capex": {2026: 900, 2027: 850, 2028: 800},
+        "revenue_linked_working_capital": 1909 - 40438,   # AR - AP, FY2025
+        "other_working_capital": 47428 - 6005,            # customer accounts - accrued, FY2025
+        "other_working_capital_growth": {2026: 0.030, 2027: 0.030, 2028: 0.030},
+        "long_term_debt": {2026: 9900, 2027: 9800, 2028: 9700},
+        "wacc": 0.099,
+        "terminal_growth": 0.015,
+        **BRIDGE,
+    },
+    "Bull Case": {
+        "last_actual_revenue": 33172,
+        "revenue_growth": {2026: 0.060, 2027: 0.060, 2028: 0.060},     # '26-'28 average
+        "operating_margin": {2028: 0.220},
+        "capex": {2026: 700, 2027: 700, 2028: 700},                   # average
+        "free_cash_flow": {2026: 6500, 2027: 7500, 2028: 8500},
+        "wacc": 0.085,
+        "terminal_growth": 0.025,
+        **BRIDGE,
+    },
+    "Bear Case": {
+        "last_actual_revenue": 33172,
+        "revenue_growth": {2026: 0.015, 2027: 0.015, 2028: 0.015},
+        "operating_margin": {2028: 0.155},
+        "capex": {2026: 950, 2027: 950, 2028: 950},
+        "free_cash_flow": {2026: 2500, 2027: 3000, 2028: 3500},
+        "wacc": 0.115,
+        "terminal_growth": 0.010,
+        **BRIDGE,
+    },
+}
+
+# 03e's DCF sensitivity table: offsets from the Base Case WACC / TGR
+GRID_WACC_OFFSETS = [-0.020, -0.010, -0.005, 0, 0.005, 0.010, 0.020]
+GRID_TGR_OFFSETS = [-0.010, -0.005, 0, 0.005, 0.010]
+
+
+# =============================================================================
+# DRIVER COLUMNS
+# =============================================================================
+def driver_columns(drivers, n_runs=1):
+    """
+    {name: value} driver spec → {(name, fiscal_year or None): array of n_runs}.
+    A value is a scalar or per-run array (run-level driver) or a
+    {fiscal_year: scalar or array} dict (one value per forecast year).
+    """
+    columns = {}
+    for name, value in drivers.items():
+        by_year = value.items() if isinstance(value, dict) else [(None, value)]
+        for year, v in by_year:
+            columns[(name, year)] = np.broadcast_to(np.asarray(v, dtype=float), (n_runs,))
+    return columns
+
+
+def value_runs(columns, n_runs, years=FORECAST_YEARS):
+    """DCF outputs {metric_name: array} for n_runs resolved driver columns (see module docstring)."""
+    def col(name, year=None):
+        return columns[(name, year)]
+
+    if all(("free_cash_flow", year) in columns for year in years):
+        fcf = np.column_stack([col("free_cash_flow", year) for year in years])
+    else:
+        revenue, flows = col("last_actual_revenue"), []
+        revenue_wc, other_wc = col("revenue_linked_working_capital"), col("other_working_capital")
+        for year in years:
+            growth = col("revenue_growth", year)
+            revenue = revenue * (1 + growth)
+            pretax = (revenue * col("operating_margin", year) + col("interest_income", year)
+                      - col("interest_expense", year))
+            wc_build = revenue_wc * growth + other_wc * col("other_working_capital_growth", year)
+            revenue_wc = revenue_wc * (1 + growth)
+            other_wc = other_wc * (1 + col("other_working_capital_growth", year))
+            flows.append(pretax * (1 - col("tax_rate", year)) + col("depreciation_amortization", year)
+                         + revenue * col("sbc_pct_revenue", year) - col("capex", year) - wc_build)
+        fcf = np.column_stack(flows)
+
+    wacc, growth = col("wacc"), col("terminal_growth")
+    discount = (1 + wacc)[:, None] ** np.arange(1, len(years) + 1)
+    pv_fcf = (fcf / discount).sum(axis=1)
+    terminal_value = fcf[:, -1] * (1 + growth) / (wacc - growth)
+    pv_terminal_value = terminal_value / discount[:, -1]
+    enterprise_value = pv_fcf + pv_terminal_value
+    equity_value = enterprise_value - col("net_debt")
+    price = equity_value / col("diluted_shares")
+    return {
+        "pv_fcf": pv_fcf,
+        "terminal_value": terminal_value,
+        "pv_terminal_value": pv_terminal_value,
+        "enterprise_value": enterprise_value,
+        "equity_value": equity_value,
+        "implied_share_price": price,
+        "upside": price / col("current_price") - 1,
+        "tv_pct_ev": pv_terminal_value / enterprise_value,
+    }
+
+
+# =============================================================================
+# WRITE
+# =============================================================================
+def _key_map(conn, sql, kind):
+    keys = dict(conn.execute(sql).fetchall())
+    if not keys:
+        raise RuntimeError(f"No {kind} rows — run `python 02_load_to_sql.py` to create the schema")
+    return keys
+
+
+def forecast_period_ids(conn, years):
+    """{fiscal_year: period_id} of annual periods, adding missing years as forecast periods."""
+    ids = {}
+    for year in years:
+        row = conn.execute(
+            "SELECT period_id FROM dim_period WHERE fiscal_year = ? AND quarter IS NULL ORDER BY period_id LIMIT 1",
+            (year,),
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO dim_period (fiscal_year, quarter, period_type, period_label) VALUES (?, NULL, 'forecast', ?)",
+                (year, f"FY{year}E"),
+            )
+            row = conn.execute(
+                "SELECT period_id FROM dim_period WHERE fiscal_year = ? AND quarter IS NULL", (year,)
+            ).fetchone()
+        ids[year] = row[0]
+    return ids
+
+
+def _stored_columns(conn, run_id):
+    """{(driver_name, fiscal_year or None): value} stored for one run (its own rows only)."""
+    rows = conn.execute(
+        """SELECT dd.driver_name, dp.fiscal_year, fa.value
+           FROM fact_assumptions fa
+           JOIN dim_driver dd ON fa.driver_id = dd.driver_id
+           LEFT JOIN dim_period dp ON fa.period_id = dp.period_id
+           WHERE fa.run_id = ?""",
+        (run_id,),
+    ).fetchall()
+    return {(name, year): value for name, year, value in rows}
+
+
+def _executemany_chunked(conn, sql, columns):
+    rows = list(zip(*[c.tolist() for c in columns]))
+    for start in range(0, len(rows), BATCH_ROWS):
+        conn.executemany(sql, rows[start:start + BATCH_ROWS])
+    return len(rows)
+
+
+def record_runs(conn, columns, outputs, n_runs, scenario="Base Case", kind="scenario", label=None,
+                base_run_id=None, company=TICKER):
+    """
+    Store n_runs runs as one model_run_set: `columns` from driver_columns()
+    (resolved, i.e. including inherited drivers), `outputs` from
+    value_runs(). With base_run_id, only values that differ from the base
+    run's are written. Returns the run_ids (contiguous).
+    """
+    with conn:
+        driver_ids = _key_map(conn, "SELECT driver_name, driver_id FROM dim_driver", "dim_driver")
+        metric_ids = _key_map(conn, "SELECT metric_name, metric_id FROM dim_valuation_metric", "dim_valuation_metric")
+        unknown = {name for name, _ in columns} - set(driver_ids) | set(outputs) - set(metric_ids)
+        if unknown:
+            raise ValueError(f"Unknown drivers / metrics: {', '.join(sorted(unknown))}")
+        company_id = conn.execute("SELECT company_id FROM dim_company WHERE ticker = ?",
+                                  (normalize_ticker(company),)).fetchone()
+        scenario_id = conn.execute("SELECT scenario_id FROM dim_scenario WHERE scenario_name = ?",
+                                   (scenario,)).fetchone()
+        if company_id is None or scenario_id is None:
+            raise ValueError(f"Unknown company {company!r} or scenario {scenario!r}")
+        periods = forecast_period_ids(conn, sorted({year for _, year in columns if year is not None}))
+        base = _stored_columns(conn, base_run_id) if base_run_id else {}
+
+        run_set_id = conn.execute(
+            "INSERT INTO model_run_set (run_kind, label, base_run_id, created_at, n_runs) VALUES (?, ?, ?, ?, ?)",
+            (kind, label, base_run_id, datetime.now().isoformat(timespec="microseconds"), n_runs),
+        ).lastrowid
+        first = conn.execute("SELECT COALESCE(MAX(run_id), 0) + 1 FROM model_run").fetchone()[0]
+        run_ids = np.arange(first, first + n_runs, dtype=np.int64)
+        _executemany_chunked(
+            conn, "INSERT INTO model_run (run_id, run_set_id, company_id, scenario_id) VALUES (?, ?, ?, ?)",
+            [run_ids, np.full(n_runs, run_set_id), np.full(n_runs, company_id[0]), np.full(n_runs, scenario_id[0])],
+        )
+
+        # Drivers: only values that differ from the base run, never NaN
+        parts = []
+        for (name, year), values in columns.items():
+            keep = ~np.isnan(values)
+            if (name, year) in base:
+                keep &= values != base[(name, year)]
+            if keep.any():
+                parts.append((run_ids[keep], driver_ids[name], periods.get(year, RUN_LEVEL), values[keep]))
+        written = 0
+        if parts:
+            run_col = np.concatenate([p[0] for p in parts])
+            driver_col = np.concatenate([np.full(len(p[0]), p[1]) for p in parts])
+            period_col = np.concatenate([np.full(len(p[0]), p[2]) for p in parts])
+            value_col = np.concatenate([p[3] for p in parts])
+            order = np.lexsort((period_col, driver_col, run_col))
+            written += _executemany_chunked(
+                conn, "INSERT INTO fact_assumptions (run_id, driver_id, period_id, value) VALUES (?, ?, ?, ?)",
+                [run_col[order], driver_col[order], period_col[order], value_col[order]],
+            )
+
+        names = list(outputs)
+        values = np.column_stack([np.broadcast_to(np.asarray(outputs[name], dtype=float), (n_runs,))
+                                  for name in names])
+        metric_col = np.tile([metric_ids[name] for name in names], n_runs)
+        keep = ~np.isnan(values.ravel())
+        written += _executemany_chunked(
+            conn, "INSERT INTO fact_valuation (run_id, metric_id, value) VALUES (?, ?, ?)",
+            [np.repeat(run_ids, len(names))[keep], metric_col[keep], values.ravel()[keep]],
+        )
+    return run_ids
+
+
+def record_scenarios(conn, scenarios=None, company=TICKER):
+    """Record each scenario's driver set and DCF as one run of a 'scenario' set. Returns {scenario: run_id}."""
+    recorded = {}
+    for scenario, drivers in (scenarios or SCENARIO_DRIVERS).items():
+        columns = driver_columns(drivers)
+        run_ids = record_runs(conn, columns, value_runs(columns, 1), 1, scenario, "scenario",
+                              label=scenario, company=company)
+        recorded[scenario] = int(run_ids[0])
+    return recorded
+
+
+def record_grid(conn, base_run_id, scenario="Base Case", company=TICKER):
+    """WACC x TGR grid (03e's sensitivity offsets) around a stored run."""
+    base = _stored_columns(conn, base_run_id)
+    wacc, tgr = np.meshgrid(GRID_WACC_OFFSETS, GRID_TGR_OFFSETS, indexing="ij")
+    n_runs = wacc.size
+    columns = {key: np.full(n_runs, value) for key, value in base.items()}
+    columns[("wacc", None)] = base[("wacc", None)] + wacc.ravel()
+    columns[("terminal_growth", None)] = base[("terminal_growth", None)] + tgr.ravel()
+    return record_runs(conn, columns, value_runs(columns, n_runs), n_runs, scenario, "grid",
+                       label="WACC x TGR", base_run_id=base_run_id, company=company)
+
+
+def record_monte_carlo(conn, base_run_id, n_runs, seed=7, scenario="Base Case", company=TICKER):
+    """
+    n_runs draws around a stored run: WACC ~ N(base, 1%), TGR ~ U(0.5%, 2.5%)
+    (capped 1pt under WACC), revenue growth and operating margin per year
+    ~ N(base, 1.5% / 1%). Every other driver is inherited from the base.
+    """
+    rng = np.random.default_rng(seed)
+    base = _stored_columns(conn, base_run_id)
+    columns = {key: np.full(n_runs, value) for key, value in base.items()}
+    wacc = np.maximum(rng.normal(base[("wacc", None)], 0.01, n_runs), 0.05)
+    columns[("wacc", None)] = wacc
+    columns[("terminal_growth", None)] = np.minimum(rng.uniform(0.005, 0.025, n_runs), wacc - 0.01)
+    for year in FORECAST_YEARS:
+        columns[("revenue_growth", year)] = base[("revenue_growth", year)] + rng.normal(0, 0.015, n_runs)
+        columns[("operating_margin", year)] = base[("operating_margin", year)] + rng.normal(0, 0.01, n_runs)
+    return record_runs(conn, columns, value_runs(columns, n_runs), n_runs, scenario, "monte_carlo",
+                       label=f"seed={seed}", base_run_id=base_run_id, company=company)
+
+
+def adopt_legacy_runs(conn, tables, company_id):
+    """
+    Move rows of the pre-model-run fact_assumptions / fact_valuation
+    (set aside as _legacy_<table> by 02's ensure_schema) into one scenario
+    run per company and scenario, registering unseen driver / metric names.
+    """
+    frames = {table: pd.read_sql_query(f"SELECT * FROM _legacy_{table}", conn) for table in tables}
+    groups = set()
+    for frame in frames.values():
+        if "company_id" not in frame:
+            frame["company_id"] = company_id
+        groups |= set(zip(frame["company_id"], frame["scenario_id"]))
+
+    assumptions = frames.get("fact_assumptions")
+    if assumptions is not None:
+        for row in assumptions.drop_duplicates("driver_name").itertuples():
+            conn.execute(
+                "INSERT OR IGNORE INTO dim_driver (driver_name, driver_category, unit, description) VALUES (?, ?, ?, ?)",
+                (row.driver_name, row.driver_category, row.unit, row.notes),
+            )
+    valuation = frames.get("fact_valuation")
+    if valuation is not None:
+        for row in valuation.drop_duplicates("metric_name").itertuples():
+            conn.execute("INSERT OR IGNORE INTO dim_valuation_metric (metric_name, unit) VALUES (?, ?)",
+                         (row.metric_name, row.unit))
+    driver_ids = dict(conn.execute("SELECT driver_name, driver_id FROM dim_driver").fetchall())
+    metric_ids = dict(conn.execute("SELECT metric_name, metric_id FROM dim_valuation_metric").fetchall())
+
+    for company, scenario in sorted(groups):
+        run_set_id = conn.execute(
+            "INSERT INTO model_run_set (run_kind, label, created_at, n_runs) VALUES ('scenario', 'legacy', ?, 1)",
+            (datetime.now().isoformat(timespec="microseconds"),),
+        ).lastrowid
+        run_id = conn.execute("SELECT COALESCE(MAX(run_id), 0) + 1 FROM model_run").fetchone()[0]
+        conn.execute("INSERT INTO model_run (run_id, run_set_id, company_id, scenario_id) VALUES (?, ?, ?, ?)",
+                     (run_id, run_set_id, int(company), int(scenario)))
+        if assumptions is not None:
+            rows = assumptions[(assumptions["company_id"] == company) & (assumptions["scenario_id"] == scenario)]
+            conn.executemany(
+                "INSERT INTO fact_assumptions (run_id, driver_id, period_id, value) VALUES (?, ?, ?, ?)",
+                sorted((run_id, driver_ids[r.driver_name], int(r.period_id), float(r.value))
+                       for r in rows.itertuples()),
+            )
+        if valuation is not None:
+            rows = valuation[(valuation["company_id"] == company) & (valuation["scenario_id"] == scenario)]
+            conn.executemany(
+                "INSERT INTO fact_valuation (run_id, metric_id, value) VALUES (?, ?, ?)",
+                sorted((run_id, metric_ids[r.metric_name], float(r.value)) for r in rows.itertuples()),
+            )
+    for table in tables:
+        conn.execute(f"DROP TABLE _legacy_{table}")
+
+
+# =============================================================================
+# READ
+# =============================================================================
+RUNS_SQL = """
+    SELECT mr.run_id, rs.base_run_id
+    FROM model_run mr
+    JOIN model_run_set rs ON mr.run_set_id = rs.run_set_id
+    JOIN dim_company dc ON mr.company_id = dc.company_id
+    JOIN dim_scenario ds ON mr.scenario_id = ds.scenario_id
+    WHERE dc.ticker = ? AND (? IS NULL OR ds.scenario_name = ?) AND (? IS NULL OR mr.run_set_id = ?)"""
+
+DRIVER_VALUES_SQL = """
+    SELECT fa.run_id, COALESCE(dp.fiscal_year, 0) AS fiscal_year, fa.value
+    FROM fact_assumptions fa
+    JOIN dim_driver dd ON fa.driver_id = dd.driver_id
+    LEFT JOIN dim_period dp ON fa.period_id = dp.period_id
+    WHERE dd.driver_name = ? AND fa.run_id BETWEEN ? AND ?"""
+
+METRIC_VALUES_SQL = """
+    SELECT fv.run_id, fv.value
+    FROM fact_valuation fv
+    JOIN dim_valuation_metric dm ON fv.metric_id = dm.metric_id
+    WHERE dm.metric_name = ? AND fv.run_id BETWEEN ? AND ?"""
+
+
+def run_drivers(conn, run_id):
+    """Full driver set of one run (inherited drivers included): driver_name, fiscal_year, value."""
+    base_run_id = conn.execute(
+        """SELECT rs.base_run_id FROM model_run mr JOIN model_run_set rs ON mr.run_set_id = rs.run_set_id
+           WHERE mr.run_id = ?""",
+        (run_id,),
+    ).fetchone()
+    if base_run_id is None:
+        raise ValueError(f"No model run {run_id}")
+    resolved = _stored_columns(conn, base_run_id[0]) if base_run_id[0] else {}
+    resolved.update(_stored_columns(conn, run_id))
+    return pd.DataFrame(
+        [(name, year, value) for (name, year), value in resolved.items()],
+        columns=["driver_name", "fiscal_year", "value"],
+    ).astype({"fiscal_year": "Int64"}).sort_values(["driver_name", "fiscal_year"], na_position="first",
+                                                   ignore_index=True)
+
+
+def run_table(conn, drivers=(), metrics=(), scenario=None, run_set_id=None, company=TICKER):
+    """
+    One row per run (index run_id) of a company, optionally limited to a
+    scenario and/or run set: a column per requested driver (per forecast
+    year, e.g. revenue_growth_2027, for period drivers) with inherited
+    values filled in from the base run, and a column per requested metric.
+    """
+    runs = read_sql(conn, RUNS_SQL, (normalize_ticker(company), scenario, scenario, run_set_id, run_set_id))
+    table = pd.DataFrame(index=pd.Index(runs["run_id"], name="run_id"))
+    if runs.empty:
+        return table
+    bases = runs["base_run_id"].dropna().astype("int64").unique().tolist()
+    low, high = int(runs["run_id"].min()), int(runs["run_id"].max())
+
+    for name in drivers:
+        values = read_sql(conn, DRIVER_VALUES_SQL, (name, low, high))
+        for base in bases:
+            values = pd.concat([values, read_sql(conn, DRIVER_VALUES_SQL, (name, base, base))])
+        wide = values.pivot_table(index="run_id", columns="fiscal_year", values="value", aggfunc="last")
+        for year in wide.columns:
+            column = name if year == 0 else f"{name}_{year}"
+            stored = wide[year]
+            table[column] = stored.reindex(table.index).to_numpy()
+            if bases:
+                inherited = runs["base_run_id"].map(stored).to_numpy()
+                table[column] = table[column].fillna(pd.Series(inherited, index=table.index))
+
+    for name in metrics:
+        values = read_sql(conn, METRIC_VALUES_SQL, (name, low, high)).set_index("run_id")["value"]
+        table[name] = values.reindex(table.index).to_numpy()
+    return table
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Record scenario / grid / Monte Carlo model runs.")
+    parser.add_argument("--grid", action="store_true", help="also record the WACC x TGR grid around the Base Case")
+    parser.add_argument("--monte-carlo", type=int, default=0, metavar="N",
+                        help="also record N Monte Carlo draws around the Base Case")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite")
+    args = parser.parse_args()
+
+    db_path = os.path.splitext(DB_PATH)[0] + FILE_SUFFIX[args.backend]
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found — run `python 02_load_to_sql.py` to build it")
+    conn = connect(db_path, args.backend)
+
+    print(f"\n{'='*60}")
+    print(f"  RECORDING MODEL RUNS ({args.backend})")
+    print(f"{'='*60}\n")
+
+    recorded = record_scenarios(conn)
+    prices = run_table(conn, metrics=["implied_share_price", "upside"])
+    for scenario, run_id in recorded.items():
+        price, upside = prices.loc[run_id]
+        print(f"  ✓ {scenario:10s} run #{run_id}: ${price:,.2f} implied ({upside:+.1%} vs current)")
+
+    base_run_id = recorded["Base Case"]
+    if args.grid:
+        run_ids = record_grid(conn, base_run_id)
+        print(f"  ✓ WACC x TGR grid: {len(run_ids)} runs (#{run_ids[0]}-#{run_ids[-1]})")
+
+    if args.monte_carlo:
+        run_ids = record_monte_carlo(conn, base_run_id, args.monte_carlo, args.seed)
+        run_set_id = conn.execute("SELECT run_set_id FROM model_run WHERE run_id = ?",
+                                  (int(run_ids[0]),)).fetchone()[0]
+        draws = run_table(conn, drivers=["wacc"], metrics=["implied_share_price"], run_set_id=run_set_id)
+        p5, p50, p95 = draws["implied_share_price"].quantile([0.05, 0.5, 0.95])
+        print(f"  ✓ Monte Carlo: {len(run_ids):,} runs, implied price "
+              f"P5 ${p5:,.2f} / P50 ${p50:,.2f} / P95 ${p95:,.2f}")
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ["model_run", "fact_assumptions", "fact_valuation"]}
+    print(f"\n  {', '.join(f'{table}: {count:,} rows' for table, count in counts.items())}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Pipelined Extraction and Loading
+================================
+Overlaps fetching with database writes. Run one after the other, a
+refresh of a large universe takes fetch time + write time. Here extraction
+workers and a single writer run at the same time, so the refresh takes
+roughly the longer of the two:
+
+    workers ── extract(item) ──▶ bounded queue ──▶ writer ── write(rows) ──▶ database
+
+- Extraction runs in `workers` threads. Fetches spend their time waiting
+  on the network, and SQLite releases the GIL while it writes, so threads
+  are enough.
+- Each worker gathers its extracted rows into batches of about
+  BATCH_ROWS. The queue holds at most QUEUE_BATCHES batches; when the
+  writer falls behind, workers block on put (backpressure), so memory
+  stays bounded however large the universe is.
+- The writer is the calling thread and the only one that touches the
+  connection. It concatenates batches up to COMMIT_ROWS rows and writes
+  them with one write() call (one transaction in the loader).
+- An item whose extraction fails is reported in stats["failed"] and
+  skipped. A failing write stops the workers and re-raises.
+
+workers=0 fetches and writes strictly in turn on the calling thread, the
+sequential baseline (see bench_pipeline.py).
+
+Usage:
+    from pipeline import run_pipeline
+    stats = run_pipeline(tickers, extract, write, workers=8)
+    # extract(item) -> DataFrame of rows (worker thread); write(rows) -> None (calling thread)
+"""
+
+import queue
+import threading
+import time
+
+import pandas as pd
+
+FETCH_WORKERS = 8                   # concurrent extractions (01b paces SEC requests to its rate limit)
+BATCH_ROWS = 5_000                  # rows a worker gathers before queueing them as one batch
+QUEUE_BATCHES = 32                  # batches waiting for the writer before workers block
+COMMIT_ROWS = 50_000                # rows per write() call / transaction
+
+_DONE = object()                    # a worker ran out of items
+
+
+def _extract_worker(todo, results, extract, stop, stats, lock, batch_rows):
+    """
+    Take items until none are left (or the writer stops). Extracted rows
+    are gathered into batches of about batch_rows before they are queued
+    as (items, failed, rows), so the writer wakes once per batch rather
+    than once per item.
+    """
+    items, failed, frames, n_rows = [], {}, [], 0
+    while not stop.is_set():
+        try:
+            item = todo.get_nowait()
+        except queue.Empty:
+            break
+        start = time.perf_counter()
+        try:
+            rows = extract(item)
+        except Exception as exc:
+            failed[item] = exc
+        else:
+            items.append(item)
+            if rows is not None and not rows.empty:
+                frames.append(rows)
+                n_rows += len(rows)
+        extracted = time.perf_counter()
+        if n_rows >= batch_rows:
+            results.put((items, failed, pd.concat(frames, ignore_index=True)))  # blocks while the queue is full
+            items, failed, frames, n_rows = [], {}, [], 0
+        with lock:
+            stats["extract_seconds"] += extracted - start
+            stats["blocked_seconds"] += time.perf_counter() - extracted
+    if items or failed:
+        results.put((items, failed, pd.concat(frames, ignore_index=True) if frames else None))
+    results.put(_DONE)
+
+
+def run_pipeline(items, extract, write, workers=FETCH_WORKERS, queue_batches=QUEUE_BATCHES,
+                 commit_rows=COMMIT_ROWS, batch_rows=BATCH_ROWS):
+    """
+    Extract every item and write the rows. Returns stats: items, rows,
+    commits, failed {item: exception}, seconds (wall), extract_seconds
+    (summed over workers), write_seconds, blocked_seconds (workers waiting
+    on a full queue) and max_queued.
+    """
+    stats = {"items": 0, "rows": 0, "commits": 0, "failed": {}, "seconds": 0.0, "extract_seconds": 0.0,
+             "write_seconds": 0.0, "blocked_seconds": 0.0, "max_queued": 0}
+    pending = []
+    start = time.perf_counter()
+
+    def flush():
+        if not pending:
+            return
+        began = time.perf_counter()
+        write(pd.concat(pending, ignore_index=True))
+        stats["write_seconds"] += time.perf_counter() - began
+        stats["commits"] += 1
+        pending.clear()
+
+    def accept(done, failed, rows):
+        stats["items"] += len(done)
+        stats["failed"].update(failed)
+        if rows is None or rows.empty:
+            return
+        stats["rows"] += len(rows)
+        pending.append(rows)
+        if sum(len(frame) for frame in pending) >= commit_rows:
+            flush()
+
+    if workers == 0:
+        for item in items:
+            began = time.perf_counter()
+            try:
+                done, failed, rows = [item], {}, extract(item)
+            except Exception as exc:
+                done, failed, rows = [], {item: exc}, None
+            stats["extract_seconds"] += time.perf_counter() - began
+            accept(done, failed, rows)
+        flush()
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    todo = queue.SimpleQueue()
+    for item in items:
+        todo.put(item)
+    results = queue.Queue(maxsize=queue_batches)
+    stop, lock = threading.Event(), threading.Lock()
+    threads = [threading.Thread(target=_extract_worker, daemon=True,
+                                args=(todo, results, extract, stop, stats, lock, batch_rows))
+               for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        finished = 0
+        while finished < workers:
+            got = results.get()
+            if got is _DONE:
+                finished += 1
+                continue
+            stats["max_queued"] = max(stats["max_queued"], results.qsize() + 1)
+            accept(*got)
+        flush()
+    finally:
+        stop.set()
+        for thread in threads:                                  # unblock workers still putting
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+    stats["seconds"] = time.perf_counter() - start
+    return stats
@@ -0,0 +1,424 @@
+"""
+Read-Only Query API
+===================
+One way in for everything that reads the star schema (02's summary
+report, the Power BI feed, notebooks) instead of ad-hoc connections and
+raw SQL.
+
+- A small pool of read-only connections (SQLite `mode=ro`, DuckDB
+  read_only). Every accessor runs one fixed SQL text with bound
+  parameters, so each pooled SQLite connection prepares it once and
+  reuses it from its statement cache.
+- Accessors return DataFrames: statement(), statement_as_of(), ratios(),
+  line_item(), latest_ratios(), ttm_ratios(), prices(), returns(),
+  rollup(), rollup_percentile(), companies(), table_counts(), load_batch().
+- Results are kept in an LRU cache keyed by accessor and arguments. The
+  cache belongs to one data version, the latest load batch (id, status,
+  rows written) plus, on SQLite, the file's PRAGMA data_version read on a
+  dedicated connection. Any new or progressing load changes it, and so
+  does any other write (model_runs.record_*, rollup.define_group), and
+  the cache is dropped. Nothing is cached while a batch is still running.
+  (A DuckDB file cannot be written while the API has it open.)
+
+Usage:
+    from query_api import QueryAPI
+    api = QueryAPI()                                      # data/paypal_analysis.db
+    api.statement("PYPL", "income_statement", "Base Case", years=range(2022, 2028))
+    api.ratios("PYPL", years=[2023, 2024])
+    api.statement_as_of("PYPL", "2024-06-30", "balance_sheet")   # as the database knew it then
+    api.rollup("Payments peers", category="profitability")     # group tiles from agg_rollup
+    api.cache_info()                                      # hits, misses, size, version
+"""
+
+import os
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from bitemporal import as_of_bound
+from cik_index import normalize_ticker
+from db_backends import FILE_SUFFIX, connect, day_dates, day_number, read_sql
+from rollup import percentile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "data", "paypal_analysis.db")
+POOL_SIZE = 4
+CACHE_SIZE = 256
+ALL_YEARS = (0, 9999)
+
+# Tables table_counts() may be asked about (names can't be bound parameters)
+COUNTABLE_TABLES = {
+    "dim_company", "dim_period", "dim_scenario", "dim_line_item", "dim_ratio",
+    "dim_driver", "dim_valuation_metric", "model_run_set", "model_run",
+    "fact_financials", "fact_financials_history", "fact_ratios", "fact_assumptions", "fact_valuation", "fact_stock_price",
+    "fact_stock_bar", "fact_stock_returns", "dim_company_group", "company_group_member", "agg_rollup",
+    "etl_load_batch",
+}
+
+# =============================================================================
+# SQL (one fixed text per accessor)
+# =============================================================================
+VERSION_SQL = "SELECT batch_id, status, rows_written FROM etl_load_batch ORDER BY batch_id DESC LIMIT 1"
+
+STATEMENT_SQL = """
+    SELECT dli.item_name, dli.display_order, dp.fiscal_year, ff.amount
+    FROM fact_financials ff
+    JOIN dim_company dc ON ff.company_id = dc.company_id
+    JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+    JOIN dim_period dp ON ff.period_id = dp.period_id
+    JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+    WHERE dc.ticker = ? AND ds.scenario_name = ? AND dli.statement_type = ?
+      AND dp.quarter IS NULL AND dp.fiscal_year BETWEEN ? AND ?"""
+
+# Dimension keys resolve first, then one range of fact_financials_history's key
+# (company, scenario) with every version; the knowledge-time test keeps one per fact
+STATEMENT_AS_OF_SQL = """
+    SELECT dli.item_name, dli.display_order, dp.fiscal_year, fh.amount
+    FROM dim_company dc
+    JOIN dim_scenario ds ON ds.scenario_name = ?
+    JOIN fact_financials_history fh ON fh.company_id = dc.company_id AND fh.scenario_id = ds.scenario_id
+    JOIN dim_period dp ON fh.period_id = dp.period_id
+    JOIN dim_line_item dli ON fh.line_item_id = dli.line_item_id
+    WHERE dc.ticker = ? AND dli.statement_type = ?
+      AND dp.quarter IS NULL AND dp.fiscal_year BETWEEN ? AND ?
+      AND fh.known_from <= ? AND (fh.known_to IS NULL OR fh.known_to > ?)"""
+
+RATIOS_SQL = """
+    SELECT dr.ratio_name, dr.ratio_category, dp.fiscal_year, fr.value
+    FROM fact_ratios fr
+    JOIN dim_company dc ON fr.company_id = dc.company_id
+    JOIN dim_scenario ds ON fr.scenario_id = ds.scenario_id
+    JOIN dim_period dp ON fr.period_id = dp.period_id
+    JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+    WHERE dc.ticker = ? AND ds.scenario_name = ?
+      AND dp.quarter IS NULL AND dp.fiscal_year BETWEEN ? AND ?"""
+
+LINE_ITEM_SQL = """
+    SELECT dp.period_label, dp.fiscal_year, ff.amount, ff.source
+    FROM fact_financials ff
+    JOIN dim_company dc ON ff.company_id = dc.company_id
+    JOIN dim_period dp ON ff.period_id = dp.period_id
+    JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+    JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+    WHERE dc.ticker = ? AND dli.statement_type = ? AND dli.item_name = ? AND ds.scenario_name = ?
+      AND dp.quarter IS NULL
+    ORDER BY dp.fiscal_year"""
+
+LATEST_RATIOS_SQL = """
+    SELECT dr.ratio_name, fr.value, dr.format_type
+    FROM fact_ratios fr
+    JOIN dim_company dc ON fr.company_id = dc.company_id
+    JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+    JOIN dim_period dp ON fr.period_id = dp.period_id
+    JOIN dim_scenario ds ON fr.scenario_id = ds.scenario_id
+    WHERE dp.fiscal_year = (SELECT MAX(fiscal_year) FROM dim_period WHERE period_type = 'actual' AND quarter IS NULL)
+      AND dp.quarter IS NULL AND ds.scenario_name = ? AND dc.ticker = ?
+    ORDER BY dr.ratio_category, dr.ratio_name"""
+
+# Dimension keys resolve first, then one primary-key range of fact_ratios
+TTM_RATIOS_SQL = """
+    SELECT dr.ratio_name, dr.ratio_category, fr.value, dr.format_type
+    FROM dim_company dc
+    JOIN dim_scenario ds ON ds.scenario_name = 'TTM'
+    JOIN dim_period dp ON dp.fiscal_year = ? AND dp.quarter = ? AND dp.period_type = 'actual'
+    JOIN fact_ratios fr ON fr.company_id = dc.company_id AND fr.scenario_id = ds.scenario_id
+                       AND fr.period_id = dp.period_id
+    JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+    WHERE dc.ticker = ?
+    ORDER BY dr.ratio_category, dr.ratio_name"""
+
+PRICES_SQL = """
+    SELECT sp.trade_day, sp.open_price, sp.high_price, sp.low_price, sp.close_price, sp.adj_close, sp.volume
+    FROM fact_stock_bar sp
+    JOIN dim_company dc ON sp.company_id = dc.company_id
+    WHERE dc.ticker = ? AND sp.trade_day BETWEEN ? AND ?
+    ORDER BY sp.trade_day"""
+
+RETURNS_SQL = """
+    SELECT sr.trade_date, sr.log_return, sr.vol_20d, sr.vol_60d, sr.vol_252d,
+           sr.ma_20d, sr.ma_50d, sr.ma_200d, sr.running_peak, sr.drawdown
+    FROM fact_stock_returns sr
+    JOIN dim_company dc ON sr.company_id = dc.company_id
+    WHERE dc.ticker = ? AND sr.trade_date BETWEEN ? AND ?
+    ORDER BY sr.trade_date"""
+
+# Dimension keys resolve first, then one range of agg_rollup's key (group, scenario)
+ROLLUP_SQL = """
+    SELECT r.fiscal_year, r.item_category, r.measure, r.n_companies, r.total, r.min_value, r.max_value, r.median
+    FROM dim_company_group g
+    JOIN dim_scenario ds ON ds.scenario_name = ?
+    JOIN agg_rollup r ON r.group_id = g.group_id AND r.scenario_id = ds.scenario_id
+    WHERE g.group_name = ? AND r.fiscal_year BETWEEN ? AND ?
+    ORDER BY r.item_category, r.measure, r.fiscal_year"""
+
+ROLLUP_SKETCH_SQL = """
+    SELECT r.fiscal_year, r.item_category, r.n_companies, r.sketch
+    FROM dim_company_group g
+    JOIN dim_scenario ds ON ds.scenario_name = ?
+    JOIN agg_rollup r ON r.group_id = g.group_id AND r.scenario_id = ds.scenario_id
+    WHERE g.group_name = ? AND r.measure = ? AND r.fiscal_year BETWEEN ? AND ?
+    ORDER BY r.item_category, r.fiscal_year"""
+
+COMPANIES_SQL = "SELECT company_id, ticker, cik, company_name, fiscal_year_end_month FROM dim_company ORDER BY ticker"
+
+LOAD_BATCH_SQL = """
+    SELECT batch_id, mode, status, started_at, finished_at, rows_written, rows_unchanged
+    FROM etl_load_batch WHERE batch_id = ?"""
+
+
+def _year_bounds(years):
+    if years is None:
+        return ALL_YEARS
+    years = sorted(years)
+    return years[0], years[-1]
+
+
+def _wide(frame, row_key, order_key, years):
+    """Long (row_key, fiscal_year, value) rows → one row per row_key, one column per year."""
+    if years is not None:
+        frame = frame[frame["fiscal_year"].isin(list(years))]
+    order = frame.drop_duplicates(row_key).sort_values([order_key, row_key])[row_key]
+    wide = frame.pivot(index=row_key, columns="fiscal_year", values=frame.columns[-1])
+    wide = wide.reindex(order)
+    wide.columns.name = None
+    return wide
+
+
+def _dated(bars):
+    """fact_stock_bar rows with trade_day replaced by its YYYY-MM-DD trade_date."""
+    bars.insert(0, "trade_date", day_dates(bars.pop("trade_day")))
+    return bars
+
+
+class QueryAPI:
+    """Pooled, cached, read-only access to the analysis database."""
+
+    def __init__(self, db_path=None, backend="sqlite", pool_size=POOL_SIZE, cache_size=CACHE_SIZE):
+        self.db_path = db_path or os.path.splitext(DB_PATH)[0] + FILE_SUFFIX[backend]
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"{self.db_path} not found — run `python 02_load_to_sql.py` to build it")
+        self.backend = backend
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+        self._pool = queue.LifoQueue()
+        self._opened = []
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._version = None
+        self._version_conn = None
+        self.hits = self.misses = 0
+
+    # -------------------------------------------------------------------------
+    # Pool
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled read-only connection (opened on first need, at most pool_size)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                conn = None
+                if len(self._opened) < self.pool_size:
+                    conn = connect(self.db_path, self.backend, read_only=True)
+                    self._opened.append(conn)
+            if conn is None:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened = []
+            self._pool = queue.LifoQueue()
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+            self._cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # Cache
+    # -------------------------------------------------------------------------
+    def data_version(self):
+        """
+        (batch_id, status, rows_written) of the latest load batch, plus on
+        SQLite PRAGMA data_version, which changes whenever another connection
+        commits (also writes outside a load batch). It is per connection, so
+        it is read on one dedicated connection that only ever runs it.
+        """
+        with self.connection() as conn:
+            version = tuple(conn.execute(VERSION_SQL).fetchone() or ())
+        if self.backend == "sqlite":
+            with self._lock:
+                if self._version_conn is None:
+                    self._version_conn = connect(self.db_path, self.backend, read_only=True)
+                version += tuple(self._version_conn.execute("PRAGMA data_version").fetchone())
+        return version
+
+    def _cached(self, key, compute):
+        version = self.data_version()
+        cacheable = "running" not in version
+        with self._lock:
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            if cacheable and key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                result = self._cache[key]
+                return result.copy() if hasattr(result, "copy") else result
+            self.misses += 1
+
+        result = compute()
+        if cacheable:
+            with self._lock:
+                if version == self._version:
+                    self._cache[key] = result
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return result.copy() if hasattr(result, "copy") else result
+
+    def _frame(self, key, sql, params, shape=None):
+        """Cached query result, reshaped by `shape` before it is stored."""
+        def compute():
+            with self.connection() as conn:
+                frame = read_sql(conn, sql, params)
+            return shape(frame) if shape else frame
+        return self._cached(key, compute)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "version": self._version}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # -------------------------------------------------------------------------
+    # Accessors
+    # -------------------------------------------------------------------------
+    def statement(self, company, statement="income_statement", scenario="Actual", years=None):
+        """
+        One financial statement, line items (display order) × fiscal years,
+        USD millions. `statement` is income_statement, balance_sheet or cash_flow.
+        """
+        ticker = normalize_ticker(company)
+        years = None if years is None else tuple(years)
+        return self._frame(("statement", ticker, statement, scenario, years), STATEMENT_SQL,
+                           (ticker, scenario, statement, *_year_bounds(years)),
+                           lambda rows: _wide(rows, "item_name", "display_order", years))
+
+    def statement_as_of(self, company, as_of, statement="income_statement", scenario="Actual", years=None):
+        """
+        statement() as the database knew it at `as_of` (a date, meaning its
+        end, or a timestamp): restated values show what was loaded before
+        the restatement, facts not yet loaded are missing.
+        """
+        ticker = normalize_ticker(company)
+        years = None if years is None else tuple(years)
+        bound = as_of_bound(as_of)
+        return self._frame(("statement_as_of", ticker, bound, statement, scenario, years), STATEMENT_AS_OF_SQL,
+                           (scenario, ticker, statement, *_year_bounds(years), bound, bound),
+                           lambda rows: _wide(rows, "item_name", "display_order", years))
+
+    def ratios(self, company, scenario="Actual", years=None, names=None):
+        """Ratios (grouped by category) × fiscal years; `names` limits the ratios returned."""
+        ticker = normalize_ticker(company)
+        years = None if years is None else tuple(years)
+        names = None if names is None else tuple(names)
+
+        def shape(rows):
+            if names is not None:
+                rows = rows[rows["ratio_name"].isin(list(names))]
+            return _wide(rows, "ratio_name", "ratio_category", years)
+        return self._frame(("ratios", ticker, scenario, years, names), RATIOS_SQL,
+                           (ticker, scenario, *_year_bounds(years)), shape)
+
+    def line_item(self, company, item_name, statement="income_statement", scenario="Actual"):
+        """One line item by year: period_label, fiscal_year, amount, source."""
+        ticker = normalize_ticker(company)
+        return self._frame(("line_item", ticker, statement, item_name, scenario), LINE_ITEM_SQL,
+                           (ticker, statement, item_name, scenario))
+
+    def latest_ratios(self, company, scenario="Actual"):
+        """Every ratio for the latest actual fiscal year: ratio_name, value, format_type."""
+        ticker = normalize_ticker(company)
+        return self._frame(("latest_ratios", ticker, scenario), LATEST_RATIOS_SQL, (scenario, ticker))
+
+    def ttm_ratios(self, company, fiscal_year, quarter):
+        """Trailing-twelve-month ratios at one fiscal quarter end: ratio_name, ratio_category, value, format_type."""
+        ticker = normalize_ticker(company)
+        return self._frame(("ttm_ratios", ticker, fiscal_year, quarter), TTM_RATIOS_SQL,
+                           (int(fiscal_year), int(quarter), ticker))
+
+    def prices(self, company, start="0000-01-01", end="9999-12-31"):
+        """Daily bars between two YYYY-MM-DD dates, inclusive."""
+        ticker = normalize_ticker(company)
+        bounds = (day_number(start), day_number(end))
+        return self._frame(("prices", ticker, start, end), PRICES_SQL, (ticker, *bounds), _dated)
+
+    def returns(self, company, start="0000-01-01", end="9999-12-31"):
+        """Daily log returns, rolling volatility, moving averages and drawdown (see stock_returns.py)."""
+        ticker = normalize_ticker(company)
+        return self._frame(("returns", ticker, start, end), RETURNS_SQL, (ticker, start, end))
+
+    def rollup(self, group="All companies", scenario="Actual", category=None, years=None):
+        """
+        Precomputed group statistics (see rollup.py): one row per fiscal
+        year, category and measure with n_companies, total, min_value,
+        max_value and median. `category` is an item or ratio category.
+        """
+        years = None if years is None else tuple(years)
+
+        def shape(rows):
+            if years is not None:
+                rows = rows[rows["fiscal_year"].isin(list(years))]
+            if category is not None:
+                rows = rows[rows["item_category"] == category]
+            return rows.reset_index(drop=True)
+        return self._frame(("rollup", group, scenario, category, years), ROLLUP_SQL,
+                           (scenario, group, *_year_bounds(years)), shape)
+
+    def rollup_percentile(self, measure, q, group="All companies", scenario="Actual", years=None):
+        """
+        Quantile q (0-1) of a line item or ratio across a group's companies,
+        from agg_rollup's sketches: fiscal_year, item_category, n_companies, value.
+        """
+        years = None if years is None else tuple(years)
+
+        def shape(rows):
+            if years is not None:
+                rows = rows[rows["fiscal_year"].isin(list(years))]
+            rows = rows.assign(value=[percentile(sketch, q) for sketch in rows["sketch"]])
+            return rows.drop(columns="sketch").reset_index(drop=True)
+        return self._frame(("rollup_percentile", measure, q, group, scenario, years), ROLLUP_SKETCH_SQL,
+                           (scenario, group, measure, *_year_bounds(years)), shape)
+
+    def companies(self):
+        return self._frame(("companies",), COMPANIES_SQL, ())
+
+    def table_counts(self, tables):
+        """{table: row count} for tables in COUNTABLE_TABLES."""
+        unknown = set(tables) - COUNTABLE_TABLES
+        if unknown:
+            raise ValueError(f"Not a countable table: {', '.join(sorted(unknown))}")
+
+        def compute():
+            with self.connection() as conn:
+                return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+        return self._cached(("table_counts", tuple(tables)), compute)
+
+    def load_batch(self, batch_id):
+        """etl_load_batch row as a dict, or None."""
+        return self._frame(("load_batch", batch_id), LOAD_BATCH_SQL, (batch_id,),
+                           lambda rows: rows.iloc[0].to_dict() if len(rows) else None)
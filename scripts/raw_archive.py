@@ -0,0 +1,169 @@
+"""
+Raw Response Archive
+====================
+Compressed, append-only store for raw API payloads (SEC XBRL company
+facts, yfinance statement and price CSVs) keyed by source, key and
+refresh date.
+
+Layout (data/raw/archive/):
+    payloads.pack    concatenated, individually compressed payloads
+    index.sqlite     one row per entry: where its blob lives in the pack
+
+Each payload is compressed on its own (zstd when the `zstandard` package
+is installed, gzip otherwise), so reading one company's payload is one
+index lookup, one seek and one decompress — nothing else is touched.
+Identical payloads (same SHA-256) are stored once and shared by every
+refresh date that saw them.
+
+Usage:
+    archive = RawArchive()
+    archive.put_json("sec_companyfacts", "0001633917", data)
+    facts = archive.get_json("sec_companyfacts", "0001633917")            # latest
+    facts = archive.get_json("sec_companyfacts", "0001633917", "2025-06-30")  # as of
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # gzip keeps the archive usable without the extra package
+    zstandard = None
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "raw", "archive")
+PACK_NAME = "payloads.pack"
+INDEX_NAME = "index.sqlite"
+ZSTD_LEVEL = 10
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blob (
+    sha256      TEXT PRIMARY KEY,
+    pack_offset INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    raw_size    INTEGER NOT NULL,
+    codec       TEXT NOT NULL CHECK(codec IN ('zstd', 'gzip'))
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS entry (
+    source       TEXT NOT NULL,                  -- e.g. "sec_companyfacts", "yfinance"
+    entry_key    TEXT NOT NULL,                  -- e.g. CIK, "PYPL/income_statement.csv"
+    as_of        TEXT NOT NULL,                  -- refresh date, YYYY-MM-DD
+    sha256       TEXT NOT NULL REFERENCES blob(sha256),
+    content_type TEXT,
+    archived_at  TEXT NOT NULL,
+    PRIMARY KEY (source, entry_key, as_of)
+) WITHOUT ROWID;
+"""
+
+
+def _compress(payload):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return "gzip", gzip.compress(payload, compresslevel=6)
+
+
+def _decompress(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Entry is zstd-compressed; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+class RawArchive:
+    """
+    Append-only compressed payload archive with a random-access index. One
+    instance may be shared by several threads as long as they take turns
+    (see 01b's _ARCHIVE_LOCK).
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.pack_path = os.path.join(root, PACK_NAME)
+        self.index = sqlite3.connect(os.path.join(root, INDEX_NAME), check_same_thread=False)
+        self.index.executescript(INDEX_SCHEMA)
+        self._reader = None
+
+    # ----- writing ------------------------------------------------------
+    def put(self, source, key, payload, as_of=None, content_type=None):
+        """
+        Archive `payload` (bytes) under (source, key, as_of). Re-archiving the
+        same key and date replaces the entry. Returns the payload's SHA-256.
+        """
+        as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+        digest = hashlib.sha256(payload).hexdigest()
+
+        known = self.index.execute("SELECT 1 FROM blob WHERE sha256 = ?", (digest,)).fetchone()
+        if known is None:
+            codec, blob = _compress(payload)
+            with open(self.pack_path, "ab") as pack:
+                offset = pack.tell()
+                pack.write(blob)
+                pack.flush()
+                os.fsync(pack.fileno())
+            self.index.execute(
+                "INSERT INTO blob (sha256, pack_offset, stored_size, raw_size, codec) VALUES (?, ?, ?, ?, ?)",
+                (digest, offset, len(blob), len(payload), codec),
+            )
+
+        self.index.execute(
+            """INSERT OR REPLACE INTO entry (source, entry_key, as_of, sha256, content_type, archived_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (source, key, as_of, digest, content_type, datetime.now().isoformat(timespec="seconds")),
+        )
+        self.index.commit()
+        return digest
+
+    def put_json(self, source, key, obj, as_of=None):
+        payload = json.dumps(obj, separators=(",", ":")).encode()
+        return self.put(source, key, payload, as_of, content_type="application/json")
+
+    def put_file(self, source, key, path, as_of=None, content_type=None):
+        with open(path, "rb") as f:
+            return self.put(source, key, f.read(), as_of, content_type)
+
+    # ----- reading ------------------------------------------------------
+    def locate(self, source, key, as_of=None):
+        """Index row for the latest entry at or before `as_of` (latest overall if None)."""
+        return self.index.execute(
+            """SELECT e.as_of, b.pack_offset, b.stored_size, b.raw_size, b.codec
+               FROM entry e JOIN blob b ON e.sha256 = b.sha256
+               WHERE e.source = ? AND e.entry_key = ? AND e.as_of <= ?
+               ORDER BY e.as_of DESC LIMIT 1""",
+            (source, key, as_of or "9999-12-31"),
+        ).fetchone()
+
+    def get(self, source, key, as_of=None):
+        """Return the payload bytes, or None if nothing was archived for the key."""
+        row = self.locate(source, key, as_of)
+        if row is None:
+            return None
+        _, offset, stored_size, _, codec = row
+        if self._reader is None:
+            self._reader = open(self.pack_path, "rb")
+        self._reader.seek(offset)
+        return _decompress(codec, self._reader.read(stored_size))
+
+    def get_json(self, source, key, as_of=None):
+        payload = self.get(source, key, as_of)
+        return json.loads(payload) if payload is not None else None
+
+    # ----- housekeeping -------------------------------------------------
+    def stats(self):
+        """Entry count, distinct blobs, raw bytes represented and bytes on disk."""
+        entries, raw_total = self.index.execute(
+            "SELECT COUNT(*), COALESCE(SUM(b.raw_size), 0) FROM entry e JOIN blob b ON e.sha256 = b.sha256"
+        ).fetchone()
+        blobs = self.index.execute("SELECT COUNT(*) FROM blob").fetchone()[0]
+        stored = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+        return {"entries": entries, "blobs": blobs, "raw_bytes": raw_total, "stored_bytes": stored}
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self.index.close()
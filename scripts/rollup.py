@@ -0,0 +1,227 @@
+"""
+Rollup Cube
+===========
+agg_rollup answers the aggregate questions dashboard tiles ask ("total
+operating expenses across scenarios", "median operating margin across
+peers by year") without scanning fact_financials joined to its
+dimensions. It holds one row per (company group, scenario, fiscal year,
+item category, measure), summarizing the measure over the group's
+companies: n_companies, total, min_value, max_value, median and a
+quantile sketch. A tile is then one key lookup, or one range of the key
+for a whole category.
+
+Measures are annual line items (category = dim_line_item.item_category)
+and ratios (category = dim_ratio.ratio_category). Groups are defined in
+dim_company_group / company_group_member. Group 1, "All companies", is
+kept in sync with dim_company. define_group() adds or redefines a peer
+group and rebuilds its cells.
+
+Refreshes are incremental. refresh_rollup(conn, batch_id) recomputes only
+the cells whose inputs that batch wrote or deleted (etl_deleted_fact):
+every group of every company it touched, for each (scenario, year,
+measure) touched; a cell left without values is removed. A cell's values are
+read through the covering item and ratio indexes. All cells are computed
+in one vectorized pass: values are sorted within their cell once, then
+count, sum, min, max and the sketch points come straight off each sorted run.
+
+The sketch is a cell's values at SKETCH_POINTS evenly spaced quantiles
+(the sorted values themselves when there are fewer), stored as float64
+bytes. percentile() interpolates it. The result is exact for groups of
+up to SKETCH_POINTS companies and for whole percentiles of any group;
+other quantiles of larger groups are interpolated between neighbouring
+percentiles.
+
+Usage:
+    from rollup import define_group, refresh_rollup
+    refresh_rollup(conn, batch_id)     # cells touched by one load
+    refresh_rollup(conn)               # everything
+    define_group(conn, "Payments peers", ["PYPL", "SQ", "V", "MA"])
+"""
+
+import numpy as np
+import pandas as pd
+
+from cik_index import normalize_ticker
+from db_backends import read_sql
+
+SKETCH_POINTS = 101                 # quantiles kept per cell: every percentile
+ALL_COMPANIES = 1                   # dim_company_group seeded by schema.sql
+
+# fact table → (value column, dimension, its key, measure name column, category column)
+ROLLUP_SOURCES = {
+    "fact_financials": ("amount", "dim_line_item", "line_item_id", "item_name", "item_category"),
+    "fact_ratios": ("value", "dim_ratio", "ratio_id", "ratio_name", "ratio_category"),
+}
+CELL_KEY = ["group_id", "scenario_id", "fiscal_year", "item_category", "measure"]
+STAT_COLUMNS = ["n_companies", "total", "min_value", "max_value", "median", "sketch"]
+
+# Cells (group, scenario, annual period, source, measure key) whose inputs are in scope
+CELLS_SQL = """
+    INSERT INTO _rollup_cells (group_id, scenario_id, period_id, source, member_id)
+    SELECT DISTINCT m.group_id, f.scenario_id, f.period_id, '{table}', f.{key}
+    FROM {table} f
+    JOIN company_group_member m ON m.company_id = f.company_id
+    JOIN dim_period dp ON dp.period_id = f.period_id AND dp.quarter IS NULL
+    WHERE {scope}"""
+
+# ...and cells whose inputs the batch deleted
+DELETED_CELLS_SQL = """
+    INSERT INTO _rollup_cells (group_id, scenario_id, period_id, source, member_id)
+    SELECT DISTINCT m.group_id, d.scenario_id, d.period_id, d.fact_table, d.member_id
+    FROM etl_deleted_fact d
+    JOIN company_group_member m ON m.company_id = d.company_id
+    JOIN dim_period dp ON dp.period_id = d.period_id AND dp.quarter IS NULL
+    WHERE d.batch_id = ? AND d.fact_table = '{table}'
+      AND NOT EXISTS (SELECT 1 FROM _rollup_cells c
+                      WHERE c.group_id = m.group_id AND c.scenario_id = d.scenario_id AND c.period_id = d.period_id
+                        AND c.source = d.fact_table AND c.member_id = d.member_id)"""
+
+# Every group member's value for those cells
+VALUES_SQL = """
+    SELECT c.group_id, c.scenario_id, dp.fiscal_year, COALESCE(d.{category}, 'Other') AS item_category,
+           d.{name} AS measure, f.{value} AS value
+    FROM _rollup_cells c
+    JOIN dim_period dp ON dp.period_id = c.period_id
+    JOIN {dim} d ON d.{key} = c.member_id
+    JOIN company_group_member m ON m.group_id = c.group_id
+    JOIN {table} f ON f.{key} = c.member_id AND f.scenario_id = c.scenario_id
+                  AND f.period_id = c.period_id AND f.company_id = m.company_id
+    WHERE c.source = '{table}' AND f.{value} IS NOT NULL"""
+
+# Their keys, to remove the cells left without values
+CELL_KEYS_SQL = """
+    SELECT DISTINCT c.group_id, c.scenario_id, dp.fiscal_year, COALESCE(d.{category}, 'Other') AS item_category,
+           d.{name} AS measure
+    FROM _rollup_cells c
+    JOIN dim_period dp ON dp.period_id = c.period_id
+    JOIN {dim} d ON d.{key} = c.member_id
+    WHERE c.source = '{table}'"""
+
+
+# =============================================================================
+# CELL STATISTICS
+# =============================================================================
+def _quantiles(values, starts, counts, q):
+    """Linear-interpolated quantile q (per cell) of each sorted run values[start:start + count]."""
+    pos = q * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    return values[starts + lo] + (pos - lo) * (values[starts + hi] - values[starts + lo])
+
+
+def summarize(values):
+    """
+    (CELL_KEY..., value) rows → one row per cell with STAT_COLUMNS, in one
+    pass over the values sorted within their cell.
+    """
+    values = values.sort_values([*CELL_KEY, "value"], ignore_index=True)
+    cells = values.groupby(CELL_KEY, sort=False)["value"].agg(["count", "sum", "min", "max"]).reset_index()
+    v = values["value"].to_numpy(dtype=float)
+    counts = cells["count"].to_numpy(dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    points = np.minimum(counts, SKETCH_POINTS)
+    cell = np.repeat(np.arange(len(cells)), points)
+    step = np.arange(len(cell)) - np.repeat(np.cumsum(points) - points, points)
+    sketch = _quantiles(v, starts[cell], counts[cell], step / np.maximum(points[cell] - 1, 1))
+    blobs = [chunk.astype("<f8").tobytes() for chunk in np.split(sketch, np.cumsum(points)[:-1])]
+
+    return cells[CELL_KEY].assign(
+        n_companies=counts,
+        total=cells["sum"].to_numpy(),
+        min_value=cells["min"].to_numpy(),
+        max_value=cells["max"].to_numpy(),
+        median=_quantiles(v, starts, counts, 0.5),
+        sketch=blobs,
+    )
+
+
+def percentile(sketch, q):
+    """Quantile q (0-1) of a cell from its sketch."""
+    points = np.frombuffer(sketch, dtype="<f8")
+    return float(np.interp(q, np.linspace(0, 1, len(points)), points))
+
+
+# =============================================================================
+# REFRESH
+# =============================================================================
+def _refresh(conn, scope, params, batch_id, deleted_by=None):
+    """
+    Recompute the cells of facts and ratios matching `scope`, plus those of
+    keys batch `deleted_by` deleted (inside the caller's transaction).
+    """
+    conn.execute("DROP TABLE IF EXISTS temp._rollup_cells")
+    conn.execute("""CREATE TEMP TABLE _rollup_cells (group_id INTEGER, scenario_id INTEGER, period_id INTEGER,
+                                                     source TEXT, member_id INTEGER)""")
+    frames, keys = [], []
+    for table, (value, dim, key, name, category) in ROLLUP_SOURCES.items():
+        conn.execute(CELLS_SQL.format(table=table, key=key, scope=scope), params)
+        if deleted_by is not None:
+            conn.execute(DELETED_CELLS_SQL.format(table=table), (deleted_by,))
+        columns = {"table": table, "key": key, "value": value, "dim": dim, "name": name, "category": category}
+        frames.append(read_sql(conn, VALUES_SQL.format(**columns)))
+        keys.append(read_sql(conn, CELL_KEYS_SQL.format(**columns)))
+    conn.execute("DROP TABLE IF EXISTS temp._rollup_cells")
+    values, keys = pd.concat(frames, ignore_index=True), pd.concat(keys, ignore_index=True)
+    cells = summarize(values) if len(values) else pd.DataFrame(columns=[*CELL_KEY, *STAT_COLUMNS])
+
+    empty = keys[~pd.MultiIndex.from_frame(keys[CELL_KEY]).isin(pd.MultiIndex.from_frame(cells[CELL_KEY]))]
+    conn.executemany(f"DELETE FROM agg_rollup WHERE {' AND '.join(f'{c} = ?' for c in CELL_KEY)}",
+                     empty[CELL_KEY].itertuples(index=False, name=None))
+    if cells.empty:
+        return 0
+    columns = [*CELL_KEY, *STAT_COLUMNS]
+    conn.executemany(
+        f"""INSERT INTO agg_rollup ({", ".join(columns)}, refreshed_batch_id)
+            VALUES ({", ".join("?" * len(columns))}, ?)
+            ON CONFLICT({", ".join(CELL_KEY)}) DO UPDATE SET
+                {", ".join(f"{c} = excluded.{c}" for c in STAT_COLUMNS)},
+                refreshed_batch_id = excluded.refreshed_batch_id""",
+        zip(*(cells[col].tolist() for col in columns), [batch_id] * len(cells)),
+    )
+    return len(cells)
+
+
+def sync_all_companies(conn):
+    """Add companies registered since the last refresh to group 1."""
+    conn.execute("""INSERT OR IGNORE INTO company_group_member (group_id, company_id)
+                    SELECT ?, company_id FROM dim_company""", (ALL_COMPANIES,))
+
+
+def refresh_rollup(conn, batch_id=None):
+    """
+    Bring agg_rollup up to date in one transaction. With a batch id only
+    the cells that batch's facts and ratios (written or deleted) feed are
+    recomputed; without one the cube is rebuilt. Returns the number of
+    cells written.
+    """
+    with conn:
+        sync_all_companies(conn)
+        if batch_id is None:
+            conn.execute("DELETE FROM agg_rollup")
+            return _refresh(conn, "1 = 1", (), None)
+        return _refresh(conn, "f.load_batch_id = ?", (batch_id,), batch_id, deleted_by=batch_id)
+
+
+def define_group(conn, group_name, tickers, description=None):
+    """
+    Create (or redefine) a company group from tickers already in
+    dim_company and rebuild its cells. Returns its group_id.
+    """
+    tickers = [normalize_ticker(t) for t in tickers]
+    companies = dict(conn.execute("SELECT ticker, company_id FROM dim_company").fetchall())
+    unknown = [t for t in tickers if t not in companies]
+    if unknown:
+        raise ValueError(f"Not in dim_company: {', '.join(unknown)}")
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO dim_company_group (group_name) VALUES (?)", (group_name,))
+        group_id = conn.execute("SELECT group_id FROM dim_company_group WHERE group_name = ?",
+                                (group_name,)).fetchone()[0]
+        if description is not None:
+            conn.execute("UPDATE dim_company_group SET description = ? WHERE group_id = ?", (description, group_id))
+        conn.execute("DELETE FROM company_group_member WHERE group_id = ?", (group_id,))
+        conn.executemany("INSERT OR IGNORE INTO company_group_member (group_id, company_id) VALUES (?, ?)",
+                         [(group_id, companies[t]) for t in tickers])
+        conn.execute("DELETE FROM agg_rollup WHERE group_id = ?", (group_id,))
+        _refresh(conn, "m.group_id = ?", (group_id,), None)
+    return group_id
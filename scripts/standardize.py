@@ -0,0 +1,115 @@
+"""
+Statement Standardization (vectorized)
+======================================
+Turns raw yfinance statements (line items × period-end dates) into the
+Excel-ready layout used by data/processed/: one row per fiscal year, one
+column per line item, values in USD millions.
+
+Works on any number of tickers in one call: every ticker's statement is
+concatenated side by side once, fiscal years are derived from the whole
+column index at once and the frame is transposed a single time. The key
+metrics summary is computed column-wise on the resulting wide frames.
+
+Used by 01_extract_paypal_data.py (single ticker) and by
+bench_standardize.py (synthetic 1,000-ticker universe).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Key metrics summary: output column → (numerator, denominator) on the
+# (Ticker, Fiscal Year) wide frames. Denominator None = plain $M value.
+METRIC_SOURCES = {
+    "Revenue ($M)": ("Total Revenue", None),
+    "Net Income ($M)": ("Net Income", None),
+    "Gross Margin (%)": ("Gross Profit", "Total Revenue"),
+    "Operating Margin (%)": ("Operating Income", "Total Revenue"),
+    "Net Margin (%)": ("Net Income", "Total Revenue"),
+    "ROE (%)": ("Net Income", "Stockholders Equity"),
+    "ROA (%)": ("Net Income", "Total Assets"),
+    "Total Assets ($M)": ("Total Assets", None),
+    "Equity ($M)": ("Stockholders Equity", None),
+}
+
+
+def to_wide(statements):
+    """
+    Reshape {ticker: raw statement} into one frame indexed by
+    (Ticker, Fiscal Year) with one column per line item (raw USD).
+    Returns None when no ticker has data.
+    """
+    frames = {t: df for t, df in statements.items() if df is not None and not df.empty}
+    if not frames:
+        return None
+
+    # Line items × (Ticker, period end) — one concat for the whole universe
+    combined = pd.concat(frames, axis=1, names=["Ticker", "Period End"])
+
+    period_ends = combined.columns.get_level_values("Period End")
+    parsed = pd.to_datetime(period_ends, errors="coerce")
+    years = np.where(parsed.isna(), period_ends.astype(str), parsed.strftime("%Y"))
+
+    combined.columns = pd.MultiIndex.from_arrays(
+        [combined.columns.get_level_values("Ticker"), years],
+        names=["Ticker", "Fiscal Year"],
+    )
+    wide = combined.T
+    wide.columns.name = None
+    return wide
+
+
+def _metric_column(income, balance, numerator, denominator):
+    """One metrics-summary column, computed for every (ticker, year) at once."""
+    def item(name):
+        for frame in (income, balance):
+            if frame is not None and name in frame.columns:
+                return frame[name].astype(float)
+        return pd.Series(np.nan, index=income.index)
+
+    num = item(numerator)
+    if denominator is None:
+        return (num / 1e6).round(2)
+    den = item(denominator)
+    return (num / den.where(den != 0) * 100).round(1)
+
+
+def build_standardized_outputs(income_statements, balance_sheets, cash_flows):
+    """
+    Standardize all three statements and build the key metrics summary
+    for every ticker in one pass.
+
+    Each argument is {ticker: raw yfinance statement}. Returns a dict with
+    "income_statement", "balance_sheet", "cash_flow" (values in $M, sorted
+    by ticker then year) and "key_metrics_summary" (latest year first, as
+    in the original single-ticker output). Missing statements map to None.
+    """
+    wide = {
+        "income_statement": to_wide(income_statements),
+        "balance_sheet": to_wide(balance_sheets),
+        "cash_flow": to_wide(cash_flows),
+    }
+
+    outputs = {
+        name: frame.div(1e6).round(2).sort_index() if frame is not None else None
+        for name, frame in wide.items()
+    }
+
+    income, balance = wide["income_statement"], wide["balance_sheet"]
+    outputs["key_metrics_summary"] = None
+    if income is not None and balance is not None and wide["cash_flow"] is not None:
+        # Balance sheet values only count for years the income statement covers
+        balance = balance[~balance.index.duplicated(keep="first")].reindex(income.index)
+        metrics = pd.DataFrame(
+            {
+                label: _metric_column(income, balance, num, den)
+                for label, (num, den) in METRIC_SOURCES.items()
+            },
+            index=income.index,
+        )
+        order = np.lexsort((
+            -pd.to_numeric(metrics.index.get_level_values("Fiscal Year"), errors="coerce"),
+            metrics.index.get_level_values("Ticker"),
+        ))
+        outputs["key_metrics_summary"] = metrics.iloc[order]
+
+    return outputs
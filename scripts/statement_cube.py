@@ -0,0 +1,197 @@
+"""
+Universe Statement Cube Builder
+===============================
+Builds the company × fiscal year × line item cube for a whole universe of
+SEC filers from XBRL company facts, using the same tag preferences as
+01b_extract_sec_edgar.py (first tag with a 10-K full-year value wins).
+
+- The universe is sorted by CIK and split into contiguous CIK ranges;
+  each range is one task for a process pool.
+- The parent allocates one NaN-filled float64 array up front and each
+  finished shard is copied into its slice — no DataFrame concatenation.
+- Payloads come from the raw archive (raw_archive.py) by default, opened
+  once per worker process, so a rebuild never re-downloads; pass
+  `load_payload` to use another source.
+
+Usage:
+    cube = build_statement_cube(ciks, years=range(2010, 2025), workers=8)
+    cube.statement("0001633917", "income_statement")    # 01b-shaped frame
+    cube.to_frame()                                      # long format
+"""
+
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from cik_index import format_cik
+from raw_archive import RawArchive
+
+_sec = importlib.import_module("01b_extract_sec_edgar")
+
+STATEMENT_TAGS = {
+    "income_statement": _sec.INCOME_STATEMENT_TAGS,
+    "balance_sheet": _sec.BALANCE_SHEET_TAGS,
+    "cash_flow": _sec.CASH_FLOW_TAGS,
+}
+LINE_ITEMS = [(stmt, item) for stmt, tags in STATEMENT_TAGS.items() for item in tags]
+UNIT_PREFERENCE = ["USD", "USD/shares", "shares"]
+
+
+# =============================================================================
+# PER-COMPANY EXTRACTION
+# =============================================================================
+def _fiscal_year_end_month(us_gaap):
+    """Most common period-end month across the company's 10-K full-year facts."""
+    months = np.zeros(13, dtype=np.int64)
+    for tags in STATEMENT_TAGS.values():
+        for candidates in tags.values():
+            for tag in candidates:
+                for entries in us_gaap.get(tag, {}).get("units", {}).values():
+                    for entry in entries:
+                        if entry.get("form") == "10-K" and entry.get("fp") == "FY" and entry.get("end"):
+                            months[int(entry["end"][5:7])] += 1
+    return int(months.argmax()) if months.any() else 12
+
+
+def extract_company(facts_data, years):
+    """
+    One company's (years × line items) block. Same selection rules as
+    01b.extract_annual_value, applied to all years in a single pass over
+    each tag's entries instead of one pass per year.
+    """
+    year_pos = {year: i for i, year in enumerate(years)}
+    block = np.full((len(years), len(LINE_ITEMS)), np.nan)
+    us_gaap = facts_data.get("facts", {}).get("us-gaap", {})
+    fy_end_month = _fiscal_year_end_month(us_gaap)
+
+    for col, (stmt, item) in enumerate(LINE_ITEMS):
+        missing = set(year_pos)
+        for tag in STATEMENT_TAGS[stmt][item]:
+            if not missing:
+                break
+            units_data = us_gaap.get(tag, {}).get("units", {})
+            found = {}
+            for unit_key in UNIT_PREFERENCE:
+                for entry in units_data.get(unit_key, ()):
+                    end = entry.get("end", "")
+                    if entry.get("form") != "10-K" or len(end) < 7:
+                        continue
+                    fp = entry.get("fp", "")
+                    if fp != "FY" and "Q" in fp:
+                        continue
+                    year = int(end[:4])
+                    if year in missing and year not in found and int(end[5:7]) == fy_end_month:
+                        found[year] = entry.get("val")
+            for year, value in found.items():
+                if value is not None:
+                    block[year_pos[year], col] = value
+                    missing.discard(year)
+    return block
+
+
+_archives = {}  # (pid, archive root) → RawArchive; one per worker process, not one per company
+
+
+def _process_archive(archive_root=None):
+    """This process's RawArchive for `archive_root`; keyed by pid so forked workers never share a handle."""
+    key = (os.getpid(), archive_root)
+    archive = _archives.get(key)
+    if archive is None:
+        archive = _archives[key] = RawArchive(archive_root) if archive_root else RawArchive()
+    return archive
+
+
+def load_archived_payload(cik, archive_root=None):
+    """Latest archived XBRL company facts for a CIK (see 01b fetch_company_facts)."""
+    return _process_archive(archive_root).get_json(_sec.SEC_ARCHIVE_SOURCE, format_cik(cik))
+
+
+def _build_shard(shard_ciks, years, load_payload):
+    """Worker task: one contiguous CIK range → (companies × years × items) array."""
+    shard = np.full((len(shard_ciks), len(years), len(LINE_ITEMS)), np.nan)
+    for i, cik in enumerate(shard_ciks):
+        facts_data = load_payload(cik)
+        if facts_data:
+            shard[i] = extract_company(facts_data, years)
+    return shard
+
+
+# =============================================================================
+# CUBE
+# =============================================================================
+class StatementCube:
+    """Dense company × fiscal year × line item array with its axis labels."""
+
+    def __init__(self, ciks, years, values):
+        self.ciks = ciks
+        self.years = years
+        self.items = LINE_ITEMS
+        self.values = values
+        self._cik_pos = {cik: i for i, cik in enumerate(ciks)}
+
+    def statement(self, cik, statement_type):
+        """One company's statement in the 01b layout (index FY2019…, raw USD)."""
+        cols = [i for i, (stmt, _) in enumerate(self.items) if stmt == statement_type]
+        df = pd.DataFrame(
+            self.values[self._cik_pos[format_cik(cik)]][:, cols],
+            index=[f"FY{year}" for year in self.years],
+            columns=[self.items[i][1] for i in cols],
+        )
+        df.index.name = "Fiscal Year"
+        return df
+
+    def to_frame(self, dropna=True):
+        """Long format: cik, fiscal_year, statement_type, item_name, value."""
+        n_c, n_y, n_i = self.values.shape
+        frame = pd.DataFrame({
+            "cik": np.repeat(np.asarray(self.ciks), n_y * n_i),
+            "fiscal_year": np.tile(np.repeat(np.asarray(self.years), n_i), n_c),
+            "statement_type": np.tile([stmt for stmt, _ in self.items], n_c * n_y),
+            "item_name": np.tile([item for _, item in self.items], n_c * n_y),
+            "value": self.values.reshape(-1),
+        })
+        return frame.dropna(subset=["value"]) if dropna else frame
+
+    def coverage(self):
+        """Share of populated cells per line item."""
+        filled = (~np.isnan(self.values)).mean(axis=(0, 1))
+        return pd.Series(filled, index=pd.MultiIndex.from_tuples(self.items))
+
+
+def shard_by_cik(ciks, n_shards):
+    """Split sorted CIKs into contiguous, near-equal ranges."""
+    return [list(chunk) for chunk in np.array_split(np.asarray(ciks, dtype=object), n_shards) if len(chunk)]
+
+
+def build_statement_cube(ciks, years, workers=None, load_payload=load_archived_payload, shards_per_worker=4):
+    """
+    Build the cube for `ciks` over `years`. Shards run in a process pool of
+    `workers` processes (default: all cores); workers=1 runs in-process.
+    `load_payload(cik)` must be picklable (a module-level function or a
+    functools.partial of one).
+    """
+    ciks = sorted(format_cik(c) for c in ciks)
+    years = list(years)
+    workers = workers or os.cpu_count() or 1
+    values = np.full((len(ciks), len(years), len(LINE_ITEMS)), np.nan)
+
+    shards = shard_by_cik(ciks, max(1, workers * shards_per_worker))
+    offsets = np.cumsum([0] + [len(s) for s in shards[:-1]])
+
+    if workers == 1:
+        for offset, shard in zip(offsets, shards):
+            values[offset:offset + len(shard)] = _build_shard(shard, years, load_payload)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_build_shard, shard, years, load_payload): (offset, len(shard))
+                for offset, shard in zip(offsets, shards)
+            }
+            for future in as_completed(futures):
+                offset, size = futures[future]
+                values[offset:offset + size] = future.result()
+
+    return StatementCube(ciks, years, values)
@@ -0,0 +1,189 @@
+"""
+Stock Return Analytics
+======================
+fact_stock_returns holds what every price consumer used to recompute from
+fact_stock_bar: daily log returns of adj_close, annualized rolling
+volatility (20 / 60 / 252 trading days), 20 / 50 / 200-day moving
+averages, the running peak and the drawdown from it.
+
+Refreshes are incremental. For each company a load batch touched, only
+days from its earliest changed (or deleted) bar onwards are recomputed,
+reading the LOOKBACK bars before that day as window context and carrying
+the stored running peak forward. Appending a day therefore reads ~253 bars and writes
+one row, however long the history. Companies with prices but no return
+rows yet get their full history.
+
+All touched companies are computed in one vectorized pass over their
+concatenated (company, day)-sorted series: rolling sums are differences
+of cumulative sums, the running peak a grouped cumulative max. Days are
+fact_stock_bar's day numbers until the rows are written.
+
+Usage:
+    from stock_returns import refresh_stock_returns
+    refresh_stock_returns(conn, batch_id)     # days changed by one load
+    refresh_stock_returns(conn)               # every company, full history
+"""
+
+import numpy as np
+import pandas as pd
+
+from db_backends import day_dates, day_number, read_sql
+
+VOL_WINDOWS = (20, 60, 252)
+MA_WINDOWS = (20, 50, 200)
+TRADING_DAYS = 252                  # annualization
+# Bars read before the first recomputed day: a 252-return window needs 252 prior prices
+LOOKBACK = max(*VOL_WINDOWS, *MA_WINDOWS)
+FIRST_DAY = day_number("1900-01-01")    # read_from for companies recomputed from their first bar
+
+RETURN_COLUMNS = ["log_return", *(f"vol_{w}d" for w in VOL_WINDOWS), *(f"ma_{w}d" for w in MA_WINDOWS),
+                  "running_peak", "drawdown"]
+
+
+# =============================================================================
+# COMPUTE
+# =============================================================================
+def _rolling_sum(values, window, valid):
+    """Sum of the last `window` values at each row (NaN where not `valid`)."""
+    totals = np.concatenate([[0.0], np.cumsum(values)])
+    end = np.arange(1, len(values) + 1)
+    return np.where(valid, totals[end] - totals[np.maximum(end - window, 0)], np.nan)
+
+
+def compute_returns(prices, from_days, prior_peaks):
+    """
+    Return analytics for the rows each company needs rewritten.
+
+    prices: company_id, trade_day, price sorted by (company_id, trade_day),
+    covering each company from its first bar or from LOOKBACK bars before
+    its first day to write. from_days: {company_id: first trade_day to
+    write, or None for all}. prior_peaks: {company_id: running peak before
+    that day}. Returns company_id, trade_day and RETURN_COLUMNS.
+    """
+    company = prices["company_id"].to_numpy()
+    price = prices["price"].to_numpy(dtype=float)
+    n = len(price)
+    first = np.r_[True, company[1:] != company[:-1]] if n else np.zeros(0, dtype=bool)
+    position = np.arange(n) - np.maximum.accumulate(np.where(first, np.arange(n), 0))
+
+    log_return = np.full(n, np.nan)
+    log_return[1:] = np.log(price[1:] / price[:-1])
+    log_return[first] = np.nan
+    out = {"log_return": log_return}
+
+    # Returns exist from a company's second row on, so a w-return window is full at position w
+    r = np.nan_to_num(log_return)
+    for window in VOL_WINDOWS:
+        s1 = _rolling_sum(r, window, position >= window)
+        s2 = _rolling_sum(r * r, window, position >= window)
+        variance = np.maximum(s2 - s1 * s1 / window, 0.0) / (window - 1)
+        out[f"vol_{window}d"] = np.sqrt(variance * TRADING_DAYS)
+    for window in MA_WINDOWS:
+        out[f"ma_{window}d"] = _rolling_sum(price, window, position >= window - 1) / window
+
+    starts = prices["company_id"].map(from_days).astype(float)
+    write = (starts.isna() | (prices["trade_day"] >= starts.fillna(-np.inf))).to_numpy()
+    peak = pd.Series(np.where(write, price, -np.inf)).groupby(company).cummax().to_numpy()
+    prior = prices["company_id"].map(prior_peaks).astype(float).fillna(-np.inf).to_numpy()
+    out["running_peak"] = np.maximum(peak, prior)
+    out["drawdown"] = price / out["running_peak"] - 1
+
+    result = prices[["company_id", "trade_day"]].assign(**out)
+    return result[write].reset_index(drop=True)
+
+
+# =============================================================================
+# REFRESH
+# =============================================================================
+def _targets(conn, batch_id):
+    """{company_id: first trade_day to recompute (None = full history)}: the first bar written or deleted."""
+    if batch_id is None:
+        return {cid: None for (cid,) in conn.execute("SELECT DISTINCT company_id FROM fact_stock_bar")}
+    targets = dict(conn.execute(
+        """SELECT company_id, MIN(trade_day) FROM (
+               SELECT company_id, trade_day FROM fact_stock_bar WHERE load_batch_id = :b
+               UNION ALL
+               SELECT company_id, period_id FROM etl_deleted_fact WHERE batch_id = :b AND fact_table = 'fact_stock_bar'
+           ) GROUP BY company_id""",
+        {"b": batch_id},
+    ).fetchall())
+    missing = conn.execute(
+        """SELECT c.company_id FROM dim_company c
+           WHERE EXISTS (SELECT 1 FROM fact_stock_bar p WHERE p.company_id = c.company_id)
+             AND NOT EXISTS (SELECT 1 FROM fact_stock_returns r WHERE r.company_id = c.company_id)"""
+    ).fetchall()
+    targets.update({cid: None for (cid,) in missing})
+    return targets
+
+
+def _context(conn, targets):
+    """
+    Per company: (first day to read, first day to write, prior running
+    peak). A company without a stored row before its first changed day is
+    recomputed from its first bar.
+    """
+    context = {}
+    for company_id, from_day in targets.items():
+        prior = None
+        if from_day is not None:
+            prior = conn.execute(
+                """SELECT running_peak FROM fact_stock_returns
+                   WHERE company_id = ? AND trade_date < ? ORDER BY trade_date DESC LIMIT 1""",
+                (company_id, day_dates([from_day])[0]),
+            ).fetchone()
+        if prior is None:
+            context[company_id] = (None, None, None)
+            continue
+        read_from = conn.execute(
+            """SELECT trade_day FROM fact_stock_bar
+               WHERE company_id = ? AND trade_day < ? ORDER BY trade_day DESC LIMIT 1 OFFSET ?""",
+            (company_id, from_day, LOOKBACK),
+        ).fetchone()
+        context[company_id] = (read_from[0] if read_from else None, from_day, prior[0])
+    return context
+
+
+def refresh_stock_returns(conn, batch_id=None):
+    """
+    Bring fact_stock_returns up to date in one transaction (see the module
+    docstring). Returns (rows written, companies refreshed).
+    """
+    with conn:
+        context = _context(conn, _targets(conn, batch_id))
+        if not context:
+            return 0, 0
+        conn.execute("DROP TABLE IF EXISTS temp._returns_from")
+        conn.execute("CREATE TEMP TABLE _returns_from (company_id INTEGER, read_from INTEGER)")
+        conn.executemany("INSERT INTO _returns_from (company_id, read_from) VALUES (?, ?)",
+                         [(cid, FIRST_DAY if read_from is None else read_from) for cid, (read_from, _, _) in context.items()])
+        prices = read_sql(
+            conn,
+            """SELECT p.company_id, p.trade_day, COALESCE(p.adj_close, p.close_price) AS price
+               FROM _returns_from t
+               JOIN fact_stock_bar p ON p.company_id = t.company_id AND p.trade_day >= t.read_from
+               ORDER BY p.company_id, p.trade_day""",
+        )
+        conn.execute("DROP TABLE IF EXISTS temp._returns_from")
+
+        rows = compute_returns(
+            prices,
+            {cid: from_day for cid, (_, from_day, _) in context.items()},
+            {cid: peak for cid, (_, _, peak) in context.items() if peak is not None},
+        )
+        rows = rows.assign(trade_date=day_dates(rows["trade_day"]))
+        # Recomputed days replace everything stored from there on (days whose bars were deleted go)
+        conn.executemany(
+            "DELETE FROM fact_stock_returns WHERE company_id = ? AND trade_date >= ?",
+            [(cid, day_dates([FIRST_DAY if from_day is None else from_day])[0])
+             for cid, (_, from_day, _) in context.items()],
+        )
+        columns = ["company_id", "trade_date", *RETURN_COLUMNS]
+        # NaN binds as NULL
+        conn.executemany(
+            f"""INSERT INTO fact_stock_returns ({", ".join(columns)}, load_batch_id)
+                VALUES ({", ".join("?" * len(columns))}, ?)
+                ON CONFLICT(company_id, trade_date) DO UPDATE SET
+                    {", ".join(f"{c} = excluded.{c}" for c in RETURN_COLUMNS)}, load_batch_id = excluded.load_batch_id""",
+            zip(*(rows[col].tolist() for col in columns), [batch_id] * len(rows)),
+        )
+    return len(rows), len(context)
@@ -0,0 +1,142 @@
+"""
+Trailing-Twelve-Month Financials
+================================
+Derives the TTM scenario from quarterly Actual facts (dim_period rows with
+a quarter) with one SQL window-function statement. Every quarter end gets
+a TTM value per line item, stored in fact_financials under the TTM
+scenario at that quarter's period_id:
+
+    income statement, cash flow   sum of the four quarters ending there
+                                  (average for share counts)
+    balance sheet                 the value at the quarter end (point in time)
+
+A flow is only produced when the window holds four consecutive fiscal
+quarters; line items that are themselves ratios are left out. 02 then
+computes ratios for the TTM scenario like any other, so the TTM ratios of
+a quarter are one primary-key lookup in fact_ratios (company, TTM,
+period, ratio).
+
+Refreshes are incremental: with a batch id only companies whose quarterly
+facts that batch wrote or deleted are recomputed (their whole quarterly
+history, a few dozen rows per line item). TTM values that are no longer
+produced are deleted. TTM values are versioned like any other fact (see
+bitemporal.py). Runs on SQLite and DuckDB.
+
+Usage:
+    from ttm import refresh_ttm
+    refresh_ttm(conn, batch_id)     # companies touched by one load
+    refresh_ttm(conn)               # every company
+"""
+
+from bitemporal import knowledge_time, record_versions, retire_facts, staging_table
+
+TTM_SCENARIO = "TTM"
+AVERAGED_ITEMS = ("Shares Outstanding (Diluted)",)
+SKIPPED_ITEMS = ("Effective Tax Rate",)
+POINT_IN_TIME_STATEMENTS = ("balance_sheet",)
+
+
+def _quoted(names):
+    return ", ".join("'" + name.replace("'", "''") + "'" for name in names)
+
+
+# Companies to recompute: quarterly Actual facts written or deleted by the batch (all without one)
+SCOPE_SQL = """
+    CREATE TEMP TABLE _ttm_scope AS
+    SELECT f.company_id FROM fact_financials f
+    JOIN dim_period p ON f.period_id = p.period_id
+    WHERE (:batch IS NULL OR f.load_batch_id = :batch) AND f.scenario_id = :actual AND p.quarter IS NOT NULL
+    UNION
+    SELECT d.company_id FROM etl_deleted_fact d
+    JOIN dim_period p ON d.period_id = p.period_id
+    WHERE d.batch_id = :batch AND d.fact_table = 'fact_financials' AND d.scenario_id = :actual
+      AND p.quarter IS NOT NULL
+    UNION
+    SELECT f.company_id FROM fact_financials f WHERE :batch IS NULL AND f.scenario_id = :ttm"""
+
+# Every TTM value of those companies
+VALUES_SQL = f"""
+    CREATE TEMP TABLE _ttm_values AS
+    WITH quarterly AS (
+        SELECT ff.company_id, ff.period_id, ff.line_item_id, ff.amount,
+               dli.statement_type, dli.item_name,
+               dp.fiscal_year * 4 + dp.quarter AS seq
+        FROM fact_financials ff
+        JOIN dim_period dp ON ff.period_id = dp.period_id
+        JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+        WHERE ff.scenario_id = :actual AND dp.quarter IS NOT NULL AND ff.amount IS NOT NULL
+          AND dli.item_name NOT IN ({_quoted(SKIPPED_ITEMS)})
+          AND ff.company_id IN (SELECT company_id FROM _ttm_scope)
+    ),
+    windowed AS (
+        SELECT company_id, period_id, line_item_id, amount, statement_type, item_name,
+               SUM(amount) OVER last_four AS total,
+               AVG(amount) OVER last_four AS average,
+               COUNT(*) OVER last_four AS quarters,
+               seq - MIN(seq) OVER last_four AS span
+        FROM quarterly
+        WINDOW last_four AS (PARTITION BY company_id, line_item_id ORDER BY seq
+                            ROWS BETWEEN 3 PRECEDING AND CURRENT ROW)
+    )
+    SELECT company_id, period_id, line_item_id,
+           CASE WHEN statement_type IN ({_quoted(POINT_IN_TIME_STATEMENTS)}) THEN amount
+                WHEN item_name IN ({_quoted(AVERAGED_ITEMS)}) THEN average
+                ELSE total END AS amount,
+           CASE WHEN statement_type IN ({_quoted(POINT_IN_TIME_STATEMENTS)}) THEN 'TTM (quarter end)'
+                ELSE 'TTM (4 quarters)' END AS source
+    FROM windowed
+    WHERE statement_type IN ({_quoted(POINT_IN_TIME_STATEMENTS)}) OR (quarters = 4 AND span = 3)"""
+
+TTM_SQL = """
+    INSERT INTO fact_financials (company_id, scenario_id, period_id, line_item_id, amount, source, load_batch_id,
+                                 known_from)
+    SELECT company_id, :ttm, period_id, line_item_id, amount, source, :batch, :known_at
+    FROM _ttm_values
+    WHERE 1 = 1
+    ON CONFLICT(company_id, scenario_id, period_id, line_item_id) DO UPDATE SET
+        amount = excluded.amount, source = excluded.source, load_batch_id = excluded.load_batch_id,
+        known_from = excluded.known_from
+    WHERE amount IS NOT excluded.amount OR source IS NOT excluded.source"""
+
+# Keys of the TTM facts just upserted, for record_versions
+WRITTEN_SQL = """
+    INSERT INTO _written_facts (company_id, scenario_id, period_id, line_item_id)
+    SELECT company_id, :ttm, period_id, line_item_id FROM _ttm_values"""
+
+# Stored TTM facts of those companies that are no longer produced (an input quarter was deleted)
+STALE_SQL = """
+    INSERT INTO _retired_facts (company_id, scenario_id, period_id, line_item_id)
+    SELECT ff.company_id, ff.scenario_id, ff.period_id, ff.line_item_id
+    FROM fact_financials ff
+    WHERE ff.scenario_id = :ttm AND ff.company_id IN (SELECT company_id FROM _ttm_scope)
+      AND NOT EXISTS (SELECT 1 FROM _ttm_values t
+                      WHERE t.company_id = ff.company_id AND t.period_id = ff.period_id
+                        AND t.line_item_id = ff.line_item_id)"""
+
+
+def refresh_ttm(conn, batch_id=None):
+    """
+    Upsert TTM facts in one statement (values that did not change are not
+    rewritten) and retire the ones no longer produced. Returns the number
+    of TTM facts written or deleted.
+    """
+    scenarios = dict(conn.execute("SELECT scenario_name, scenario_id FROM dim_scenario").fetchall())
+    params = {"actual": scenarios["Actual"], "ttm": scenarios[TTM_SCENARIO], "batch": batch_id}
+    known_at = knowledge_time(conn, batch_id)
+    with conn:
+        for table in ["_ttm_scope", "_ttm_values"]:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        conn.execute(SCOPE_SQL, params)
+        conn.execute(VALUES_SQL, {"actual": params["actual"]})
+        cursor = conn.execute(TTM_SQL, {"ttm": params["ttm"], "batch": batch_id, "known_at": known_at})
+        written = max(cursor.rowcount, 0)
+        if written:
+            staging_table(conn, "_written_facts")
+            conn.execute(WRITTEN_SQL, {"ttm": params["ttm"]})
+            record_versions(conn, known_at)
+        staging_table(conn)
+        conn.execute(STALE_SQL, {"ttm": params["ttm"]})
+        written += retire_facts(conn, known_at, batch_id)
+        for table in ["_ttm_scope", "_ttm_values"]:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    return written
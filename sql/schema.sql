@@ -0,0 +1,587 @@
+-- =============================================================================
+-- PayPal (PYPL) Investment Analysis — Star Schema (SQLite)
+-- =============================================================================
+-- Dimensions: company, period, line item, ratio, scenario, driver,
+--             valuation metric, company group
+-- Facts:      financials (USD millions), ratios, daily stock prices and
+--             returns; per model run: assumptions (drivers), valuation outputs
+-- Rollups:    group x scenario x year x category aggregates for dashboard tiles
+-- Views:      income statement, ratios, assumptions, valuation (Power BI / reporting);
+--             fact_stock_price, daily bars with text dates
+--
+-- Every statement is idempotent (IF NOT EXISTS / INSERT OR IGNORE, views are
+-- dropped and recreated), so the script can be re-applied to an existing
+-- database. Columns added after a table was first created, table rebuilds
+-- and backfills are numbered migrations (MIGRATIONS in 02_load_to_sql.py,
+-- run by scripts/migrations.py around this script; applied versions are
+-- recorded in schema_version).
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- DIMENSIONS
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS dim_company (
+    company_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker          TEXT NOT NULL UNIQUE,                 -- SEC form, e.g. "PYPL", "BRK-B"
+    cik             TEXT,                                 -- zero-padded, e.g. "0001633917"; share classes
+                                                          -- (GOOG/GOOGL, BRK-A/BRK-B) share one CIK
+    company_name    TEXT,
+    fiscal_year_end_month INTEGER DEFAULT 12
+);
+
+CREATE TABLE IF NOT EXISTS dim_period (
+    period_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    fiscal_year     INTEGER NOT NULL,
+    quarter         INTEGER,                            -- NULL for annual, 1-4 for fiscal quarters
+    period_type     TEXT NOT NULL CHECK(period_type IN ('actual', 'forecast')),
+    period_label    TEXT NOT NULL,                       -- e.g., "FY2023", "FY2025E", "FY2024Q3"
+    start_date      DATE,
+    end_date        DATE,
+    UNIQUE(fiscal_year, quarter, period_type)
+);
+
+CREATE TABLE IF NOT EXISTS dim_line_item (
+    line_item_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    statement_type  TEXT NOT NULL CHECK(statement_type IN ('income_statement', 'balance_sheet', 'cash_flow')),
+    item_name       TEXT NOT NULL,                       -- e.g., "Total Revenue", "Total Assets"
+    item_category   TEXT,                                -- e.g., "Revenue", "Operating Expenses", "Current Assets"
+    display_order   INTEGER NOT NULL,                    -- For consistent ordering in reports
+    is_subtotal     BOOLEAN DEFAULT FALSE,               -- TRUE for totals/subtotals
+    sign_convention TEXT DEFAULT 'positive',              -- 'positive' or 'negative' (expenses)
+    UNIQUE(statement_type, item_name)
+);
+
+CREATE TABLE IF NOT EXISTS dim_ratio (
+    ratio_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    ratio_name      TEXT NOT NULL UNIQUE,                 -- e.g., "Gross Margin", "Current Ratio"
+    ratio_category  TEXT NOT NULL CHECK(ratio_category IN ('profitability', 'liquidity', 'leverage', 'efficiency', 'valuation', 'growth')),
+    formula_desc    TEXT,                                 -- Human-readable formula
+    format_type     TEXT DEFAULT 'percentage',            -- 'percentage', 'ratio', 'multiple', 'days'
+    benchmark_low   REAL,                                 -- Industry benchmark range
+    benchmark_high  REAL
+);
+
+CREATE TABLE IF NOT EXISTS dim_scenario (
+    scenario_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    scenario_name   TEXT NOT NULL UNIQUE,                 -- "Actual", "Base Case", "Bull Case", "Bear Case", "TTM"
+    description     TEXT,
+    probability     REAL,                                 -- Probability weight (e.g., 0.50 for base)
+    color_code      TEXT                                  -- For Power BI visualization
+);
+
+-- -----------------------------------------------------------------------------
+-- FACTS
+-- -----------------------------------------------------------------------------
+-- Every fact table is clustered on its natural key (WITHOUT ROWID), company
+-- first: one issuer's facts are contiguous (scenario, then period, then
+-- item), so per-company reads are a single range scan however many issuers
+-- the database holds. Cross-company reads go through the covering item
+-- indexes below. Layout measured with scripts/bench_query_plans.py;
+-- databases in an older layout are rebuilt in place by migration 2 in 02
+-- (see set_aside_legacy_tables).
+CREATE TABLE IF NOT EXISTS fact_financials (
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    scenario_id     INTEGER NOT NULL REFERENCES dim_scenario(scenario_id),
+    period_id       INTEGER NOT NULL REFERENCES dim_period(period_id),
+    line_item_id    INTEGER NOT NULL REFERENCES dim_line_item(line_item_id),
+    amount          REAL,                                 -- USD Millions
+    source          TEXT,                                 -- "10-K FY2023", "yfinance", "model assumption"
+    load_batch_id   INTEGER REFERENCES etl_load_batch(batch_id),  -- batch that last changed the row
+    known_from      TEXT,                                 -- knowledge time: when this amount was first loaded
+    PRIMARY KEY (company_id, scenario_id, period_id, line_item_id)
+) WITHOUT ROWID;
+
+-- Every version of every fact_financials value, bitemporal: valid time is
+-- the period, knowledge time the [known_from, known_to) interval in which
+-- the warehouse held that amount (known_to NULL = current). Written with
+-- the facts by scripts/bitemporal.py, so restatements close the previous
+-- version instead of overwriting it. The key is the as-of index: a company
+-- and scenario's statements as known at any date are one range scan.
+CREATE TABLE IF NOT EXISTS fact_financials_history (
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    scenario_id     INTEGER NOT NULL REFERENCES dim_scenario(scenario_id),
+    period_id       INTEGER NOT NULL REFERENCES dim_period(period_id),
+    line_item_id    INTEGER NOT NULL REFERENCES dim_line_item(line_item_id),
+    known_from      TEXT NOT NULL,                        -- ISO timestamp (load batch start)
+    known_to        TEXT,                                 -- superseded at; NULL while current
+    amount          REAL,
+    source          TEXT,
+    load_batch_id   INTEGER REFERENCES etl_load_batch(batch_id),
+    PRIMARY KEY (company_id, scenario_id, period_id, line_item_id, known_from)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fact_ratios (
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    scenario_id     INTEGER NOT NULL REFERENCES dim_scenario(scenario_id),
+    period_id       INTEGER NOT NULL REFERENCES dim_period(period_id),
+    ratio_id        INTEGER NOT NULL REFERENCES dim_ratio(ratio_id),
+    value           REAL,
+    load_batch_id   INTEGER REFERENCES etl_load_batch(batch_id),
+    PRIMARY KEY (company_id, scenario_id, period_id, ratio_id)
+) WITHOUT ROWID;
+
+-- Daily bars, compact: dates are integer day numbers (days since
+-- 1970-01-01) and every column is INTEGER or REAL, so a row is a few dozen
+-- bytes and one company's history is one contiguous range of the key.
+-- fact_stock_price (VIEWS below) shows them with YYYY-MM-DD trade dates.
+CREATE TABLE IF NOT EXISTS fact_stock_bar (
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    trade_day       INTEGER NOT NULL,                     -- date(2440587.5 + trade_day) = YYYY-MM-DD
+    open_price      REAL,
+    high_price      REAL,
+    low_price       REAL,
+    close_price     REAL,
+    adj_close       REAL,
+    volume          INTEGER,
+    load_batch_id   INTEGER REFERENCES etl_load_batch(batch_id),
+    PRIMARY KEY (company_id, trade_day)
+) WITHOUT ROWID;
+
+-- Derived from fact_stock_bar by scripts/stock_returns.py (log returns of
+-- adj_close, annualized rolling volatility, moving averages, drawdown);
+-- refreshed by 02 for the days each load batch changed
+CREATE TABLE IF NOT EXISTS fact_stock_returns (
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    trade_date      DATE NOT NULL,
+    log_return      REAL,                                 -- ln(adj_close / previous adj_close)
+    vol_20d         REAL,                                 -- stdev of log returns x sqrt(252); NULL until the window fills
+    vol_60d         REAL,
+    vol_252d        REAL,
+    ma_20d          REAL,                                 -- simple moving averages of adj_close
+    ma_50d          REAL,
+    ma_200d         REAL,
+    running_peak    REAL,                                 -- highest adj_close to date
+    drawdown        REAL,                                 -- adj_close / running_peak - 1 (0 at a new high)
+    load_batch_id   INTEGER REFERENCES etl_load_batch(batch_id),
+    PRIMARY KEY (company_id, trade_date)
+) WITHOUT ROWID;
+
+-- -----------------------------------------------------------------------------
+-- MODEL RUNS (scripts/model_runs.py)
+-- -----------------------------------------------------------------------------
+-- Every model or scenario run's driver set and valuation outputs. Runs are
+-- recorded in sets (the three scenario cases, a WACC x TGR grid, a Monte
+-- Carlo draw) and keyed by integer run_id; driver and metric names are
+-- dictionary-encoded in dim_driver / dim_valuation_metric, so a fact row is
+-- four small integers and a REAL. Runs in a set with a base_run_id store only
+-- the drivers that differ from that run; the rest are inherited from it.
+CREATE TABLE IF NOT EXISTS dim_driver (
+    driver_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    driver_name     TEXT NOT NULL UNIQUE,                 -- e.g., "revenue_growth", "wacc"
+    driver_category TEXT,                                 -- e.g., "revenue", "costs", "capex", "discount_rate"
+    unit            TEXT DEFAULT 'fraction',              -- 'fraction' (0.03 = 3%), 'usd_millions', 'usd', 'shares_millions'
+    description     TEXT                                  -- Justification / source of the driver
+);
+
+CREATE TABLE IF NOT EXISTS dim_valuation_metric (
+    metric_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric_name     TEXT NOT NULL UNIQUE,                 -- e.g., "enterprise_value", "implied_share_price"
+    unit            TEXT,
+    description     TEXT
+);
+
+CREATE TABLE IF NOT EXISTS model_run_set (
+    run_set_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_kind        TEXT NOT NULL CHECK(run_kind IN ('scenario', 'grid', 'monte_carlo')),
+    label           TEXT,                                 -- e.g., "scenario cases", "mc seed=7"
+    base_run_id     INTEGER REFERENCES model_run(run_id), -- runs store only drivers that differ from it
+    created_at      TEXT NOT NULL,
+    n_runs          INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS model_run (
+    run_id          INTEGER PRIMARY KEY,                  -- allocated in one contiguous block per set
+    run_set_id      INTEGER NOT NULL REFERENCES model_run_set(run_set_id),
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    scenario_id     INTEGER NOT NULL REFERENCES dim_scenario(scenario_id)
+);
+
+-- Clustered on run_id: one run's drivers (or outputs) are contiguous
+CREATE TABLE IF NOT EXISTS fact_assumptions (
+    run_id          INTEGER NOT NULL REFERENCES model_run(run_id),
+    driver_id       INTEGER NOT NULL REFERENCES dim_driver(driver_id),
+    period_id       INTEGER NOT NULL,                     -- dim_period key; 0 for run-level drivers (WACC, TGR)
+    value           REAL NOT NULL,
+    PRIMARY KEY (run_id, driver_id, period_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fact_valuation (
+    run_id          INTEGER NOT NULL REFERENCES model_run(run_id),
+    metric_id       INTEGER NOT NULL REFERENCES dim_valuation_metric(metric_id),
+    value           REAL NOT NULL,
+    PRIMARY KEY (run_id, metric_id)
+) WITHOUT ROWID;
+
+-- -----------------------------------------------------------------------------
+-- ROLLUP CUBE (scripts/rollup.py)
+-- -----------------------------------------------------------------------------
+-- Pre-aggregated answers for dashboard tiles: one row per (company group,
+-- scenario, fiscal year, item category, measure) summarizing the measure
+-- over the group's companies. Measures are annual line items (category =
+-- dim_line_item.item_category) and ratios (category = dim_ratio.ratio_category).
+-- "Median operating margin across peers in FY2024" is one key lookup, a
+-- category's measures one range of the key. Refreshed by 02 for the cells
+-- each load batch touched. Group 1, "All companies", holds every company.
+CREATE TABLE IF NOT EXISTS dim_company_group (
+    group_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_name      TEXT NOT NULL UNIQUE,                 -- "All companies", e.g. "Payments peers"
+    description     TEXT
+);
+
+CREATE TABLE IF NOT EXISTS company_group_member (
+    group_id        INTEGER NOT NULL REFERENCES dim_company_group(group_id),
+    company_id      INTEGER NOT NULL REFERENCES dim_company(company_id),
+    PRIMARY KEY (group_id, company_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS agg_rollup (
+    group_id        INTEGER NOT NULL REFERENCES dim_company_group(group_id),
+    scenario_id     INTEGER NOT NULL REFERENCES dim_scenario(scenario_id),
+    fiscal_year     INTEGER NOT NULL,
+    item_category   TEXT NOT NULL,                        -- line item or ratio category, e.g. "Operating Expenses"
+    measure         TEXT NOT NULL,                        -- item_name or ratio_name
+    n_companies     INTEGER NOT NULL,                     -- companies in the group with a value
+    total           REAL,
+    min_value       REAL,
+    max_value       REAL,
+    median          REAL,
+    sketch          BLOB,                                 -- quantile sketch (float64 points), see rollup.percentile()
+    refreshed_batch_id INTEGER,
+    PRIMARY KEY (group_id, scenario_id, fiscal_year, item_category, measure)
+) WITHOUT ROWID;
+
+-- -----------------------------------------------------------------------------
+-- LOAD METADATA (incremental refresh, see 02_load_to_sql.py --incremental)
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS etl_load_batch (
+    batch_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode            TEXT NOT NULL CHECK(mode IN ('full', 'incremental')),
+    started_at      TEXT NOT NULL,
+    finished_at     TEXT,
+    status          TEXT NOT NULL DEFAULT 'running' CHECK(status IN ('running', 'complete', 'failed')),
+    rows_written    INTEGER DEFAULT 0,                     -- facts inserted or changed
+    rows_unchanged  INTEGER DEFAULT 0                      -- facts seen but identical to stored values
+);
+
+CREATE TABLE IF NOT EXISTS etl_source_file (
+    source_name     TEXT PRIMARY KEY,                      -- e.g., "combined_income_statement", "stock_prices"
+    content_hash    TEXT NOT NULL,                         -- SHA-256 of the file last loaded
+    batch_id        INTEGER NOT NULL REFERENCES etl_load_batch(batch_id),
+    loaded_at       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS etl_block_hash (
+    source_name     TEXT NOT NULL,
+    block_key       TEXT NOT NULL,                         -- line_item_id for statements, year for prices
+    content_hash    TEXT NOT NULL,
+    batch_id        INTEGER NOT NULL REFERENCES etl_load_batch(batch_id),
+    PRIMARY KEY (source_name, block_key)
+) WITHOUT ROWID;
+
+-- Fact keys a batch deleted because their source no longer has them (a blanked
+-- cell, a dropped line item or trading day). Incremental refreshes of derived
+-- tables (ratios, TTM, mv_*, agg_rollup, stock returns) treat them like keys
+-- the batch wrote. Price bars: scenario_id and member_id 0, period_id = trade_day.
+CREATE TABLE IF NOT EXISTS etl_deleted_fact (
+    batch_id        INTEGER NOT NULL REFERENCES etl_load_batch(batch_id),
+    fact_table      TEXT NOT NULL,                         -- fact_financials, fact_ratios, fact_stock_bar
+    company_id      INTEGER NOT NULL,
+    scenario_id     INTEGER NOT NULL,
+    period_id       INTEGER NOT NULL,
+    member_id       INTEGER NOT NULL,                      -- line_item_id / ratio_id
+    PRIMARY KEY (batch_id, fact_table, company_id, scenario_id, period_id, member_id)
+) WITHOUT ROWID;
+
+-- -----------------------------------------------------------------------------
+-- INDEXES
+-- -----------------------------------------------------------------------------
+-- Companies by SEC filer; several share classes can map to one CIK
+CREATE INDEX IF NOT EXISTS idx_dim_company_cik ON dim_company(cik);
+-- One line item (or ratio) across periods and companies, e.g. revenue for
+-- every issuer in FY2024; covering, so cross-company reads never touch the table
+CREATE INDEX IF NOT EXISTS idx_fact_financials_item ON fact_financials(line_item_id, scenario_id, period_id, company_id, amount);
+CREATE INDEX IF NOT EXISTS idx_fact_ratios_ratio ON fact_ratios(ratio_id, scenario_id, period_id, company_id, value);
+-- One trading day across companies (the key rides along: trade_day, company_id)
+CREATE INDEX IF NOT EXISTS idx_fact_stock_bar_day ON fact_stock_bar(trade_day);
+CREATE INDEX IF NOT EXISTS idx_fact_financials_batch ON fact_financials(load_batch_id);
+CREATE INDEX IF NOT EXISTS idx_fact_ratios_batch ON fact_ratios(load_batch_id);
+CREATE INDEX IF NOT EXISTS idx_fact_stock_bar_batch ON fact_stock_bar(load_batch_id);
+-- One line item across companies as known at a date (bitemporal); covering
+CREATE INDEX IF NOT EXISTS idx_fact_financials_history_item
+    ON fact_financials_history(line_item_id, scenario_id, period_id, company_id, known_from, known_to, amount);
+-- Model runs by scenario, and one driver across runs (e.g. every draw with
+-- WACC above 11%); covering, run_id rides along. Outputs of a run set are a
+-- run_id range of fact_valuation's key and need no index of their own.
+CREATE INDEX IF NOT EXISTS idx_model_run_scenario ON model_run(company_id, scenario_id, run_set_id);
+CREATE INDEX IF NOT EXISTS idx_fact_assumptions_driver ON fact_assumptions(driver_id, period_id, value);
+
+-- -----------------------------------------------------------------------------
+-- SEED DATA
+-- -----------------------------------------------------------------------------
+INSERT OR IGNORE INTO dim_company (company_id, ticker, cik, company_name, fiscal_year_end_month) VALUES
+    (1, 'PYPL', '0001633917', 'PayPal Holdings, Inc.', 12);
+
+INSERT OR IGNORE INTO dim_company_group (group_id, group_name, description) VALUES
+    (1, 'All companies', 'Every company in dim_company (kept in sync by rollup.py)');
+
+INSERT OR IGNORE INTO dim_period (period_id, fiscal_year, quarter, period_type, period_label, start_date, end_date) VALUES
+    (1, 2019, NULL, 'actual', 'FY2019', NULL, NULL),
+    (2, 2020, NULL, 'actual', 'FY2020', NULL, NULL),
+    (3, 2021, NULL, 'actual', 'FY2021', NULL, NULL),
+    (4, 2022, NULL, 'actual', 'FY2022', NULL, NULL),
+    (5, 2023, NULL, 'actual', 'FY2023', NULL, NULL),
+    (6, 2024, NULL, 'actual', 'FY2024', NULL, NULL),
+    (7, 2025, NULL, 'forecast', 'FY2025E', NULL, NULL),
+    (8, 2026, NULL, 'forecast', 'FY2026E', NULL, NULL),
+    (9, 2027, NULL, 'forecast', 'FY2027E', NULL, NULL);
+
+INSERT OR IGNORE INTO dim_scenario (scenario_id, scenario_name, description, probability, color_code) VALUES
+    (1, 'Actual', 'Historical reported figures', NULL, '#333333'),
+    (2, 'Base Case', 'Management guidance + consensus estimates', 0.5, '#2E86AB'),
+    (3, 'Bull Case', 'Accelerated growth, margin expansion', 0.25, '#28A745'),
+    (4, 'Bear Case', 'Competitive pressure, margin compression', 0.25, '#DC3545'),
+    (5, 'TTM', 'Trailing twelve months at each fiscal quarter end (see scripts/ttm.py)', NULL, '#6C757D');
+
+INSERT OR IGNORE INTO dim_line_item (line_item_id, statement_type, item_name, item_category, display_order, is_subtotal, sign_convention) VALUES
+    (1, 'income_statement', 'Total Revenue', 'Revenue', 1, 1, 'positive'),
+    (2, 'income_statement', 'Transaction Revenue', 'Revenue', 2, 0, 'positive'),
+    (3, 'income_statement', 'Other Value Added Services', 'Revenue', 3, 0, 'positive'),
+    (4, 'income_statement', 'Cost of Revenue', 'Costs', 5, 0, 'positive'),
+    (5, 'income_statement', 'Gross Profit', 'Costs', 6, 1, 'positive'),
+    (6, 'income_statement', 'Transaction & Credit Losses', 'Operating Expenses', 8, 0, 'positive'),
+    (7, 'income_statement', 'Customer Support & Operations', 'Operating Expenses', 9, 0, 'positive'),
+    (8, 'income_statement', 'Sales & Marketing', 'Operating Expenses', 10, 0, 'positive'),
+    (9, 'income_statement', 'Technology & Development', 'Operating Expenses', 11, 0, 'positive'),
+    (10, 'income_statement', 'General & Administrative', 'Operating Expenses', 12, 0, 'positive'),
+    (11, 'income_statement', 'Restructuring & Other', 'Operating Expenses', 13, 0, 'positive'),
+    (12, 'income_statement', 'Total Operating Expenses', 'Operating Expenses', 14, 1, 'positive'),
+    (13, 'income_statement', 'Operating Income', 'Operating', 15, 1, 'positive'),
+    (14, 'income_statement', 'Interest Income', 'Non-Operating', 17, 0, 'positive'),
+    (15, 'income_statement', 'Interest Expense', 'Non-Operating', 18, 0, 'positive'),
+    (16, 'income_statement', 'Other Income (Expense)', 'Non-Operating', 19, 0, 'positive'),
+    (17, 'income_statement', 'Income Before Taxes', 'Taxes', 21, 1, 'positive'),
+    (18, 'income_statement', 'Income Tax Expense', 'Taxes', 22, 0, 'positive'),
+    (19, 'income_statement', 'Effective Tax Rate', 'Taxes', 23, 0, 'positive'),
+    (20, 'income_statement', 'Net Income', 'Bottom Line', 25, 1, 'positive'),
+    (21, 'income_statement', 'EPS Basic', 'Per Share', 27, 0, 'positive'),
+    (22, 'income_statement', 'EPS Diluted', 'Per Share', 28, 0, 'positive'),
+    (23, 'income_statement', 'Shares Outstanding (Diluted)', 'Per Share', 29, 0, 'positive'),
+    (24, 'balance_sheet', 'Cash & Cash Equivalents', 'Current Assets', 1, 0, 'positive'),
+    (25, 'balance_sheet', 'Short-Term Investments', 'Current Assets', 2, 0, 'positive'),
+    (26, 'balance_sheet', 'Accounts Receivable', 'Current Assets', 3, 0, 'positive'),
+    (27, 'balance_sheet', 'Customer Accounts', 'Current Assets', 4, 0, 'positive'),
+    (28, 'balance_sheet', 'Other Current Assets', 'Current Assets', 5, 0, 'positive'),
+    (29, 'balance_sheet', 'Total Current Assets', 'Current Assets', 6, 1, 'positive'),
+    (30, 'balance_sheet', 'Property & Equipment Net', 'Non-Current Assets', 8, 0, 'positive'),
+    (31, 'balance_sheet', 'Goodwill', 'Non-Current Assets', 9, 0, 'positive'),
+    (32, 'balance_sheet', 'Intangible Assets', 'Non-Current Assets', 10, 0, 'positive'),
+    (33, 'balance_sheet', 'Other Non-Current Assets', 'Non-Current Assets', 11, 0, 'positive'),
+    (34, 'balance_sheet', 'Total Assets', 'Total', 13, 1, 'positive'),
+    (35, 'balance_sheet', 'Accounts Payable', 'Current Liabilities', 15, 0, 'positive'),
+    (36, 'balance_sheet', 'Customer Accounts Payable', 'Current Liabilities', 16, 0, 'positive'),
+    (37, 'balance_sheet', 'Accrued Expenses', 'Current Liabilities', 17, 0, 'positive'),
+    (38, 'balance_sheet', 'Short-Term Debt', 'Current Liabilities', 18, 0, 'positive'),
+    (39, 'balance_sheet', 'Other Current Liabilities', 'Current Liabilities', 19, 0, 'positive'),
+    (40, 'balance_sheet', 'Total Current Liabilities', 'Current Liabilities', 20, 1, 'positive'),
+    (41, 'balance_sheet', 'Long-Term Debt', 'Non-Current Liab', 22, 0, 'positive'),
+    (42, 'balance_sheet', 'Other Non-Current Liabilities', 'Non-Current Liab', 23, 0, 'positive'),
+    (43, 'balance_sheet', 'Total Liabilities', 'Total', 25, 1, 'positive'),
+    (44, 'balance_sheet', 'Common Stock', 'Equity', 27, 0, 'positive'),
+    (45, 'balance_sheet', 'Additional Paid-In Capital', 'Equity', 28, 0, 'positive'),
+    (46, 'balance_sheet', 'Treasury Stock', 'Equity', 29, 0, 'positive'),
+    (47, 'balance_sheet', 'Retained Earnings', 'Equity', 30, 0, 'positive'),
+    (48, 'balance_sheet', 'AOCI', 'Equity', 31, 0, 'positive'),
+    (49, 'balance_sheet', 'Total Stockholders Equity', 'Equity', 32, 1, 'positive'),
+    (50, 'balance_sheet', 'Total Liabilities & Equity', 'Total', 34, 1, 'positive'),
+    (51, 'cash_flow', 'Net Income', 'Operating', 1, 0, 'positive'),
+    (52, 'cash_flow', 'Depreciation & Amortization', 'Operating', 2, 0, 'positive'),
+    (53, 'cash_flow', 'Stock-Based Compensation', 'Operating', 3, 0, 'positive'),
+    (54, 'cash_flow', 'Changes in Working Capital', 'Operating', 4, 0, 'positive'),
+    (55, 'cash_flow', 'Other Operating Adjustments', 'Operating', 5, 0, 'positive'),
+    (56, 'cash_flow', 'Cash from Operations', 'Operating', 6, 1, 'positive'),
+    (57, 'cash_flow', 'Capital Expenditures', 'Investing', 8, 0, 'positive'),
+    (58, 'cash_flow', 'Acquisitions', 'Investing', 9, 0, 'positive'),
+    (59, 'cash_flow', 'Investment Purchases', 'Investing', 10, 0, 'positive'),
+    (60, 'cash_flow', 'Investment Sales/Maturities', 'Investing', 11, 0, 'positive'),
+    (61, 'cash_flow', 'Other Investing Activities', 'Investing', 12, 0, 'positive'),
+    (62, 'cash_flow', 'Cash from Investing', 'Investing', 13, 1, 'positive'),
+    (63, 'cash_flow', 'Debt Issuance', 'Financing', 15, 0, 'positive'),
+    (64, 'cash_flow', 'Debt Repayment', 'Financing', 16, 0, 'positive'),
+    (65, 'cash_flow', 'Share Repurchases', 'Financing', 17, 0, 'positive'),
+    (66, 'cash_flow', 'Other Financing Activities', 'Financing', 18, 0, 'positive'),
+    (67, 'cash_flow', 'Cash from Financing', 'Financing', 19, 1, 'positive'),
+    (68, 'cash_flow', 'Net Change in Cash', 'Summary', 21, 1, 'positive'),
+    (69, 'cash_flow', 'Free Cash Flow', 'Summary', 22, 1, 'positive');
+
+INSERT OR IGNORE INTO dim_ratio (ratio_id, ratio_name, ratio_category, formula_desc, format_type, benchmark_low, benchmark_high) VALUES
+    (1, 'Gross Margin', 'profitability', 'Gross Profit / Revenue', 'percentage', NULL, NULL),
+    (2, 'Operating Margin', 'profitability', 'Operating Income / Revenue', 'percentage', NULL, NULL),
+    (3, 'Net Margin', 'profitability', 'Net Income / Revenue', 'percentage', NULL, NULL),
+    (4, 'EBITDA Margin', 'profitability', 'EBITDA / Revenue', 'percentage', NULL, NULL),
+    (5, 'ROE', 'profitability', 'Net Income / Avg Equity', 'percentage', NULL, NULL),
+    (6, 'ROA', 'profitability', 'Net Income / Avg Total Assets', 'percentage', NULL, NULL),
+    (7, 'ROIC', 'profitability', 'NOPAT / Invested Capital', 'percentage', NULL, NULL),
+    (8, 'Current Ratio', 'liquidity', 'Current Assets / Current Liabilities', 'ratio', NULL, NULL),
+    (9, 'Quick Ratio', 'liquidity', '(Cash + ST Inv + AR) / Current Liab', 'ratio', NULL, NULL),
+    (10, 'Cash Ratio', 'liquidity', 'Cash / Current Liabilities', 'ratio', NULL, NULL),
+    (11, 'Debt to Equity', 'leverage', 'Total Debt / Equity', 'ratio', NULL, NULL),
+    (12, 'Net Debt to EBITDA', 'leverage', '(Total Debt - Cash) / EBITDA', 'multiple', NULL, NULL),
+    (13, 'Interest Coverage', 'leverage', 'EBIT / Interest Expense', 'multiple', NULL, NULL),
+    (14, 'Debt to Assets', 'leverage', 'Total Debt / Total Assets', 'ratio', NULL, NULL),
+    (15, 'Asset Turnover', 'efficiency', 'Revenue / Avg Total Assets', 'ratio', NULL, NULL),
+    (16, 'Revenue per Employee', 'efficiency', 'Revenue / Employees', 'ratio', NULL, NULL),
+    (17, 'P/E Ratio', 'valuation', 'Share Price / EPS', 'multiple', NULL, NULL),
+    (18, 'EV/EBITDA', 'valuation', 'Enterprise Value / EBITDA', 'multiple', NULL, NULL),
+    (19, 'EV/Revenue', 'valuation', 'Enterprise Value / Revenue', 'multiple', NULL, NULL),
+    (20, 'P/FCF', 'valuation', 'Market Cap / Free Cash Flow', 'multiple', NULL, NULL),
+    (21, 'FCF Yield', 'valuation', 'Free Cash Flow / Market Cap', 'percentage', NULL, NULL),
+    (22, 'Revenue Growth', 'growth', 'YoY Revenue Change %', 'percentage', NULL, NULL),
+    (23, 'Net Income Growth', 'growth', 'YoY Net Income Change %', 'percentage', NULL, NULL),
+    (24, 'EPS Growth', 'growth', 'YoY EPS Change %', 'percentage', NULL, NULL),
+    (25, 'FCF Growth', 'growth', 'YoY FCF Change %', 'percentage', NULL, NULL);
+
+INSERT OR IGNORE INTO dim_driver (driver_id, driver_name, driver_category, unit, description) VALUES
+    (1, 'last_actual_revenue', 'revenue', 'usd_millions', 'Revenue of the last reported year; forecast revenue compounds from it'),
+    (2, 'revenue_growth', 'revenue', 'fraction', 'YoY revenue growth'),
+    (3, 'gross_margin', 'costs', 'fraction', 'Gross Profit / Revenue'),
+    (4, 'opex_pct_revenue', 'costs', 'fraction', 'Operating expenses / Revenue'),
+    (5, 'operating_margin', 'costs', 'fraction', 'Operating Income / Revenue'),
+    (6, 'sbc_pct_revenue', 'costs', 'fraction', 'Stock-based compensation / Revenue (added back to FCF)'),
+    (7, 'tax_rate', 'taxes', 'fraction', 'Effective tax rate'),
+    (8, 'interest_expense', 'financing', 'usd_millions', 'Interest expense'),
+    (9, 'depreciation_amortization', 'capex', 'usd_millions', 'D&A (added back to FCF)'),
+    (10, 'capex', 'capex', 'usd_millions', 'Capital expenditures'),
+    (11, 'long_term_debt', 'financing', 'usd_millions', 'Year-end long-term debt'),
+    (12, 'free_cash_flow', 'cash_flow', 'usd_millions', 'Explicit FCF path; derived from the operating drivers when absent'),
+    (13, 'wacc', 'discount_rate', 'fraction', 'Weighted average cost of capital'),
+    (14, 'terminal_growth', 'terminal', 'fraction', 'Perpetuity growth after the forecast'),
+    (15, 'net_debt', 'bridge', 'usd_millions', 'Long-term debt less cash, latest actual'),
+    (16, 'diluted_shares', 'bridge', 'shares_millions', 'Diluted shares, latest actual'),
+    (17, 'current_price', 'bridge', 'usd', 'Market price the upside is measured against'),
+    (18, 'interest_income', 'financing', 'usd_millions', 'Interest income'),
+    (19, 'revenue_linked_working_capital', 'working_capital', 'usd_millions', 'Receivables less payables, latest actual; scales with revenue'),
+    (20, 'other_working_capital', 'working_capital', 'usd_millions', 'Customer accounts less accrued expenses, latest actual'),
+    (21, 'other_working_capital_growth', 'working_capital', 'fraction', 'YoY growth of other working capital');
+
+INSERT OR IGNORE INTO dim_valuation_metric (metric_id, metric_name, unit, description) VALUES
+    (1, 'pv_fcf', 'usd_millions', 'PV of projected FCFs'),
+    (2, 'terminal_value', 'usd_millions', 'FCF_final x (1+g) / (WACC-g)'),
+    (3, 'pv_terminal_value', 'usd_millions', 'Terminal value discounted over the forecast'),
+    (4, 'enterprise_value', 'usd_millions', 'PV of FCFs + PV of terminal value'),
+    (5, 'equity_value', 'usd_millions', 'Enterprise value - net debt'),
+    (6, 'implied_share_price', 'usd', 'Equity value / diluted shares'),
+    (7, 'upside', 'fraction', 'Implied price / current price - 1'),
+    (8, 'tv_pct_ev', 'fraction', 'PV of terminal value / enterprise value');
+
+-- -----------------------------------------------------------------------------
+-- VIEWS
+-- -----------------------------------------------------------------------------
+-- fact_stock_bar in the shape fact_stock_price had before migration 4, for
+-- reports and ad-hoc SQL. Filter on trade_day (fact_stock_bar) to range-scan.
+DROP VIEW IF EXISTS fact_stock_price;
+CREATE VIEW fact_stock_price AS
+SELECT
+    company_id,
+    date(2440587.5 + trade_day) AS trade_date,
+    open_price,
+    high_price,
+    low_price,
+    close_price,
+    adj_close,
+    volume,
+    load_batch_id
+FROM fact_stock_bar;
+
+DROP VIEW IF EXISTS vw_income_statement;
+CREATE VIEW vw_income_statement AS
+SELECT
+    dc.ticker,
+    dp.period_label,
+    dp.fiscal_year,
+    dp.period_type,
+    ds.scenario_name,
+    dli.item_name,
+    dli.item_category,
+    dli.display_order,
+    ff.amount,
+    ff.source
+FROM fact_financials ff
+JOIN dim_company dc ON ff.company_id = dc.company_id
+JOIN dim_period dp ON ff.period_id = dp.period_id
+JOIN dim_line_item dli ON ff.line_item_id = dli.line_item_id
+JOIN dim_scenario ds ON ff.scenario_id = ds.scenario_id
+WHERE dli.statement_type = 'income_statement'
+ORDER BY dc.ticker, dp.fiscal_year, dli.display_order;
+
+DROP VIEW IF EXISTS vw_ratios;
+CREATE VIEW vw_ratios AS
+SELECT
+    dc.ticker,
+    dp.period_label,
+    dp.fiscal_year,
+    dp.period_type,
+    ds.scenario_name,
+    dr.ratio_name,
+    dr.ratio_category,
+    dr.format_type,
+    fr.value,
+    dr.benchmark_low,
+    dr.benchmark_high
+FROM fact_ratios fr
+JOIN dim_company dc ON fr.company_id = dc.company_id
+JOIN dim_period dp ON fr.period_id = dp.period_id
+JOIN dim_ratio dr ON fr.ratio_id = dr.ratio_id
+JOIN dim_scenario ds ON fr.scenario_id = ds.scenario_id
+ORDER BY dc.ticker, dp.fiscal_year, dr.ratio_category, dr.ratio_name;
+
+-- Drivers and outputs of the latest scenario run per company and scenario
+-- (scenario runs are stored in full); other runs via scripts/model_runs.py
+DROP VIEW IF EXISTS vw_assumptions;
+CREATE VIEW vw_assumptions AS
+SELECT
+    dc.ticker,
+    dp.period_label,
+    dp.fiscal_year,
+    ds.scenario_name,
+    dd.driver_name,
+    dd.driver_category,
+    fa.value,
+    dd.unit,
+    dd.description AS notes,
+    mr.run_id
+FROM fact_assumptions fa
+JOIN model_run mr ON fa.run_id = mr.run_id
+JOIN dim_driver dd ON fa.driver_id = dd.driver_id
+JOIN dim_company dc ON mr.company_id = dc.company_id
+JOIN dim_scenario ds ON mr.scenario_id = ds.scenario_id
+LEFT JOIN dim_period dp ON fa.period_id = dp.period_id
+WHERE mr.run_id IN (
+    SELECT MAX(r.run_id) FROM model_run r
+    JOIN model_run_set rs ON r.run_set_id = rs.run_set_id
+    WHERE rs.run_kind = 'scenario'
+    GROUP BY r.company_id, r.scenario_id
+)
+ORDER BY dc.ticker, ds.scenario_name, dp.fiscal_year, dd.driver_category;
+
+DROP VIEW IF EXISTS vw_valuation;
+CREATE VIEW vw_valuation AS
+SELECT
+    dc.ticker,
+    ds.scenario_name,
+    ds.probability,
+    dm.metric_name,
+    fv.value,
+    dm.unit,
+    mr.run_id
+FROM fact_valuation fv
+JOIN model_run mr ON fv.run_id = mr.run_id
+JOIN dim_valuation_metric dm ON fv.metric_id = dm.metric_id
+JOIN dim_company dc ON mr.company_id = dc.company_id
+JOIN dim_scenario ds ON mr.scenario_id = ds.scenario_id
+WHERE mr.run_id IN (
+    SELECT MAX(r.run_id) FROM model_run r
+    JOIN model_run_set rs ON r.run_set_id = rs.run_set_id
+    WHERE rs.run_kind = 'scenario'
+    GROUP BY r.company_id, r.scenario_id
+)
+ORDER BY dc.ticker, ds.scenario_name, dm.metric_id;